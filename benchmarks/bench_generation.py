@@ -0,0 +1,123 @@
+"""
+Benchmarks of the generation path.
+
+Run with pytest-benchmark from the repository root:
+
+    pytest benchmarks --benchmark-autosave --benchmark-compare \
+        --benchmark-compare-fail=mean:25%
+
+or through `tox -e bench`, which does the same and fails on a regression of
+more than 25% against the last saved run.
+"""
+
+import itertools
+import shutil
+
+from conftest import measure_peak_alloc, record_rate
+from jobsubmit.cli import (
+    SlurmJobConfig,
+    chunk_iter,
+    generate_custom_args,
+    generate_slurm_header,
+    generate_task_str,
+    ordered_pool_map,
+    parse_custom_arg,
+    write_job,
+)
+from jobsubmit.fileindex import FileIndex, set_file_index
+from jobsubmit.template import Template
+
+
+def consume(iterable):
+    for _ in iterable:
+        pass
+
+
+def test_parse_custom_arg_range(benchmark, n_tasks):
+    benchmark(parse_custom_arg, f"1-{n_tasks}")
+
+
+def test_parse_custom_arg_glob(benchmark, file_tree):
+    pattern = str(file_tree / "sample_*" / "*.fastq")
+
+    def run():
+        set_file_index(FileIndex())
+        return parse_custom_arg(pattern)
+
+    matches = benchmark(run)
+    set_file_index(None)
+    record_rate(benchmark, len(matches), "files")
+
+
+def test_generate_custom_args(benchmark, n_tasks):
+    custom_args = {"filename": "x.txt", "seed": f"1-{n_tasks // 10}", "rep": "1-10"}
+    benchmark.pedantic(lambda: consume(generate_custom_args(custom_args)), rounds=3)
+    record_rate(benchmark, n_tasks)
+    benchmark.extra_info["peak_alloc_mb"] = measure_peak_alloc(
+        consume, generate_custom_args(custom_args)
+    )
+
+
+def test_generate_task_str(benchmark, template_str):
+    args = {"filename": "/data/sample_01/read_0001.fastq", "seed": 17}
+    benchmark(generate_task_str, template_str, args)
+
+
+def test_render_many(benchmark, n_tasks, template_str):
+    template = Template(template_str)
+    rows = list(
+        itertools.islice(
+            generate_custom_args({"filename": "x.txt", "seed": f"1-{n_tasks}"}),
+            n_tasks,
+        )
+    )
+    benchmark.pedantic(lambda: consume(template.render_many(rows)), rounds=3)
+    record_rate(benchmark, n_tasks)
+
+
+def test_generate_slurm_header(benchmark):
+    config = SlurmJobConfig()
+    benchmark(generate_slurm_header, config, "/runs/1234", 1234)
+
+
+def test_chunk_iter(benchmark, n_tasks):
+    benchmark.pedantic(lambda: consume(chunk_iter(range(n_tasks), 10)), rounds=3)
+    record_rate(benchmark, n_tasks)
+
+
+def write_sweep(run_dir, n_jobs, workers):
+    slurm_config = SlurmJobConfig()
+    template = Template("python run.py --seed {seed}\n")
+    jobs = enumerate(chunk_iter(generate_custom_args({"seed": f"1-{n_jobs}"}), 1))
+
+    def write(job):
+        i, chunk = job
+        return write_job(slurm_config, run_dir, i, template, chunk)
+
+    consume(ordered_pool_map(write, jobs, workers))
+
+
+def test_write_jobs(benchmark, tmp_path):
+    n_jobs = 1000
+    counter = itertools.count()
+
+    def setup():
+        run_dir = tmp_path / str(next(counter))
+        return (str(run_dir), n_jobs, 1), {}
+
+    benchmark.pedantic(write_sweep, setup=setup, rounds=5)
+    record_rate(benchmark, n_jobs, "files")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def test_write_jobs_pooled(benchmark, tmp_path):
+    n_jobs = 1000
+    counter = itertools.count()
+
+    def setup():
+        run_dir = tmp_path / str(next(counter))
+        return (str(run_dir), n_jobs, 8), {}
+
+    benchmark.pedantic(write_sweep, setup=setup, rounds=5)
+    record_rate(benchmark, n_jobs, "files")
+    shutil.rmtree(tmp_path, ignore_errors=True)
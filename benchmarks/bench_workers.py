@@ -0,0 +1,70 @@
+"""
+Compares serial and pooled job script writing.
+
+Writes the same sweep with --workers 1 and a few larger pool sizes into a
+tmpfs directory (/dev/shm when available) and reports jobs per second.
+
+    python benchmarks/bench_workers.py --jobs 20000 --workers 1 4 16
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from jobsubmit.cli import (
+    SlurmJobConfig,
+    chunk_iter,
+    generate_custom_args,
+    ordered_pool_map,
+    write_job,
+)
+from jobsubmit.template import Template
+
+
+def get_tmpfs_dir():
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return tempfile.mkdtemp(dir="/dev/shm")
+    return tempfile.mkdtemp()
+
+
+def run(run_dir, n_jobs, workers):
+    slurm_config = SlurmJobConfig()
+    template = Template("echo {a} {b}\nsleep 1", ["a", "b"])
+    custom_args = {"a": f"0-{n_jobs - 1}", "b": "x"}
+    jobs = enumerate(chunk_iter(generate_custom_args(custom_args), 1))
+
+    def write(job):
+        i, chunk = job
+        return write_job(slurm_config, run_dir, i, template, chunk)[0]
+
+    start = time.perf_counter()
+    with open(os.path.join(run_dir, "README_SUBMIT"), "w") as f:
+        for path in ordered_pool_map(write, jobs, workers):
+            f.write(f"sbatch {path}\n")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    base = get_tmpfs_dir()
+    try:
+        for workers in args.workers:
+            run_dir = os.path.join(base, f"workers-{workers}")
+            os.makedirs(run_dir)
+            elapsed = run(run_dir, args.jobs, workers)
+            print(
+                f"workers={workers:<3d} jobs={args.jobs} time={elapsed:.2f}s "
+                f"rate={args.jobs / elapsed:.0f} jobs/s"
+            )
+            shutil.rmtree(run_dir)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import resource
+import tracemalloc
+
+import pytest
+
+# sweep sizes, add 1000000 for the largest sweeps:
+#   JOBSUBMIT_BENCH_SIZES=1000,100000,1000000 tox -e bench
+SIZES = [
+    int(n) for n in os.environ.get("JOBSUBMIT_BENCH_SIZES", "1000,100000").split(",")
+]
+
+
+def get_peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in MB. It only grows,
+    so it is the high-water mark of every benchmark run so far in the
+    session, not of one benchmark; see measure_peak_alloc for that.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def record_rate(benchmark, n, unit="tasks"):
+    """
+    Adds the throughput of the last benchmark and the process high-water
+    memory to the benchmark's extra_info, so they show up in the saved json.
+    There is no throughput under --benchmark-disable.
+    """
+    if benchmark.stats is not None:
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info[f"{unit}_per_second"] = n / mean if mean > 0 else 0
+    benchmark.extra_info["process_peak_rss_mb"] = get_peak_rss_mb()
+
+
+def measure_peak_alloc(func, *args):
+    """
+    Runs func once and returns the peak python memory it allocated in MB.
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"{n}")
+def n_tasks(request):
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def file_tree(tmp_path_factory):
+    """
+    A synthetic input tree of 20 directories with 500 files each.
+    """
+    base = tmp_path_factory.mktemp("inputs")
+    for i in range(20):
+        d = base / f"sample_{i:02d}"
+        d.mkdir()
+        for j in range(500):
+            (d / f"read_{j:04d}.fastq").touch()
+        (d / "reference.fa").touch()
+    return base
+
+
+SMALL_TEMPLATE = "python run.py --input {filename} --seed {seed}\n"
+LARGE_TEMPLATE = (
+    "\n".join(
+        f"# step {i}\npython step_{i}.py --input {{filename}} --seed {{seed}} "
+        f"--out out_{i}_{{seed}}.txt"
+        for i in range(200)
+    )
+    + "\n"
+)
+
+
+@pytest.fixture(params=["small", "large"])
+def template_str(request):
+    return SMALL_TEMPLATE if request.param == "small" else LARGE_TEMPLATE
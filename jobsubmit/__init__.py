@@ -1,3 +1,25 @@
-__author__ = 'Joe Yesselman'
-__email__ = 'jyesselm@unl.edu'
-__version__ = '0.1.0'
+__author__ = "Joe Yesselman"
+__email__ = "jyesselm@unl.edu"
+__version__ = "0.1.0"
+
+from jobsubmit.jobset import (
+    ArchiveSink,
+    ArraySink,
+    FileSystemSink,
+    Job,
+    JobSet,
+    MemorySink,
+    Sink,
+    generate,
+)
+
+__all__ = [
+    "ArchiveSink",
+    "ArraySink",
+    "FileSystemSink",
+    "Job",
+    "JobSet",
+    "MemorySink",
+    "Sink",
+    "generate",
+]
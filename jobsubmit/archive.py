@@ -0,0 +1,105 @@
+import os
+
+# each index entry is "<offset> <length>\n" with fixed width fields, so the
+# entry of job n starts at byte n * INDEX_ENTRY_SIZE
+OFFSET_WIDTH = 20
+LENGTH_WIDTH = 12
+INDEX_ENTRY_SIZE = OFFSET_WIDTH + LENGTH_WIDTH + 2
+LOG_DIR_NAME = "logs"
+
+
+def get_archive_paths(run_dir: str, name: str):
+    """
+    Returns the absolute paths of the script archive and its index.
+    """
+    run_dir = os.path.abspath(run_dir)
+    return f"{run_dir}/{name}-jobs.bin", f"{run_dir}/{name}-jobs.idx"
+
+
+class ArchiveWriter:
+    """
+    Appends job scripts to a single archive file and records the offset and
+    length of each one in a fixed width index, so a run writes two files no
+    matter how many jobs it has.
+    """
+
+    def __init__(self, archive_path: str, index_path: str):
+        self.archive_path = archive_path
+        self.index_path = index_path
+        self._archive = open(archive_path, "wb")
+        self._index = open(index_path, "w")
+        self._offset = 0
+        self.n_jobs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, script: str) -> int:
+        """
+        Appends a script and returns its job index.
+        """
+        data = script.encode()
+        self._archive.write(data)
+        self._index.write(
+            f"{self._offset:0{OFFSET_WIDTH}d} {len(data):0{LENGTH_WIDTH}d}\n"
+        )
+        self._offset += len(data)
+        self.n_jobs += 1
+        return self.n_jobs - 1
+
+    def close(self) -> None:
+        self._archive.close()
+        self._index.close()
+
+
+def read_archive_script(archive_path: str, index_path: str, job_num: int) -> str:
+    """
+    Returns the script of job job_num from an archive, reading only its index
+    entry and its bytes.
+    """
+    with open(index_path) as f:
+        f.seek(job_num * INDEX_ENTRY_SIZE)
+        entry = f.read(INDEX_ENTRY_SIZE)
+    if len(entry) != INDEX_ENTRY_SIZE:
+        raise IndexError(f"no job {job_num} in {index_path}")
+    offset, length = (int(x) for x in entry.split())
+    with open(archive_path, "rb") as f:
+        f.seek(offset)
+        return f.read(length).decode()
+
+
+def generate_launcher_body(archive_path: str, index_path: str, job_dir: str) -> str:
+    """
+    Generates the part of the launcher script that extracts and runs the
+    script of one job. The job index is the first argument of the launcher,
+    or SLURM_ARRAY_TASK_ID when it is submitted as an array. The script is
+    sourced, so it sees the variables and functions of the header commands
+    that come before this body.
+
+    Parameters:
+    - archive_path (str): The script archive.
+    - index_path (str): The index of the archive.
+    - job_dir (str): A shell expression for the directory of job $JS_JOB,
+      created before the script runs.
+
+    Returns:
+    - str: The script body.
+    """
+    lines = [
+        'JS_JOB="${1:-$SLURM_ARRAY_TASK_ID}"',
+        f"JS_ARCHIVE={archive_path}",
+        f"JS_INDEX={index_path}",
+        f"read -r JS_OFFSET JS_LENGTH < <(tail -c +$((JS_JOB * {INDEX_ENTRY_SIZE} + 1)) "
+        f'"$JS_INDEX" | head -c {INDEX_ENTRY_SIZE})',
+        'if [ -z "$JS_LENGTH" ]; then',
+        '    echo "no job $JS_JOB in $JS_INDEX" >&2',
+        "    exit 1",
+        "fi",
+        f"JS_JOB_DIR={job_dir}",
+        'mkdir -p "$JS_JOB_DIR"',
+        'source <(tail -c +$((10#$JS_OFFSET + 1)) "$JS_ARCHIVE" | head -c $((10#$JS_LENGTH)))',
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import re
+import shlex
+import shutil
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from jobsubmit.layout import check_job_path
+from jobsubmit.logger import get_logger
+from jobsubmit.template import Template
+
+log = get_logger("cache")
+
+# custom argument holding the cache key of a task that is not cached yet
+CACHE_KEY_KEY = "JOBSUBMIT_CACHE_KEY"
+LINK_MODES = ("hard", "symlink")
+# entries being stored by a job, renamed into place once complete
+TMP_MARK = ".tmp."
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+
+
+@dataclass
+class CacheConfig:
+    """
+    A result cache shared between sweeps.
+
+    Attributes:
+        dir (str): The cache directory, entries are stored in
+            dir/<key[:2]>/<key>.
+        outputs (list): The output file templates of a task, relative to the
+            job directory, e.g. "{sample}.bam".
+        inputs (list): The custom arguments naming input files whose size
+            and modification time are part of the cache key. None to use
+            every argument whose value is an absolute path to a file.
+        link (str): How cached outputs are placed in a job directory, "hard"
+            links (symbolic links across filesystems) or "symlink".
+        max_size (int): The size the cache is trimmed to by evict_cache, 0
+            for no limit.
+    """
+
+    dir: str
+    outputs: List[Template] = field(default_factory=list)
+    inputs: List[str] = None
+    link: str = "hard"
+    max_size: int = 0
+
+
+def parse_size(value: Union[int, str]) -> int:
+    """
+    Returns the number of bytes of a size such as 500, "800MB" or "1.5T".
+    """
+    if isinstance(value, int):
+        return value
+    m = SIZE_RE.match(str(value))
+    if m is None:
+        raise ValueError(f"invalid size: {value}")
+    return int(float(m.group(1)) * SIZE_UNITS[m.group(2).upper()])
+
+
+def get_cache_config(value: Dict) -> CacheConfig:
+    """
+    Builds the CacheConfig from the cache field of the config, a dict with
+    dir, outputs and optionally inputs, link and max_size.
+
+    Returns:
+    - CacheConfig, or None if the field is not set.
+
+    Raises:
+    - ValueError: If dir or outputs are missing, an output is not a
+      relative path inside the job directory, or link is unknown.
+    """
+    if not value:
+        return None
+    if not value.get("dir") or not value.get("outputs"):
+        raise ValueError("cache needs a dir and a list of outputs")
+    outputs = value["outputs"]
+    if isinstance(outputs, str):
+        outputs = [outputs]
+    for output in outputs:
+        check_job_path(output, "cache output")
+    link = value.get("link", "hard")
+    if link not in LINK_MODES:
+        raise ValueError(
+            f"unknown cache link: {link}, expected one of {', '.join(LINK_MODES)}"
+        )
+    return CacheConfig(
+        os.path.abspath(value["dir"]),
+        [Template(output) for output in outputs],
+        value.get("inputs"),
+        link,
+        parse_size(value.get("max_size", 0)),
+    )
+
+
+def get_task_key(
+    task_str: str,
+    custom_args: Dict,
+    inputs: List[str] = None,
+    outputs: Iterable[str] = (),
+) -> str:
+    """
+    Returns the cache key of a task: a hash of its rendered text, its
+    declared outputs and the size and modification time of its input files.
+
+    Parameters:
+    - task_str (str): The rendered task.
+    - custom_args (dict): The custom arguments of the task.
+    - inputs (list, optional): The arguments naming input files, by default
+      every argument whose value is an absolute path to a file.
+    - outputs (iterable): The outputs of the task, see get_task_outputs.
+
+    Raises:
+    - ValueError: If an argument named in inputs is missing.
+    """
+    h = hashlib.sha256(task_str.encode())
+    for output in outputs:
+        h.update(f"\0>{output}".encode())
+    if inputs is None:
+        paths = [
+            v
+            for k, v in sorted(custom_args.items())
+            if isinstance(v, str) and os.path.isabs(v) and os.path.isfile(v)
+        ]
+    else:
+        missing = [k for k in inputs if k not in custom_args]
+        if missing:
+            raise ValueError(f"cache inputs have no value: {', '.join(missing)}")
+        paths = [str(custom_args[k]) for k in inputs]
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"\0{path}\0{st.st_size}\0{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def get_entry_dir(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def get_cache_names(cache: CacheConfig) -> Set[str]:
+    """
+    Returns the custom arguments the cache uses: the placeholders of its
+    outputs and its inputs.
+    """
+    names = set(cache.inputs or ())
+    for output in cache.outputs:
+        names.update(output.placeholders)
+    return names
+
+
+def get_task_outputs(cache: CacheConfig, custom_args: Dict) -> List[str]:
+    """
+    Returns the rendered outputs of a task.
+
+    Raises:
+    - ValueError: If an output does not render to a path inside the job
+      directory, e.g. an empty value.
+    """
+    return [
+        check_job_path(output.render(custom_args), "cache output")
+        for output in cache.outputs
+    ]
+
+
+def link_cached_outputs(cache: CacheConfig, key: str, outputs, job_dir: str) -> bool:
+    """
+    Links the outputs of a cached task into its job directory and marks the
+    cache entry as used. Outputs already in the job directory are replaced.
+
+    Returns:
+    - bool: Whether the task is in the cache with every one of its outputs,
+      an entry stored before an output was declared is not used.
+
+    Raises:
+    - ValueError: If an output is the job directory itself.
+    """
+    real_job_dir = os.path.realpath(job_dir)
+    for output in outputs:
+        if os.path.realpath(os.path.join(job_dir, output)) == real_job_dir:
+            raise ValueError(f"cache output is the job dir: {output!r}")
+    entry = get_entry_dir(cache.dir, key)
+    if not os.path.isdir(entry):
+        return False
+    if not all(os.path.exists(os.path.join(entry, output)) for output in outputs):
+        return False
+    for output in outputs:
+        src = os.path.join(entry, output)
+        dst = os.path.join(job_dir, output)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            shutil.rmtree(dst)
+        elif os.path.lexists(dst):
+            os.remove(dst)
+        if cache.link == "hard":
+            try:
+                os.link(src, dst)
+                continue
+            except OSError:
+                pass
+        os.symlink(src, dst)
+    # the modification time of an entry is its last use, see evict_cache
+    os.utime(entry)
+    return True
+
+
+def generate_store_function(cache_dir: str) -> str:
+    """
+    Generates the _js_cache_store shell function that copies the outputs of
+    a task that exited with 0 into a new cache entry. The entry is filled
+    under a temporary name and renamed into place, so a partial entry is
+    never used. The function returns the exit code it was given.
+    """
+    return "\n".join(
+        [
+            f"export JS_CACHE_DIR={shlex.quote(cache_dir)}",
+            "_js_cache_store() {",
+            "    local rc=$1 key=$2 dir=$3 entry tmp out",
+            "    shift 3",
+            '    entry="$JS_CACHE_DIR/${key:0:2}/$key"',
+            '    if [ "$rc" -ne 0 ] || [ -d "$entry" ]; then return "$rc"; fi',
+            f'    tmp="$entry{TMP_MARK}$$.$RANDOM"',
+            '    mkdir -p "$tmp" || return "$rc"',
+            '    for out in "$@"; do',
+            '        if ! { [ -e "$dir/$out" ] && mkdir -p "$tmp/$(dirname "$out")" '
+            '&& cp -pR "$dir/$out" "$tmp/$out"; }; then',
+            '            rm -rf "$tmp"',
+            '            return "$rc"',
+            "        fi",
+            "    done",
+            '    mv -T "$tmp" "$entry" 2> /dev/null || rm -rf "$tmp"',
+            '    return "$rc"',
+            "}",
+            "export -f _js_cache_store",
+            "",
+        ]
+    )
+
+
+def generate_cached_task(
+    task_str: str, key: str, output_dir: str, outputs: Iterable[str]
+) -> str:
+    """
+    Wraps a rendered task so its outputs are stored in the cache if it
+    succeeds. output_dir is the quoted shell word of the directory the
+    outputs are written to.
+    """
+    args = " ".join(shlex.quote(output) for output in outputs)
+    return f"{{\n{task_str}\n}}\n_js_cache_store $? {key} {output_dir} {args}"
+
+
+def get_entry_size(entry: str) -> int:
+    size = 0
+    for root, _, files in os.walk(entry):
+        size += sum(os.lstat(os.path.join(root, name)).st_size for name in files)
+    return size
+
+
+def evict_cache(cache_dir: str, max_size: int) -> Tuple[int, int]:
+    """
+    Removes the least recently used cache entries until the cache holds at
+    most max_size bytes. Entries still being stored are left alone.
+
+    Outputs linked from a removed entry survive as hard links, symbolic
+    links to it break.
+
+    Returns:
+    - tuple: The number of entries removed and the bytes freed.
+    """
+    entries = []
+    total = 0
+    if os.path.isdir(cache_dir):
+        for prefix in os.scandir(cache_dir):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.is_dir() and TMP_MARK not in entry.name:
+                    size = get_entry_size(entry.path)
+                    entries.append((entry.stat().st_mtime, entry.path, size))
+                    total += size
+    entries.sort()
+    n_removed = freed = 0
+    for _, path, size in entries:
+        if total - freed <= max_size:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        n_removed += 1
+        freed += size
+    log.info(
+        f"cache {cache_dir} holds {total - freed} bytes after removing "
+        f"{n_removed} of {len(entries)} entries"
+    )
+    return n_removed, freed
@@ -1,256 +1,584 @@
-import re
 import os
-import glob
+import cProfile
+import contextlib
+import functools
+import shutil
+import tempfile
 import click
-import yaml
-import itertools
-import pandas as pd
-from dataclasses import dataclass, asdict, field
-from typing import Dict, List, Union
 
 from jobsubmit.logger import get_logger, setup_applevel_logger
-from jobsubmit.settings import get_lib_path
+from jobsubmit.defaults import DEFAULTS_ENV, load_yaml
+from jobsubmit.template import Template
+from jobsubmit.dataframe import (
+    CSV_ENGINES,
+    count_table_rows,
+    iter_table_rows,
+    read_table_columns,
+)
+from jobsubmit.fileindex import FileIndex, set_file_index
+from jobsubmit.plan import get_limits, plan_jobset, total_plan
+from jobsubmit.profiling import METRICS_NAME, PhaseTimer, get_timer, set_timer
+from jobsubmit.cache import evict_cache, get_cache_config, get_cache_names, parse_size
+from jobsubmit.constraints import get_predicates
+from jobsubmit.packing import get_cost_names
+from jobsubmit.staging import get_stage_config, get_stage_names
+from jobsubmit.shards import merge_shards, parse_shard
+from jobsubmit.sweeps import expand_sweeps, generate_sweeps, is_multi_sweep
+from jobsubmit.submit import SUBMITTED_NAME, SubmitConfig, submit_jobs
+
+# the generation functions used to live here and are still importable from
+# jobsubmit.cli
+from jobsubmit.defaults import (  # noqa: F401
+    fill_in_missing_default_dict_values,
+    fill_in_missing_default_params,
+)
+from jobsubmit.scripts import (  # noqa: F401
+    HEADER_KEYS,
+    SlurmJobConfig,
+    generate_job_body,
+    generate_job_script,
+    generate_slurm_header,
+    generate_task_str,
+    write_job,
+    write_job_array,
+    write_slurm_script,
+)
+from jobsubmit.jobset import (  # noqa: F401
+    ArchiveSink,
+    ArraySink,
+    FileSystemSink,
+    JobSet,
+    build_param_space,
+    chunk_iter,
+    chunk_list,
+    generate_custom_args,
+    ordered_pool_map,
+    parse_custom_arg,
+    repeat_iter,
+)
 
 log = get_logger("cli")
 
 
-@dataclass
-class SlurmJobConfig:
+class DefaultCommandGroup(click.Group):
     """
-    Represents the configuration for a Slurm job.
-
-    Attributes:
-        job_name (str): The name of the job.
-        time (str): The maximum time for the job to run.
-        nodes (int): The number of nodes to allocate for the job.
-        ntasks_per_node (int): The number of tasks to run per node.
-        mem (str): The amount of memory to allocate for the job.
+    A click group that runs its default command when the first argument is
+    not a subcommand, so `jobsubmit template.txt config.yml` keeps working
+    next to `jobsubmit submit`.
     """
 
-    job_name: str = "test"
-    time: str = "01:00:00"
-    nodes: int = 1
-    ntasks_per_node: int = 1
-    mem: str = "2GB"
+    def __init__(self, *args, default_command=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
 
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ("--help", "-h"):
+            args = [self.default_command] + list(args)
+        return super().parse_args(ctx, args)
 
-def generate_slurm_header(config: SlurmJobConfig, job_dir="", job_num=-1):
-    """
-    Generate the SLURM header for a job submission.
-
-    Args:
-        config (SlurmJobConfig): The configuration object for the SLURM job.
-        job_dir (str, optional): The directory where the job output files will be stored. Defaults to "".
-        job_num (int, optional): The job number. Defaults to -1.
 
-    Returns:
-        str: The generated SLURM header as a string.
+@click.group(cls=DefaultCommandGroup, default_command="generate")
+def cli():
     """
-    path = get_lib_path() + "/jobsubmit/resources/job_header.txt"
-    f = open(path)
-    header = f.read()
-    f.close()
-    args = asdict(config)
-    if job_num == -1:
-        name = args["job_name"]
-    else:
-        name = args["job_name"] + "-" + str(job_num)
-    if not job_dir == "" and not job_dir.endswith("/"):
-        job_dir = job_dir + "/"
-    args["output"] = job_dir + f"{name}.out"
-    args["error"] = job_dir + f"{name}.err"
-    args["job_name"] = f"{name}"
-
-    header = (
-        re.sub(r"\{(\w+)\}", lambda m: str(args.get(m.group(1), "")), header) + "\n\n"
-    )
-    return header
-
-
-import re
-
-
-def generate_task_str(template_str, custom_args):
+    Generate and submit SLURM job scripts.
     """
-    Generate a customized SLURM script by substituting placeholders in the template string
-    with corresponding values from the custom_args dictionary.
 
-    The function searches for placeholders in the format {VAR} within the template string
-    and replaces them with the values provided in the custom_args dictionary. If a placeholder
-    does not have a corresponding value in custom_args, it is replaced with an empty string.
 
-    Parameters:
-    template_str (str): The SLURM script template containing placeholders in the format {VAR}.
-    custom_args (dict): A dictionary where keys are placeholder names (without curly braces)
-                        and values are the values to substitute in the template.
-
-    Returns:
-    str: The customized SLURM script with placeholders replaced by their corresponding values.
-
-    Example:
-    template = "sbatch --job-name={JOB_NAME} --output={OUTPUT_FILE} script.sh"
-    args = {"JOB_NAME": "my_job", "OUTPUT_FILE": "output.txt"}
-    result = generate_task_str(template, args)
-    # result will be: "sbatch --job-name=my_job --output=output.txt script.sh"
+@cli.command("generate")
+@click.argument("template", type=click.Path(exists=True))
+@click.argument("yaml_config", type=click.Path(exists=True))
+@click.option("--extra-header-cmds", type=click.Path(exists=True), default=None)
+@click.option("--dataframe", default=None, type=click.Path(exists=True))
+@click.option(
+    "--csv-engine",
+    default="auto",
+    type=click.Choice(CSV_ENGINES),
+    help="how csv dataframes are parsed: pandas parses numbers, python keeps "
+    "values as written and starts faster; auto uses pandas if installed",
+)
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of threads rendering and writing job scripts",
+)
+@click.option(
+    "--array",
+    is_flag=True,
+    help="write a single SLURM job array instead of one script per job",
+)
+@click.option(
+    "--archive",
+    is_flag=True,
+    help="write all job scripts into one archive run by a single array launcher",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="only rewrite jobs whose script changed since the last run",
+)
+@click.option(
+    "--glob-cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="json file caching directory listings used by wildcard arguments",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="only write jobs for the tasks that have not completed in run_dir",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="log the time spent in each phase and write it to " f"run_dir/{METRICS_NAME}",
+)
+@click.option(
+    "--profile-out",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="also write cProfile stats to this file, implies --profile",
+)
+@click.option(
+    "--header-template",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="SLURM header template to use instead of the built-in one",
+)
+@click.option(
+    "--defaults",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help=f"site defaults file with named profiles, ${DEFAULTS_ENV} by default",
+)
+@click.option(
+    "--sweep-workers",
+    default=4,
+    type=click.IntRange(min=1),
+    help="number of sweeps of a multi-sweep config generated at once",
+)
+@click.option(
+    "--shard",
+    default=None,
+    help="only write the jobs of shard K/N (K from 0), combine the shards "
+    "with jobsubmit merge",
+)
+@click.option(
+    "--plan",
+    is_flag=True,
+    help="report the tasks, jobs, files and core-hours the config would "
+    "produce and check them against the site limits, without writing anything",
+)
+def main(
+    template,
+    yaml_config,
+    dataframe=None,
+    extra_header_cmds=None,
+    workers=1,
+    array=False,
+    incremental=False,
+    glob_cache=None,
+    resume=False,
+    profile=False,
+    profile_out=None,
+    header_template=None,
+    defaults=None,
+    archive=False,
+    csv_engine="auto",
+    sweep_workers=4,
+    shard=None,
+    plan=False,
+):
     """
-    # Substitute placeholders
-    script = re.sub(
-        r"\{(\w+)\}", lambda m: str(custom_args.get(m.group(1), "")), template_str
-    )
-    return script
-
-
-def write_slurm_script(filename, script_content):
+    Generate multiple SLURM job scripts.
     """
-    Write the SLURM script content to a file.
+    setup_applevel_logger()
+    timer = PhaseTimer() if profile or profile_out else None
+    set_timer(timer)
+    profiler = cProfile.Profile() if profile_out else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        run_dir, n_jobs = generate_jobs(
+            template,
+            yaml_config,
+            dataframe,
+            extra_header_cmds,
+            workers,
+            array,
+            incremental,
+            glob_cache,
+            resume,
+            header_template,
+            defaults,
+            archive,
+            csv_engine,
+            sweep_workers,
+            shard,
+            plan,
+        )
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_out)
+            log.info(f"cProfile stats written to {profile_out}")
+        set_timer(None)
+    if timer is not None:
+        timer.log_summary(log)
+    if timer is not None and not plan:
+        path = os.path.join(run_dir, METRICS_NAME)
+        if shard is not None:
+            # one file per shard, they may run at the same time
+            path = path.replace(".json", f"-{shard.replace('/', '-of-')}.json")
+        timer.write_json(path, jobs=n_jobs, workers=workers, array=array)
+        log.info(f"Metrics written to {path}")
+
+
+def generate_jobs(
+    template,
+    yaml_config,
+    dataframe=None,
+    extra_header_cmds=None,
+    workers=1,
+    array=False,
+    incremental=False,
+    glob_cache=None,
+    resume=False,
+    header_template=None,
+    defaults=None,
+    archive=False,
+    csv_engine="auto",
+    sweep_workers=1,
+    shard=None,
+    plan=False,
+):
     """
-    with open(filename, "w") as f:
-        f.write(script_content)
+    Generates the job scripts of a template and YAML config and writes the
+    README_SUBMIT job list, the work behind the generate command. Reads the
+    files and hands them to a JobSet.
 
+    A config with a sweeps list (see expand_sweeps) generates every sweep in
+    one run, sweep_workers at a time. A sweep can set its own template file,
+    the others use template.
 
-def parse_custom_arg(arg: str) -> List[Union[str, int]]:
-    """
-    Parse a custom argument that can be a list of strings, a wildcard pattern,
-    or a range.
-    """
-    if "*" in arg or "?" in arg or "[" in arg:
-        return [os.path.abspath(x) for x in glob.glob(arg)]
-    elif "-" in arg or "," in arg:
-        # Process a range or a comma-separated list of ranges/numbers
-        ranges = [range_item.strip() for range_item in arg.split(",")]
-        numbers = set()
-        for r in ranges:
-            if "-" in r:
-                start, end = map(int, r.split("-"))
-                numbers.update(range(start, end + 1))
-            else:
-                numbers.add(int(r))
-        return sorted(numbers)
-    else:
-        return [arg]
+    With shard "K/N" only the jobs of that shard are written and
+    README_SUBMIT is left to the merge command.
 
+    With plan nothing is written, the plan of each sweep is logged instead,
+    see plan_jobset.
 
-def generate_custom_args(custom_args):
-    """
-    Generate custom arguments based on ranges or lists in the custom_args field.
+    Returns:
+    - tuple: The run directory the jobs were written to and the number of
+      jobs, with plan None and the planned number of jobs.
     """
-    keys = list(custom_args.keys())
-    values = [parse_custom_arg(str(v)) for v in custom_args.values()]
-    for item in itertools.product(*values):
-        yield dict(zip(keys, item))
+    timer = get_timer()
+    log.info("Generating SLURM job scripts")
+    log.info(f"Template: {template}")
+    log.info(f"YAML config: {yaml_config}")
+    with timer.phase("config"):
+        config_data = load_yaml(yaml_config)
+        with open(template, "r") as template_file:
+            template = Template(template_file.read())
+        header_cmds = ""
+        if extra_header_cmds:
+            with open(extra_header_cmds, "r") as f:
+                header_cmds = f.read()
+    if archive and (array or incremental):
+        raise ValueError("Cannot use --archive with --array or --incremental")
+    if array and incremental:
+        raise ValueError("Cannot use --array with --incremental")
+    if shard is not None:
+        shard = parse_shard(shard)
+        if array or archive or resume:
+            raise ValueError("Cannot use --shard with --array, --archive or --resume")
+    file_index = FileIndex(glob_cache)
+    set_file_index(file_index)
+    keys = None
+    if dataframe:
+        log.info(f"Reading custom arguments from dataframe: {dataframe}")
+        keys = read_table_columns(dataframe, csv_engine)
+    else:
+        log.info("Generating custom arguments")
 
+    def get_tasks(template, config):
+        if dataframe is None:
+            return None
+        if config.get("track") or resume:
+            # task ids hash the whole row, so they do not depend on the
+            # columns the template uses
+            return lambda: iter_table_rows(dataframe, keys, engine=csv_engine)
+        # only parse the columns the template, the constraints, the packing
+        # cost, the result cache and staging use
+        used = set(template.placeholders)
+        for predicate in get_predicates(config, keys):
+            used |= predicate.names
+        used |= get_cost_names(config.get("packing") or {})
+        cache = get_cache_config(config.get("cache"))
+        if cache is not None:
+            used |= get_cache_names(cache)
+        stage = get_stage_config(config.get("stage"), config.get("custom_args"))
+        if stage is not None:
+            used |= get_stage_names(stage)
+        used = [k for k in keys if k in used]
+        return lambda: iter_table_rows(dataframe, used, engine=csv_engine)
+
+    multi_sweep = is_multi_sweep(config_data)
+    if multi_sweep:
+        configs = expand_sweeps(config_data)
+        log.info(f"Generating {len(configs)} sweeps")
+        templates = {None: template}
+    else:
+        configs = [config_data]
+    # globs, ranges and templates are parsed once and shared by all sweeps
+    axis_cache = {}
+    jobsets = []
+    for config in configs:
+        if multi_sweep:
+            template_path = config.get("template")
+            if template_path not in templates:
+                with open(template_path, "r") as template_file:
+                    templates[template_path] = Template(template_file.read())
+            template = templates[template_path]
+        jobset = JobSet(
+            config,
+            template,
+            get_tasks(template, config),
+            keys,
+            header_cmds,
+            header_template,
+            defaults,
+            resume,
+            axis_cache,
+            shard,
+        )
+        log.info(f"Slurm job parameters: {jobset.slurm_config}")
+        jobsets.append(jobset)
+    if plan:
+        return None, plan_sweeps(jobsets, array, archive, dataframe)
+    if array:
+        sink_class = ArraySink
+    elif archive:
+        sink_class = ArchiveSink
+    else:
+        sink_class = functools.partial(FileSystemSink, incremental)
+    if shard is not None:
+        # README_SUBMIT is left to the merge command
+        sinks = generate_sweeps(jobsets, sink_class, workers, sweep_workers)
+    else:
+        sinks = generate_to_submit_file(jobsets, sink_class, workers, sweep_workers)
+    # sweeps sharing a result cache trim it once
+    caches = {jobset.cache.dir: jobset.cache for jobset in jobsets if jobset.cache}
+    for cache in caches.values():
+        if cache.max_size > 0:
+            evict_cache(cache.dir, cache.max_size)
+    if shard is not None:
+        run_dirs = " ".join(jobset.run_dir for jobset in jobsets)
+        log.info(
+            f"Wrote shard {shard[0]}/{shard[1]}, once every shard is done run: "
+            f"jobsubmit merge {run_dirs}"
+        )
+    file_index.save()
+    if len(jobsets) == 1:
+        return jobsets[0].run_dir, sinks[0].n_jobs
+    # the metrics of a multi-sweep run go to the shared base run_dir
+    run_dir = (
+        config_data.get("run_dir", "runs") if isinstance(config_data, dict) else "runs"
+    )
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir, sum(sink.n_jobs for sink in sinks)
 
-def fill_in_missing_default_dict_values(default, current):
-    """
-    Recursively fill in missing values in the current dictionary with values
-    from the default dictionary.
 
-    Parameters:
-    - default (dict): The default dictionary containing the values to fill in.
-    - current (dict): The current dictionary to be updated with missing values.
+def generate_to_submit_file(jobsets, sink_class, workers=1, sweep_workers=1):
+    """
+    Generates the sweeps with their sbatch lines streamed to README_SUBMIT,
+    which is written under a temporary name and renamed into place once
+    every sweep is done. Sweeps generated at once each write to their own
+    temporary file, copied in sweep order at the end.
 
     Returns:
-    - dict: The updated current dictionary with missing values filled in.
+    - list: The sink of each sweep, in order.
     """
-    for key, value in default.items():
-        if isinstance(value, dict):
-            # If the value is a dictionary, recurse into it
-            node = current.setdefault(key, {})
-            fill_in_missing_default_dict_values(value, node)
-        elif key not in current:
-            # Set value if key is missing
-            current[key] = value
-    return current
-
-
-def fill_in_missing_default_params(config_data):
+    tmp_path = "README_SUBMIT.tmp"
+    try:
+        with contextlib.ExitStack() as stack:
+            f = stack.enter_context(open(tmp_path, "w"))
+            if sweep_workers > 1 and len(jobsets) > 1:
+                files = [
+                    stack.enter_context(tempfile.TemporaryFile("w+")) for _ in jobsets
+                ]
+            else:
+                files = [f] * len(jobsets)
+            submit_files = iter(files)
+            sinks = generate_sweeps(
+                jobsets,
+                lambda: sink_class(submit_file=next(submit_files)),
+                workers,
+                sweep_workers,
+            )
+            for sweep_file in files:
+                if sweep_file is not f:
+                    sweep_file.seek(0)
+                    shutil.copyfileobj(sweep_file, f)
+    except BaseException:
+        # a failed run leaves the previous README_SUBMIT in place
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, "README_SUBMIT")
+    return sinks
+
+
+def plan_sweeps(jobsets, array=False, archive=False, dataframe=None):
     """
-    Fills in missing default parameters in the given config_data dictionary.
-
-    Parameters:
-    - config_data (dict): The dictionary containing the configuration data.
+    Logs the plan of each sweep and the limits they exceed.
 
     Returns:
-    - dict: The updated config_data dictionary with missing default parameters filled in.
+    - int: The total number of jobs.
     """
-    path = get_lib_path() + "/jobsubmit/resources/default.yml"
-    with open(path, "r") as yaml_file:
-        default_data = yaml.safe_load(yaml_file)
-    fill_in_missing_default_dict_values(default_data, config_data)
-    return config_data
-
-
-def chunk_list(input_list, chunk_size):
+    mode = "array" if array else "archive" if archive else "files"
+    n_rows = count_table_rows(dataframe) if dataframe else None
+    plans = []
+    for jobset in jobsets:
+        plans.append(plan_jobset(jobset, mode, get_limits(jobset.config), n_rows))
+        log.info(f"Plan: {plans[-1].summary()}")
+    if len(plans) > 1:
+        # sweeps inherit their limits from the base config
+        plans.append(total_plan(plans, get_limits(jobsets[0].config), mode))
+        log.info(f"Plan: {plans[-1].summary()}")
+    for p in plans:
+        for warning in p.warnings:
+            log.warning(warning)
+    if not any(p.warnings for p in plans):
+        log.info("Plan is within the site limits, nothing was written")
+    return plans[-1].n_jobs
+
+
+cli.add_command(
+    click.Command(
+        "resume",
+        params=[p for p in main.params if p.name != "resume"],
+        callback=lambda **kwargs: main.callback(resume=True, **kwargs),
+        help="Write jobs for the tasks that have not completed yet. Takes the "
+        "same arguments as generate and scans the task log in run_dir, the "
+        "new jobs go to run_dir/resume-<n>.",
+    )
+)
+
+
+@cli.command()
+@click.argument("run_dirs", nargs=-1, required=True, type=click.Path(file_okay=False))
+@click.option(
+    "--output",
+    default="README_SUBMIT",
+    type=click.Path(dir_okay=False),
+    help="the job list to write",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="remove the scripts of jobs that no longer exist, like generate "
+    "--incremental",
+)
+def merge(run_dirs, output, incremental):
     """
-    Breaks a list into chunks of a given size.
-
-    Parameters:
-    - input_list (list): The list to be chunked.
-    - chunk_size (int): The size of each chunk.
-
-    Returns:
-    - list of lists: A list where each element is a chunk of the input list.
+    Merge the shards written by generate --shard into the manifest of each
+    of RUN_DIRS and write the job list.
     """
-    return [
-        input_list[i : i + chunk_size] for i in range(0, len(input_list), chunk_size)
-    ]
-
-
-@click.command()
-@click.argument("template", type=click.Path(exists=True))
-@click.argument("yaml_config", type=click.Path(exists=True))
-@click.option("--extra-header-cmds", type=click.Path(exists=True), default=None)
-@click.option("--dataframe", default=None, type=click.Path(exists=True))
-def main(template, yaml_config, dataframe=None, extra_header_cmds=None):
+    setup_applevel_logger()
+    paths = []
+    for run_dir in run_dirs:
+        try:
+            paths += merge_shards(run_dir, incremental)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    with open(output, "w") as f:
+        for path in paths:
+            f.write(f"sbatch {path}\n")
+    log.info(f"{len(paths)} jobs listed in {output}")
+
+
+@cli.command()
+@click.argument("cache_dir", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--max-size", required=True, help="the size to trim the cache to, e.g. 50GB"
+)
+def evict(cache_dir, max_size):
     """
-    Generate multiple SLURM job scripts.
+    Remove the least recently used entries of the result cache CACHE_DIR
+    until it holds at most max-size bytes.
     """
     setup_applevel_logger()
-    log.info("Generating SLURM job scripts")
-    log.info(f"Template: {template}")
-    log.info(f"YAML config: {yaml_config}")
-    with open(yaml_config, "r") as yaml_file:
-        config_data = yaml.safe_load(yaml_file)
-    with open(template, "r") as template_file:
-        template_str = template_file.read()
-    header_cmds = ""
-    if extra_header_cmds:
-        with open(extra_header_cmds, "r") as f:
-            header_cmds = f.read()
-    config_data = fill_in_missing_default_params(config_data)
-    slurm_config = SlurmJobConfig(**config_data["slurm_args"])
-    log.info(f"Slurm job parameters: {slurm_config}")
-    if "custom_args" not in config_data:
-        config_data["custom_args"] = {}
-    custom_args = config_data["custom_args"]
-    if dataframe and len(custom_args) > 0:
-        raise ValueError("Cannot use both custom_args and dataframe")
-    if dataframe:
-        log.info(f"Reading custom arguments from dataframe: {dataframe}")
-        df = pd.read_csv(dataframe)
-        all_custom_args = df.to_dict(orient="records")
-    else:
-        log.info("Generating custom arguments")
-        all_custom_args = list(generate_custom_args(custom_args))
-    all_custom_args = all_custom_args * config_data["repeat"]
-    os.makedirs(config_data["run_dir"], exist_ok=True)
-    arg_chunks = chunk_list(all_custom_args, config_data["tasks_per_job"])
-    f = open("README_SUBMIT", "w")
-    for i, custom_args_chunk in enumerate(arg_chunks):
-        job_dir = os.path.abspath(config_data["run_dir"]) + "/" + str(i)
-        os.makedirs(job_dir, exist_ok=True)
-        script_content = generate_slurm_header(slurm_config, job_dir, i) + "\n\n"
-        if header_cmds != "":
-            script_content += header_cmds + "\n\n"
-        script_content += f"cd {job_dir}\n\n"
-        for chunk in custom_args_chunk:
-            script_content += generate_task_str(template_str, chunk) + "\n\n"
-        job_file = slurm_config.job_name + "-" + str(i) + ".sh"
-        write_slurm_script(job_dir + "/" + job_file, script_content)
-        f.write(f"sbatch {job_dir}/{job_file}\n")
-    f.close()
+    try:
+        max_size = parse_size(max_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    evict_cache(cache_dir, max_size)
+
+
+@cli.command()
+@click.argument(
+    "job_list", default="README_SUBMIT", type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    "--run-dir",
+    default="runs",
+    type=click.Path(file_okay=False),
+    help="where the submitted job ids are recorded",
+)
+@click.option("--concurrency", default=4, type=click.IntRange(min=1))
+@click.option(
+    "--retries",
+    default=5,
+    type=click.IntRange(min=0),
+    help="retries when the controller is busy",
+)
+@click.option(
+    "--backoff",
+    default=1.0,
+    type=click.FloatRange(min=0),
+    help="seconds before the first retry, doubled on each retry",
+)
+@click.option(
+    "--max-queued",
+    default=0,
+    type=click.IntRange(min=0),
+    help="pause while this many of your jobs are queued, 0 for no limit",
+)
+@click.option("--sbatch", default="sbatch", help="the sbatch executable")
+@click.option("--squeue", default="squeue", help="the squeue executable")
+@click.option("--force", is_flag=True, help="also submit already submitted jobs")
+def submit(
+    job_list,
+    run_dir,
+    concurrency,
+    retries,
+    backoff,
+    max_queued,
+    sbatch,
+    squeue,
+    force,
+):
+    """
+    Submit the jobs listed in JOB_LIST (README_SUBMIT by default).
+    """
+    setup_applevel_logger()
+    config = SubmitConfig(
+        sbatch=sbatch,
+        squeue=squeue,
+        concurrency=concurrency,
+        retries=retries,
+        backoff=backoff,
+        max_queued=max_queued,
+    )
+    submitted, errors = submit_jobs(job_list, run_dir, config, force)
+    log.info(
+        f"{len(submitted)} jobs submitted, job ids recorded in "
+        f"{os.path.join(run_dir, SUBMITTED_NAME)}"
+    )
+    if errors:
+        raise click.ClickException(f"{len(errors)} jobs failed to submit")
 
 
 # pylint: disable=no-value-for-parameter
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,127 @@
+import ast
+import os
+from typing import Dict, Iterable, Iterator, List
+
+from jobsubmit.logger import get_logger
+from jobsubmit.packing import EXPR_FUNCTIONS
+from jobsubmit.space import ParamSpace
+
+log = get_logger("constraints")
+
+# names available to include and exclude expressions besides the custom
+# arguments, the path helpers pair up files coming from different globs
+PREDICATE_FUNCTIONS = {
+    **EXPR_FUNCTIONS,
+    "str": str,
+    "basename": os.path.basename,
+    "dirname": os.path.dirname,
+    "stem": lambda path: os.path.splitext(os.path.basename(str(path)))[0],
+}
+
+
+class Predicate:
+    """
+    An include or exclude expression over the custom arguments, e.g.
+    "stem(sample) == stem(ref)" or "seed <= 5".
+
+    Attributes:
+        expr (str): The expression.
+        names (set): The custom arguments it uses.
+        exclude (bool): Whether tasks matching the expression are dropped
+            instead of kept.
+    """
+
+    def __init__(self, expr: str, keys: Iterable[str], exclude: bool = False):
+        """
+        Raises:
+        - ValueError: If the expression is not valid python or uses a name
+          that is neither a custom argument nor one of PREDICATE_FUNCTIONS.
+        """
+        try:
+            tree = ast.parse(str(expr), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"invalid constraint: {expr}: {e.msg}") from e
+        used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        keys = set(keys)
+        unknown = used - keys - set(PREDICATE_FUNCTIONS)
+        if unknown:
+            raise ValueError(
+                f"constraint {expr} uses unknown names: {', '.join(sorted(unknown))}"
+            )
+        self.expr = expr
+        self.names = used & keys
+        self.exclude = exclude
+        self._code = compile(tree, "<constraint>", "eval")
+        self._namespace = {"__builtins__": {}, **PREDICATE_FUNCTIONS}
+
+    def __call__(self, args: Dict) -> bool:
+        return bool(eval(self._code, self._namespace, args)) != self.exclude
+
+    def __repr__(self):
+        return f"Predicate({'exclude' if self.exclude else 'include'}: {self.expr})"
+
+
+def get_predicates(config: Dict, keys: Iterable[str]) -> List[Predicate]:
+    """
+    Returns the predicates of the include and exclude fields of a config,
+    each a string or a list of strings. A task is kept if it matches every
+    include expression and no exclude expression.
+    """
+    keys = list(keys)
+    predicates = []
+    for field, exclude in (("include", False), ("exclude", True)):
+        exprs = config.get(field) or []
+        if isinstance(exprs, str):
+            exprs = [exprs]
+        predicates += [Predicate(expr, keys, exclude) for expr in exprs]
+    return predicates
+
+
+class PrunedSpace:
+    """
+    The combinations of a ParamSpace that pass a list of predicates.
+
+    Each predicate is checked as soon as the axes it uses are set, so a
+    rejected value of an outer axis skips everything below it instead of
+    creating those combinations. The number of combinations before and
+    after pruning is logged after each pass.
+
+    Attributes:
+        space (ParamSpace): The full product.
+        predicates (list): The predicates.
+        n_total (int): The number of combinations before pruning.
+        n_kept (int): The number of combinations kept, None until the first
+            pass is done.
+    """
+
+    def __init__(self, space: ParamSpace, predicates: List[Predicate]):
+        self.space = space
+        self.predicates = predicates
+        self.n_total = len(space)
+        self.n_kept = None
+        # the axis after which each predicate has all of its arguments
+        depth_of = {}
+        for depth, key in enumerate(space.keys):
+            for name in key if isinstance(key, tuple) else [key]:
+                depth_of[name] = depth
+        self._checks = [[] for _ in space.keys]
+        for predicate in predicates:
+            depth = max((depth_of[name] for name in predicate.names), default=0)
+            if self._checks:
+                self._checks[depth].append(predicate)
+
+    def __iter__(self) -> Iterator[Dict]:
+        if not self._checks:
+            if all(p({}) for p in self.predicates):
+                yield {}
+            return
+        n = 0
+        for args in self.space.iter_pruned(self._checks):
+            n += 1
+            yield args
+        if self.n_kept is None:
+            log.info(
+                f"constraints kept {n} of {self.n_total} combinations "
+                f"({self.n_total - n} pruned)"
+            )
+        self.n_kept = n
@@ -0,0 +1,247 @@
+import csv
+import itertools
+import os
+from typing import Dict, Iterator, List
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+FEATHER_EXTENSIONS = (".feather", ".arrow", ".ipc")
+# auto uses pandas when it is installed and the csv module otherwise
+CSV_ENGINES = ("auto", "python", "pandas")
+
+
+def get_table_format(path: str) -> str:
+    """
+    Returns the format of a parameter table from its extension: "parquet",
+    "feather", or "csv" for anything else.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PARQUET_EXTENSIONS:
+        return "parquet"
+    if ext in FEATHER_EXTENSIONS:
+        return "feather"
+    return "csv"
+
+
+def import_pandas():
+    """
+    Imports pandas, which is only needed by the pandas csv engine. It is
+    imported on first use so commands that do not read a dataframe start
+    quickly.
+    """
+    try:
+        import pandas
+    except ImportError as e:
+        raise ImportError(
+            "the pandas csv engine requires pandas: pip install pandas, "
+            "or use --csv-engine python"
+        ) from e
+    return pandas
+
+
+def get_csv_engine(engine: str = "auto") -> str:
+    """
+    Resolves a csv engine name from CSV_ENGINES to "python" or "pandas".
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(
+            f"unknown csv engine: {engine}, expected one of {', '.join(CSV_ENGINES)}"
+        )
+    if engine == "auto":
+        try:
+            import_pandas()
+        except ImportError:
+            return "python"
+        return "pandas"
+    return engine
+
+
+def import_pyarrow():
+    """
+    Imports pyarrow, which is only needed for parquet and feather tables.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "reading parquet or feather dataframes requires pyarrow: "
+            "pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+def read_table_columns(path: str, engine: str = "auto") -> List[str]:
+    """
+    Returns the column names of a parameter table without reading its rows.
+    """
+    fmt = get_table_format(path)
+    if fmt == "csv":
+        if get_csv_engine(engine) == "python":
+            with open(path, newline="") as f:
+                return next(csv.reader(f, delimiter=_get_sep(path)), [])
+        pd = import_pandas()
+        return list(pd.read_csv(path, nrows=0, sep=_get_sep(path)).columns)
+    pa = import_pyarrow()
+    if fmt == "parquet":
+        return list(pa.parquet.ParquetFile(path, memory_map=True).schema_arrow.names)
+    with pa.memory_map(path) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def count_table_rows(path: str) -> int:
+    """
+    Returns the number of rows of a parameter table. Parquet and feather
+    files are counted from their metadata, csv files are scanned without
+    parsing their values.
+    """
+    fmt = get_table_format(path)
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            reader = csv.reader(f, delimiter=_get_sep(path))
+            next(reader, None)
+            return sum(1 for row in reader if row)
+    pa = import_pyarrow()
+    if fmt == "parquet":
+        return pa.parquet.ParquetFile(path, memory_map=True).metadata.num_rows
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        return sum(
+            reader.get_batch(i).num_rows for i in range(reader.num_record_batches)
+        )
+
+
+def iter_table_rows(
+    path: str, columns: List[str] = None, chunksize: int = 10000, engine: str = "auto"
+) -> Iterator[Dict]:
+    """
+    Lazily reads the rows of a csv, parquet or feather table as dictionaries.
+
+    Only chunksize rows are held in memory at a time and only the given
+    columns are parsed. Parquet and feather files are memory mapped and read
+    one record batch at a time, missing values become "".
+
+    The python csv engine keeps every value as the text in the file, the
+    pandas engine parses numbers, e.g. "1.50" becomes 1.5. Its column types
+    are those of reading the whole file at once, see _read_csv_chunks.
+
+    Parameters:
+    - path (str): The path of the table.
+    - columns (list, optional): The columns to read, all if None.
+    - chunksize (int): The number of rows read at a time.
+    - engine (str): The csv engine, one of CSV_ENGINES.
+
+    Yields:
+    - dict: One row, keyed by column name.
+    """
+    if columns is not None and len(columns) == 0:
+        # still need one column to know how many rows there are
+        first = read_table_columns(path, engine)[:1]
+        for _ in iter_table_rows(path, first, chunksize, engine):
+            yield {}
+        return
+    fmt = get_table_format(path)
+    if fmt == "csv" and get_csv_engine(engine) == "python":
+        yield from _iter_csv_rows(path, columns)
+        return
+    if fmt == "csv":
+        for df in _read_csv_chunks(path, columns, chunksize):
+            yield from df.to_dict(orient="records")
+        return
+    for batch in _iter_arrow_batches(path, columns, chunksize):
+        for row in batch.to_pylist():
+            yield {k: ("" if v is None else v) for k, v in row.items()}
+
+
+def _get_sep(path):
+    return "\t" if path.lower().endswith(".tsv") else ","
+
+
+# the values pandas parses as booleans
+CSV_BOOLS = {"True": True, "TRUE": True, "true": True}
+CSV_BOOLS.update({"False": False, "FALSE": False, "false": False})
+
+
+def _get_column_dtype(kinds, has_nulls):
+    # the type pandas infers for a whole column from the types of its chunks
+    if not kinds:
+        return "float64"
+    if kinds == {"bool"}:
+        # booleans with missing values are python objects
+        return "object-bool" if has_nulls else "bool"
+    if kinds == {"int64"} and not has_nulls:
+        return "int64"
+    if kinds <= {"int64", "float64"}:
+        return "float64"
+    return "object"
+
+
+def _read_csv_chunks(path, columns, chunksize):
+    # pandas infers the column types of each chunk on its own, so an int
+    # column with a missing value in a later chunk would switch to float
+    # midway. Tables of more than one chunk are read twice, first to find
+    # the types of the whole columns.
+    pd = import_pandas()
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    kwargs = {"chunksize": chunksize, "usecols": usecols, "sep": _get_sep(path)}
+    reader = pd.read_csv(path, **kwargs)
+    first = next(reader, None)
+    second = next(reader, None)
+    if second is None:
+        if first is not None:
+            yield first
+        return
+    kinds = {}
+    nulls = {}
+    for df in itertools.chain([first, second], reader):
+        for name in df.columns:
+            column = df[name]
+            nulls[name] = nulls.get(name, False) or bool(column.isna().any())
+            kinds.setdefault(name, set())
+            if column.isna().all():
+                continue
+            kind = column.dtype.name
+            if kind == "object" and pd.api.types.infer_dtype(column) == "boolean":
+                kind = "bool"
+            kinds[name].add(kind)
+    del first, second
+    dtypes = {name: _get_column_dtype(kinds[name], nulls[name]) for name in kinds}
+    bools = [name for name, dtype in dtypes.items() if dtype == "object-bool"]
+    for name in bools:
+        dtypes[name] = "object"
+    for df in pd.read_csv(path, dtype=dtypes, **kwargs):
+        for name in bools:
+            df[name] = df[name].map(CSV_BOOLS.get, na_action="ignore")
+        yield df
+
+
+def _iter_csv_rows(path, columns):
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=_get_sep(path))
+        header = next(reader, [])
+        if columns is None:
+            columns = header
+        # keep the file's column order, like pandas usecols
+        wanted = set(columns)
+        index = [(i, name) for i, name in enumerate(header) if name in wanted]
+        for row in reader:
+            if not row:
+                continue
+            yield {name: row[i] if i < len(row) else "" for i, name in index}
+
+
+def _iter_arrow_batches(path, columns, chunksize):
+    pa = import_pyarrow()
+    if get_table_format(path) == "parquet":
+        parquet_file = pa.parquet.ParquetFile(path, memory_map=True)
+        yield from parquet_file.iter_batches(batch_size=chunksize, columns=columns)
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize)
@@ -0,0 +1,141 @@
+import copy
+import os
+from functools import lru_cache
+from typing import Dict
+
+from jobsubmit.template import Template
+
+# site defaults file used when no --defaults path is given
+DEFAULTS_ENV = "JOBSUBMIT_DEFAULTS"
+PROFILES_KEY = "profiles"
+
+
+def fill_in_missing_default_dict_values(default, current):
+    """
+    Recursively fill in missing values in the current dictionary with values
+    from the default dictionary.
+
+    Parameters:
+    - default (dict): The default dictionary containing the values to fill in.
+    - current (dict): The current dictionary to be updated with missing values.
+
+    Returns:
+    - dict: The updated current dictionary with missing values filled in.
+    """
+    for key, value in default.items():
+        if isinstance(value, dict):
+            # If the value is a dictionary, recurse into it
+            node = current.setdefault(key, {})
+            fill_in_missing_default_dict_values(value, node)
+        elif key not in current:
+            # Set value if key is missing
+            current[key] = value
+    return current
+
+
+@lru_cache(maxsize=None)
+def read_resource(name: str) -> str:
+    """
+    Returns the text of a file in jobsubmit/resources, read once per process.
+    """
+    from importlib import resources
+
+    return (resources.files("jobsubmit") / "resources" / name).read_text()
+
+
+@lru_cache(maxsize=None)
+def get_header_template(path: str = None) -> Template:
+    """
+    Returns the compiled SLURM header template, the one shipped with the
+    package or the file at path. Each header is read and compiled once.
+    """
+    if path is None:
+        return Template(read_resource("job_header.txt"))
+    with open(path) as f:
+        return Template(f.read())
+
+
+def parse_yaml(text: str):
+    """
+    Parses YAML text. yaml is imported on first use to keep startup fast.
+    """
+    import yaml
+
+    return yaml.safe_load(text)
+
+
+def load_yaml(path: str):
+    """
+    Reads a YAML file.
+    """
+    with open(path) as f:
+        return parse_yaml(f.read())
+
+
+@lru_cache(maxsize=None)
+def _load_site_defaults(path: str) -> Dict:
+    return load_yaml(path) or {}
+
+
+@lru_cache(maxsize=None)
+def _load_defaults(path: str, profile: str) -> Dict:
+    defaults = {}
+    if path is not None:
+        site = dict(_load_site_defaults(path))
+        profiles = site.pop(PROFILES_KEY, {}) or {}
+        if profile is not None:
+            if profile not in profiles:
+                raise ValueError(
+                    f"unknown profile: {profile}, {path} defines: "
+                    f"{', '.join(profiles) or 'no profiles'}"
+                )
+            defaults = copy.deepcopy(profiles[profile])
+        fill_in_missing_default_dict_values(site, defaults)
+    elif profile is not None:
+        raise ValueError(
+            f"profile {profile} needs a site defaults file, pass --defaults or "
+            f"set {DEFAULTS_ENV}"
+        )
+    package = parse_yaml(read_resource("default.yml"))
+    return fill_in_missing_default_dict_values(package, defaults)
+
+
+def load_defaults(path: str = None, profile: str = None) -> Dict:
+    """
+    Returns the default parameters: the package defaults, overridden by the
+    site defaults file, overridden by one of its profiles. Files are read
+    once per process.
+
+    Parameters:
+    - path (str, optional): The site defaults file, $JOBSUBMIT_DEFAULTS if not
+      given. A YAML file with the same fields as a config and a profiles
+      section of named overrides.
+    - profile (str, optional): The name of the profile to apply.
+
+    Returns:
+    - dict: A fresh copy of the defaults, safe to modify.
+
+    Raises:
+    - ValueError: If the profile does not exist.
+    """
+    if path is None:
+        path = os.environ.get(DEFAULTS_ENV) or None
+    return copy.deepcopy(_load_defaults(path, profile))
+
+
+def fill_in_missing_default_params(config_data, defaults_path=None):
+    """
+    Fills in missing default parameters in the given config_data dictionary.
+
+    Parameters:
+    - config_data (dict): The dictionary containing the configuration data.
+      Its profile field selects a profile of the site defaults.
+    - defaults_path (str, optional): The site defaults file, see
+      load_defaults.
+
+    Returns:
+    - dict: The updated config_data dictionary with missing default parameters filled in.
+    """
+    default_data = load_defaults(defaults_path, config_data.get("profile"))
+    fill_in_missing_default_dict_values(default_data, config_data)
+    return config_data
@@ -0,0 +1,163 @@
+import fnmatch
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+from jobsubmit.logger import get_logger
+from jobsubmit.manifest import write_json_atomic
+
+log = get_logger("fileindex")
+
+MAGIC_CHARS = ("*", "?", "[")
+
+
+def has_magic(pattern: str) -> bool:
+    """
+    Returns True if pattern contains a wildcard.
+    """
+    return any(c in pattern for c in MAGIC_CHARS)
+
+
+class FileIndex:
+    """
+    Directory listings shared by every glob pattern of a run.
+
+    Each directory is read with a single os.scandir the first time any
+    pattern needs it. Listings are keyed by the directory's mtime, so later
+    patterns only stat a directory and see files added since. With a
+    cache_path the listings are also kept on disk for later runs.
+    """
+
+    def __init__(self, cache_path: str = None):
+        """
+        Parameters:
+        - cache_path (str, optional): A json file to load listings from and
+          save them to.
+        """
+        self.cache_path = cache_path
+        self._cached: Dict[str, list] = {}
+        self._dirty = False
+        self.n_scans = 0
+        if cache_path is not None and os.path.isfile(cache_path):
+            try:
+                with open(cache_path) as f:
+                    self._cached = json.load(f)
+            except ValueError:
+                log.warning(f"ignoring unreadable glob cache: {cache_path}")
+
+    def listdir(self, path: str) -> List[Tuple[str, bool]]:
+        """
+        Returns the sorted (name, is_dir) entries of a directory, an empty list
+        if it cannot be read.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        cached = self._cached.get(path)
+        if cached is not None and cached[0] == mtime:
+            if cached[1] and not isinstance(cached[1][0], tuple):
+                # entries loaded from cache_path are lists
+                cached[1] = [tuple(e) for e in cached[1]]
+            return cached[1]
+        entries = self._scan(path)
+        self._cached[path] = [mtime, entries]
+        self._dirty = True
+        return entries
+
+    def _scan(self, path):
+        self.n_scans += 1
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append((entry.name, is_dir))
+        except OSError:
+            return []
+        entries.sort()
+        return entries
+
+    def glob(self, pattern: str) -> List[str]:
+        """
+        Returns the absolute paths matching a glob pattern in sorted order.
+
+        Follows the rules of glob.glob: wildcards do not match "/", names
+        starting with "." only match patterns starting with ".", and a "**"
+        component matches any number of directories.
+        """
+        pattern = os.path.abspath(pattern)
+        parts = pattern.split(os.sep)[1:]
+        return sorted(set(self._match(os.sep, parts)))
+
+    def _match(self, path: str, parts: List[str]) -> Iterator[str]:
+        if not parts:
+            yield path
+            return
+        part, rest = parts[0], parts[1:]
+        if part == "**":
+            yield from self._match_recursive(path, rest)
+        elif has_magic(part):
+            for name, is_dir in self.listdir(path):
+                if name[0] == "." and part[0] != ".":
+                    continue
+                if rest and not is_dir:
+                    continue
+                if fnmatch.fnmatchcase(name, part):
+                    yield from self._match(os.path.join(path, name), rest)
+        elif rest:
+            yield from self._match(os.path.join(path, part), rest)
+        else:
+            full_path = os.path.join(path, part)
+            if os.path.lexists(full_path):
+                yield full_path
+
+    def _match_recursive(self, path, rest):
+        if not rest:
+            # a trailing ** matches everything below path
+            yield path
+        else:
+            yield from self._match(path, rest)
+        for name, is_dir in self.listdir(path):
+            if name[0] == ".":
+                continue
+            if is_dir:
+                yield from self._match_recursive(os.path.join(path, name), rest)
+            elif not rest:
+                yield os.path.join(path, name)
+
+    def save(self) -> None:
+        """
+        Writes the listings to cache_path if any were read from disk.
+        """
+        if self.cache_path is None or not self._dirty:
+            return
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        write_json_atomic(self.cache_path, self._cached)
+        self._dirty = False
+
+
+_file_index = None
+
+
+def get_file_index() -> FileIndex:
+    """
+    Returns the FileIndex shared by the current run.
+    """
+    global _file_index
+    if _file_index is None:
+        _file_index = FileIndex()
+    return _file_index
+
+
+def set_file_index(index: FileIndex) -> None:
+    """
+    Sets the FileIndex shared by the current run, None starts a fresh one on
+    next use.
+    """
+    global _file_index
+    _file_index = index
@@ -0,0 +1,179 @@
+import re
+from typing import Dict, Iterable, List
+
+from jobsubmit.template import PLACEHOLDER_RE, Template
+
+# non-whitespace separator so bash `read` keeps empty fields
+PARAMS_SEP = "\x1f"
+PARAMS_SEP_ESCAPED = "\\x1f"
+
+
+def get_array_spec(n_jobs: int) -> str:
+    """
+    Returns the value of #SBATCH --array for n_jobs array tasks, the
+    throttle is added by generate_slurm_header.
+    """
+    return f"0-{n_jobs - 1}"
+
+
+def write_params_table(path: str, keys: List[str], rows: Iterable[Dict]) -> int:
+    """
+    Writes one line per task with its custom argument values.
+
+    The first line holds the argument names, values are separated by
+    PARAMS_SEP.
+
+    Parameters:
+    - path (str): The file to write.
+    - keys (list): The argument names, in column order.
+    - rows (iterable): The custom arguments of each task.
+
+    Returns:
+    - int: The number of tasks written.
+
+    Raises:
+    - ValueError: If a value contains a newline or the separator.
+    """
+    n = 0
+    with open(path, "w") as f:
+        f.write(PARAMS_SEP.join(keys) + "\n")
+        for row in rows:
+            values = [str(row.get(key, "")) for key in keys]
+            for value in values:
+                if "\n" in value or PARAMS_SEP in value:
+                    raise ValueError(
+                        f"cannot store value {value!r} in an array parameter table"
+                    )
+            f.write(PARAMS_SEP.join(values) + "\n")
+            n += 1
+    return n
+
+
+HEREDOC_RE = re.compile(r"<<(-?)\s*(['\"]?)(\\?)([\w.-]+)\2")
+
+
+def find_unexpanded_placeholders(text: str) -> List[str]:
+    """
+    Returns the placeholders of a task template that sit where the shell
+    does not expand variables: in single quotes, $'...' quotes or the body
+    of a heredoc with a quoted delimiter. Comments are ignored.
+    """
+    found = []
+    # "'" single quotes, "$'" ansi-c quotes, '"' double quotes and "(" a
+    # command substitution, nested in that order
+    stack = []
+    heredocs = []
+    for line in text.split("\n"):
+        if heredocs:
+            delimiter, strip, quoted = heredocs[0]
+            if (line.lstrip("\t") if strip else line) == delimiter:
+                heredocs.pop(0)
+            elif quoted:
+                found += PLACEHOLDER_RE.findall(line)
+            continue
+        i = 0
+        while i < len(line):
+            state = stack[-1] if stack else None
+            c = line[i]
+            if state in ("'", "$'"):
+                m = PLACEHOLDER_RE.match(line, i)
+                if m:
+                    found.append(m.group(1))
+                    i = m.end()
+                    continue
+                if c == "\\" and state == "$'":
+                    i += 2
+                    continue
+                if c == "'":
+                    stack.pop()
+            elif c == "\\":
+                i += 2
+                continue
+            elif state == '"':
+                if c == '"':
+                    stack.pop()
+                elif line.startswith("$(", i):
+                    stack.append("(")
+                    i += 1
+            elif c == "#" and (i == 0 or line[i - 1] in " \t;&|("):
+                break
+            elif c == "'":
+                stack.append("$'" if i > 0 and line[i - 1] == "$" else "'")
+            elif c == '"':
+                stack.append('"')
+            elif c == "(" and state == "(":
+                stack.append("(")
+            elif c == ")" and state == "(":
+                stack.pop()
+            elif line.startswith("$(", i):
+                stack.append("(")
+                i += 1
+            elif line.startswith("<<<", i):
+                i += 2
+            elif line.startswith("<<", i):
+                m = HEREDOC_RE.match(line, i)
+                if m:
+                    quoted = bool(m.group(2) or m.group(3))
+                    heredocs.append((m.group(4), bool(m.group(1)), quoted))
+                    i = m.end()
+                    continue
+            i += 1
+    return list(dict.fromkeys(found))
+
+
+def generate_array_body(
+    template: Template,
+    keys: List[str],
+    params_path: str,
+    job_dir: str,
+    tasks_per_job: int,
+) -> str:
+    """
+    Generates the part of an array job script that runs the tasks of the
+    current array index.
+
+    Each array task reads its tasks_per_job lines of the parameter table into
+    JS_ARG_<n> variables, and the task template is rendered once with each
+    placeholder replaced by the matching variable. Values are therefore
+    expanded by the shell rather than pasted into the script as text.
+
+    Parameters:
+    - template (Template): The task template.
+    - keys (list): The argument names, in the column order of the table.
+    - params_path (str): The path of the parameter table.
+    - job_dir (str): A shell expression for the directory the array task
+      runs in, e.g. run_dir/$SLURM_ARRAY_TASK_ID.
+    - tasks_per_job (int): The number of tasks per array task.
+
+    Returns:
+    - str: The script body.
+
+    Raises:
+    - ValueError: If a placeholder is where the shell would not expand its
+      variable, see find_unexpanded_placeholders.
+    """
+    unexpanded = [k for k in find_unexpanded_placeholders(template.text) if k in keys]
+    if unexpanded:
+        raise ValueError(
+            "a job array passes values as shell variables, which are not "
+            "expanded in single quotes or quoted heredocs: "
+            f"{', '.join(unexpanded)}; use double quotes or drop --array"
+        )
+    names = [f"JS_ARG_{i}" for i in range(len(keys))]
+    task_str = template.render(
+        {key: "${" + name + "}" for key, name in zip(keys, names)}
+    )
+    lines = [
+        f"JS_PARAMS={params_path}",
+        f"JS_FIRST=$((SLURM_ARRAY_TASK_ID * {tasks_per_job} + 2))",
+        f"JS_LAST=$((JS_FIRST + {tasks_per_job - 1}))",
+        f"JS_JOB_DIR={job_dir}",
+        'mkdir -p "$JS_JOB_DIR"',
+        'cd "$JS_JOB_DIR"',
+        "",
+        f"while IFS=$'{PARAMS_SEP_ESCAPED}' read -r -u 3 {' '.join(names)}; do",
+        task_str,
+        "",
+        'done 3< <(sed -n "${JS_FIRST},${JS_LAST}p" "$JS_PARAMS")',
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,859 @@
+import collections
+import copy
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from jobsubmit.logger import get_logger
+from jobsubmit.defaults import fill_in_missing_default_params, get_header_template
+from jobsubmit.template import Template
+from jobsubmit.fileindex import get_file_index, has_magic
+from jobsubmit.space import ParamSpace, ZippedAxis, parse_int_ranges
+from jobsubmit.constraints import PrunedSpace, get_predicates
+from jobsubmit.packing import pack_tasks
+from jobsubmit.profiling import get_timer
+from jobsubmit.runner import get_parallel_config
+from jobsubmit.tracking import (
+    TASK_ID_KEY,
+    TASK_LOG_NAME,
+    get_resume_dir,
+    iter_tracked_tasks,
+    read_completed,
+)
+from jobsubmit.cache import (
+    CACHE_KEY_KEY,
+    get_cache_config,
+    get_task_key,
+    get_task_outputs,
+    link_cached_outputs,
+)
+from jobsubmit.staging import get_stage_config
+from jobsubmit.layout import check_layout, get_job_dir, get_job_dir_shell
+from jobsubmit.manifest import MANIFEST_NAME, JobManifest, ManifestWriter
+from jobsubmit.shards import is_shard_job, open_shard
+from jobsubmit.archive import (
+    LOG_DIR_NAME,
+    ArchiveWriter,
+    generate_launcher_body,
+    get_archive_paths,
+)
+from jobsubmit.job_array import get_array_spec
+from jobsubmit.scripts import (
+    HEADER_KEYS,
+    SlurmJobConfig,
+    generate_job_body,
+    generate_job_script,
+    generate_slurm_header,
+    write_job,
+    write_job_array,
+    write_slurm_script,
+)
+
+log = get_logger("jobset")
+
+
+def parse_custom_arg(arg: str) -> Sequence:
+    """
+    Parse a custom argument that can be a list of strings, a wildcard pattern,
+    or a range.
+
+    Wildcard patterns are matched through the FileIndex of the current run,
+    so each directory is only read once, and return sorted absolute paths.
+    Ranges such as "1-1000000:10" are kept as lazy IntRanges.
+    """
+    if has_magic(arg):
+        return get_file_index().glob(arg)
+    elif "-" in arg or "," in arg:
+        # Process a range or a comma-separated list of ranges/numbers
+        return parse_int_ranges(arg)
+    else:
+        return [arg]
+
+
+def build_param_space(
+    custom_args, axis_cache: Dict = None, zip_groups: List[List[str]] = None
+) -> ParamSpace:
+    """
+    Build the lazy product of the ranges or lists in the custom_args field.
+
+    Parameters:
+    - custom_args (dict): The custom_args field.
+    - axis_cache (dict, optional): Parsed axes keyed by their value in the
+      config, shared between sweeps so each glob or range is parsed once.
+    - zip_groups (list, optional): Groups of custom argument names whose
+      axes advance together instead of being crossed, e.g. each input file
+      with its reference. The axes of a group must have the same length.
+
+    Raises:
+    - ValueError: If a zip group names an unknown argument, an argument is
+      in two groups, or the axes of a group differ in length.
+    """
+
+    def parse(key):
+        value = str(custom_args[key])
+        if axis_cache is None:
+            return parse_custom_arg(value)
+        if value not in axis_cache:
+            axis_cache[value] = parse_custom_arg(value)
+        return axis_cache[value]
+
+    group_of = {}
+    for group in zip_groups or []:
+        group = tuple(group)
+        for name in group:
+            if name not in custom_args:
+                raise ValueError(
+                    f"zip group {list(group)} names unknown argument {name}"
+                )
+            if name in group_of:
+                raise ValueError(f"{name} is in more than one zip group")
+            group_of[name] = group
+    keys = []
+    values = []
+    for key in custom_args:
+        group = group_of.get(key)
+        if group is None:
+            keys.append(key)
+            values.append(parse(key))
+        elif group not in keys:
+            try:
+                axis = ZippedAxis([parse(name) for name in group])
+            except ValueError as e:
+                raise ValueError(f"cannot zip {', '.join(group)}: {e}") from e
+            keys.append(group)
+            values.append(axis)
+    return ParamSpace(keys, values)
+
+
+def generate_custom_args(custom_args):
+    """
+    Generate custom arguments based on ranges or lists in the custom_args field.
+    """
+    yield from build_param_space(custom_args)
+
+
+def chunk_list(input_list, chunk_size):
+    """
+    Breaks a list into chunks of a given size.
+
+    Parameters:
+    - input_list (list): The list to be chunked.
+    - chunk_size (int): The size of each chunk.
+
+    Returns:
+    - list of lists: A list where each element is a chunk of the input list.
+    """
+    return [
+        input_list[i : i + chunk_size] for i in range(0, len(input_list), chunk_size)
+    ]
+
+
+def chunk_iter(iterable, chunk_size):
+    """
+    Lazily breaks an iterable into chunks of a given size.
+
+    Parameters:
+    - iterable (iterable): The items to be chunked.
+    - chunk_size (int): The size of each chunk.
+
+    Yields:
+    - list: The next chunk, the last one may be shorter than chunk_size.
+    """
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def repeat_iter(factory, repeat):
+    """
+    Repeats a stream of items by re-iterating it rather than copying it.
+
+    Parameters:
+    - factory (callable): Returns a fresh iterable each time it is called.
+    - repeat (int): The number of passes over the items.
+
+    Yields:
+    - The items of every pass, in order.
+    """
+    for _ in range(repeat):
+        yield from factory()
+
+
+def ordered_pool_map(func, iterable, workers=1, backlog=4):
+    """
+    Applies func to each item using a thread pool and yields the results in
+    input order.
+
+    At most workers * backlog items are in flight, so the input is still
+    consumed lazily. With workers <= 1 this is a plain map.
+
+    Parameters:
+    - func (callable): The function applied to each item.
+    - iterable (iterable): The items.
+    - workers (int): The number of threads.
+    - backlog (int): The number of queued items per thread.
+
+    Yields:
+    - The result of func for each item, in order.
+    """
+    if workers <= 1:
+        yield from map(func, iterable)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for item in iterable:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= workers * backlog:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+@dataclass
+class Job:
+    """
+    One rendered job.
+
+    Attributes:
+        num (int): The job number.
+        job_dir (str): The directory the job runs in.
+        tasks (list): The custom arguments of each of its tasks.
+        script (str): The job script, without the SLURM header when it was
+            rendered for an archive.
+    """
+
+    num: int
+    job_dir: str
+    tasks: List[Dict]
+    script: str
+
+
+class JobSet:
+    """
+    A sweep of tasks, grouped into SLURM jobs and rendered with a task
+    template.
+
+    A JobSet is built from Python objects, a config dict like the YAML
+    config, a template string and optionally the rows of the tasks, so a
+    workflow can generate many sweeps in one process. The jobs are streamed
+    to a Sink by generate.
+
+    Example:
+    jobset = JobSet({"tasks_per_job": 10}, "run.sh {seed}", [{"seed": 1}, ...])
+    jobs = jobset.generate(MemorySink()).jobs
+    """
+
+    def __init__(
+        self,
+        config: Dict,
+        template: Union[str, Template],
+        tasks: Union[Iterable[Dict], Callable[[], Iterable[Dict]]] = None,
+        keys: Iterable[str] = None,
+        header_cmds: str = "",
+        header_template: str = None,
+        defaults: str = None,
+        resume: bool = False,
+        axis_cache: Dict = None,
+        shard: Tuple[int, int] = None,
+    ):
+        """
+        Parameters:
+        - config (dict): The config, with the fields of a YAML config. It is
+          copied and its missing fields are filled in from the defaults.
+        - template (str or Template): The task template.
+        - tasks (iterable or callable, optional): The custom arguments of
+          each task, used instead of the custom_args of the config. A
+          callable is called for a fresh iterable on every repeat, any other
+          iterable is kept in memory if repeat is more than 1.
+        - keys (iterable, optional): The names available in the rows of
+          tasks, the template placeholders are checked against them.
+        - header_cmds (str): Extra commands placed after the SLURM header.
+        - header_template (str, optional): A SLURM header template file,
+          instead of the header_template field of the config.
+        - defaults (str, optional): The site defaults file, see
+          load_defaults.
+        - resume (bool): Only generate the tasks that have not completed yet,
+          in run_dir/resume-<n>.
+        - axis_cache (dict, optional): Parsed custom_args axes shared with
+          other JobSets, see build_param_space.
+        - shard (tuple, optional): (K, N), only generate the jobs whose
+          number is K modulo N. Job numbers and directories are the same as
+          without sharding.
+
+        Raises:
+        - ValueError: If the config is not valid or a template placeholder
+          has no value.
+        """
+        timer = get_timer()
+        with timer.phase("config"):
+            config = fill_in_missing_default_params(copy.deepcopy(config), defaults)
+            header_template = header_template or config.get("header_template")
+            self.header = get_header_template(header_template)
+            self.header.check(HEADER_KEYS)
+        if "custom_args" not in config:
+            config["custom_args"] = {}
+        self.config = config
+        self.slurm_config = SlurmJobConfig(**config["slurm_args"])
+        self.header_cmds = header_cmds
+        custom_args = config["custom_args"]
+        if tasks is not None and len(custom_args) > 0:
+            raise ValueError("Cannot use both custom_args and a task list")
+        self.track = config.get("track", False) or resume
+        self.space = None
+        self._n_rows = None
+        self._filtered = False
+        if tasks is None:
+            keys = list(custom_args.keys())
+            # globs and ranges are expanded once and shared by every repeat
+            with timer.phase("arguments"):
+                space = build_param_space(custom_args, axis_cache, config.get("zip"))
+                predicates = get_predicates(config, keys)
+            if len(space.keys) < len(keys):
+                n_product = 1
+                for axis in space.axes:
+                    if isinstance(axis, ZippedAxis):
+                        n_product *= len(axis) ** len(axis.axes)
+                    else:
+                        n_product *= len(axis)
+                log.info(f"zipping reduces {n_product} combinations to {len(space)}")
+            if predicates:
+                space = PrunedSpace(space, predicates)
+            self.space = space
+            self._factory = lambda: iter(space)
+        else:
+            if callable(tasks):
+                self._factory = tasks
+            else:
+                if config["repeat"] > 1 and not isinstance(tasks, Sequence):
+                    tasks = list(tasks)
+                if hasattr(tasks, "__len__"):
+                    self._n_rows = len(tasks)
+                self._factory = lambda: tasks
+            if config.get("zip"):
+                raise ValueError("zip only applies to custom_args")
+            if config.get("include") or config.get("exclude"):
+                if keys is None:
+                    raise ValueError("include and exclude on task rows need keys")
+                predicates = get_predicates(config, keys)
+                self._filtered = True
+                factory = self._factory
+                self._factory = lambda: (
+                    row for row in factory() if all(p(row) for p in predicates)
+                )
+        if isinstance(template, str):
+            template = Template(template)
+        self.cache = get_cache_config(config.get("cache"))
+        self.n_cached = 0
+        self._cache_lock = threading.Lock()
+        self.stage = get_stage_config(config.get("stage"), custom_args)
+        if keys is not None:
+            keys = list(keys)
+            template.check(keys + ([TASK_ID_KEY] if self.track else []))
+            outputs = []
+            if self.cache is not None:
+                outputs += self.cache.outputs
+            if self.stage is not None:
+                outputs += self.stage.outputs
+            for output in outputs:
+                output.check(keys + ([TASK_ID_KEY] if self.track else []))
+            if self.cache is not None and self.cache.inputs:
+                missing = [k for k in self.cache.inputs if k not in keys]
+                if missing:
+                    raise ValueError(
+                        f"cache inputs have no value: {', '.join(missing)}"
+                    )
+            if self.stage is not None:
+                missing = [k for k in self.stage.inputs if k not in keys]
+                if missing:
+                    raise ValueError(
+                        f"stage inputs have no value: {', '.join(missing)}"
+                    )
+        self.template = template
+        self.keys = keys
+        self.run_dir = config["run_dir"]
+        self.layout = config.get("layout", "nested")
+        check_layout(self.layout)
+        self.task_log = None
+        self._completed = None
+        if self.track:
+            self.task_log = os.path.join(os.path.abspath(self.run_dir), TASK_LOG_NAME)
+            if resume:
+                self._completed = read_completed(self.run_dir)
+                log.info(f"{len(self._completed)} tasks completed in {self.run_dir}")
+                self.run_dir = get_resume_dir(self.run_dir)
+                log.info(f"Writing jobs for the remaining tasks to {self.run_dir}")
+        self.parallel = get_parallel_config(config.get("parallel"), self.slurm_config)
+        if self.parallel is not None:
+            log.info(f"Running up to {self.parallel.max_procs} tasks at once per job")
+            if (
+                self.stage is not None
+                and self.parallel.launcher == "srun"
+                and self.slurm_config.nodes > 1
+            ):
+                raise ValueError(
+                    "Cannot stage inputs to node-local storage with srun on "
+                    "more than one node"
+                )
+            if self.layout == "flat":
+                raise ValueError(
+                    "Cannot run tasks in parallel with the flat layout, the "
+                    "jobs would share one task status file"
+                )
+        self.packing = config.get("packing", {})
+        self.shard = shard
+        if shard is not None and resume:
+            raise ValueError("Cannot use resume with a shard")
+
+    def count_tasks(self, n_rows: int = None) -> Tuple[int, bool]:
+        """
+        Counts the tasks without generating them, in O(axes).
+
+        The count is an upper bound when include/exclude constraints or the
+        result cache drop tasks, and when resuming it subtracts the completed
+        tasks.
+
+        Parameters:
+        - n_rows (int, optional): The number of task rows, for rows that
+          come from a callable such as a dataframe reader.
+
+        Returns:
+        - tuple: The number of tasks, None if it is unknown, and whether it
+          is exact.
+        """
+        exact = True
+        if isinstance(self.space, PrunedSpace):
+            if self.space.n_kept is None:
+                n, exact = self.space.n_total, False
+            else:
+                n = self.space.n_kept
+        elif self.space is not None:
+            n = len(self.space)
+        else:
+            n = self._n_rows if n_rows is None else n_rows
+            if n is None:
+                return None, False
+            exact = not self._filtered
+        n *= self.config["repeat"]
+        if self._completed:
+            n, exact = max(0, n - len(self._completed)), False
+        if self.cache is not None:
+            exact = False
+        return n, exact
+
+    def iter_tasks(self) -> Iterator[Dict]:
+        """
+        Yields the custom arguments of every task, repeated and with their
+        task ids when tracking.
+        """
+        if self.track:
+            tasks = iter_tracked_tasks(
+                self._factory, self.config["repeat"], self._completed
+            )
+        else:
+            tasks = repeat_iter(self._factory, self.config["repeat"])
+        return get_timer().wrap_iter("tasks", tasks)
+
+    def iter_chunks(self) -> Iterator[List[Dict]]:
+        """
+        Yields the custom arguments of the tasks of each job, grouped by
+        tasks_per_job or by the packing strategy.
+        """
+        if self.packing.get("strategy", "count") == "count":
+            return chunk_iter(self.iter_tasks(), self.config["tasks_per_job"])
+        # costs of all tasks are needed before any job can be filled
+        tasks = list(self.iter_tasks())
+        with get_timer().phase("packing", len(tasks)):
+            return iter(
+                pack_tasks(
+                    tasks,
+                    self.packing,
+                    self.config["tasks_per_job"],
+                    self.slurm_config.time,
+                    1 if self.parallel is None else self.parallel.max_procs,
+                )
+            )
+
+    def iter_numbered_chunks(self) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Yields the job number and the tasks of each job of the shard.
+        """
+        chunks = enumerate(self.iter_chunks())
+        if self.shard is None:
+            return chunks
+        return ((i, chunk) for i, chunk in chunks if is_shard_job(i, self.shard))
+
+    def get_job_dir(self, job_num: int) -> str:
+        return get_job_dir(self.run_dir, job_num, self.layout)
+
+    def get_cache_key(self, args: Dict) -> str:
+        """
+        Returns the result cache key of a task, see get_task_key.
+        """
+        return get_task_key(
+            self.template.render(args),
+            args,
+            self.cache.inputs,
+            get_task_outputs(self.cache, args),
+        )
+
+    def take_cached(self, job_num: int, tasks: List[Dict]) -> List[Dict]:
+        """
+        Links the outputs of the tasks of a job found in the result cache
+        into its job directory.
+
+        Returns:
+        - list: The other tasks, with their cache keys.
+        """
+        if self.cache is None:
+            return tasks
+        job_dir = self.get_job_dir(job_num)
+        pending = []
+        with get_timer().phase("cache", len(tasks)):
+            for args in tasks:
+                key = self.get_cache_key(args)
+                outputs = get_task_outputs(self.cache, args)
+                if not link_cached_outputs(self.cache, key, outputs, job_dir):
+                    pending.append({**args, CACHE_KEY_KEY: key})
+        with self._cache_lock:
+            self.n_cached += len(tasks) - len(pending)
+        return pending
+
+    def render_job(self, job_num: int, tasks: List[Dict], header=True) -> Job:
+        """
+        Renders the script of one job, with or without its SLURM header and
+        extra header commands. With a result cache every task is rendered,
+        see take_cached to leave out the cached ones.
+        """
+        job_dir = self.get_job_dir(job_num)
+        if self.cache is not None:
+            tasks = [
+                (
+                    args
+                    if CACHE_KEY_KEY in args
+                    else {**args, CACHE_KEY_KEY: self.get_cache_key(args)}
+                )
+                for args in tasks
+            ]
+        with get_timer().phase("render", 1):
+            if header:
+                script = generate_job_script(
+                    self.slurm_config,
+                    job_dir,
+                    job_num,
+                    self.template,
+                    tasks,
+                    self.header_cmds,
+                    self.parallel,
+                    self.task_log,
+                    self.header,
+                    self.cache,
+                    self.stage,
+                )
+            else:
+                script = generate_job_body(
+                    job_dir,
+                    self.template,
+                    tasks,
+                    "",
+                    self.parallel,
+                    self.task_log,
+                    self.cache,
+                    self.stage,
+                )
+        return Job(job_num, job_dir, tasks, script)
+
+    def iter_jobs(self, workers: int = 1) -> Iterator[Job]:
+        """
+        Lazily renders every job, with workers threads.
+        """
+        return ordered_pool_map(
+            lambda job: self.render_job(*job), self.iter_numbered_chunks(), workers
+        )
+
+    def generate(self, sink: "Sink" = None, workers: int = 1) -> "Sink":
+        """
+        Writes every job to sink, a FileSystemSink by default.
+
+        Returns:
+        - Sink: The sink, holding the scripts to submit.
+        """
+        if sink is None:
+            sink = FileSystemSink()
+        sink.write(self, workers)
+        return sink
+
+
+class Sink:
+    """
+    Where the jobs of a JobSet go.
+
+    write passes each job to process on a worker thread, then the results to
+    add in job order, and calls close at the end. Subclasses override these.
+    With a result cache, process only gets the tasks that are not cached and
+    jobs whose tasks are all cached are left out.
+
+    Attributes:
+        submit_file (file): When given, the scripts to pass to sbatch are
+            written to it as "sbatch <path>" lines, as in README_SUBMIT,
+            instead of being kept in submit_paths.
+        submit_paths (list): The scripts to pass to sbatch.
+        n_submit (int): The number of scripts to pass to sbatch.
+        n_jobs (int): The number of jobs written.
+    """
+
+    def __init__(self, submit_file: TextIO = None):
+        self.submit_file = submit_file
+        self.submit_paths = []
+        self.n_submit = 0
+        self.n_jobs = 0
+
+    def write(self, jobset: JobSet, workers: int = 1) -> None:
+        self.open(jobset)
+        jobs = jobset.iter_numbered_chunks()
+        for result in ordered_pool_map(
+            lambda job: self._process_pending(jobset, *job), jobs, workers
+        ):
+            if result is None:
+                continue
+            self.add(jobset, result)
+            self.n_jobs += 1
+        if jobset.cache is not None:
+            log.info(f"{jobset.n_cached} tasks found in the result cache")
+        self.close(jobset)
+
+    def add_submit_path(self, path: str) -> None:
+        if self.submit_file is not None:
+            self.submit_file.write(f"sbatch {path}\n")
+        else:
+            self.submit_paths.append(path)
+        self.n_submit += 1
+
+    def _process_pending(self, jobset, job_num, tasks):
+        tasks = jobset.take_cached(job_num, tasks)
+        if len(tasks) == 0:
+            return None
+        return self.process(jobset, job_num, tasks)
+
+    def open(self, jobset: JobSet) -> None:
+        pass
+
+    def process(self, jobset: JobSet, job_num: int, tasks: List[Dict]):
+        return jobset.render_job(job_num, tasks)
+
+    def add(self, jobset: JobSet, result) -> None:
+        raise NotImplementedError
+
+    def close(self, jobset: JobSet) -> None:
+        pass
+
+
+class MemorySink(Sink):
+    """
+    Keeps the rendered jobs in memory, in its jobs list.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = []
+
+    def add(self, jobset, job):
+        self.jobs.append(job)
+
+
+class FileSystemSink(Sink):
+    """
+    Writes one script per job into its job directory and records their
+    hashes in the manifest of the run directory. The manifest is streamed to
+    disk unless it is needed to find stale jobs.
+
+    Attributes:
+        incremental (bool): Only rewrite the jobs whose script changed since
+            the last run and remove the jobs that no longer exist.
+    """
+
+    def __init__(self, incremental: bool = False, submit_file: TextIO = None):
+        super().__init__(submit_file)
+        self.incremental = incremental
+
+    def open(self, jobset):
+        os.makedirs(jobset.run_dir, exist_ok=True)
+        if self.incremental:
+            self._previous = JobManifest.load(jobset.run_dir)
+        else:
+            self._previous = JobManifest()
+        if jobset.shard is not None:
+            self.manifest = open_shard(jobset.run_dir, jobset.shard)
+        elif self.incremental:
+            self.manifest = JobManifest()
+        else:
+            self.manifest = ManifestWriter(os.path.join(jobset.run_dir, MANIFEST_NAME))
+        self._written = []
+
+    def process(self, jobset, job_num, tasks):
+        return job_num, *write_job(
+            jobset.slurm_config,
+            jobset.run_dir,
+            job_num,
+            jobset.template,
+            tasks,
+            jobset.header_cmds,
+            self._previous.get_hash(job_num),
+            jobset.parallel,
+            jobset.task_log,
+            jobset.layout,
+            jobset.header,
+            jobset.cache,
+            jobset.stage,
+        )
+
+    def add(self, jobset, result):
+        job_num, path, digest, written = result
+        self.manifest.add(job_num, path, digest)
+        if written:
+            self.add_submit_path(path)
+            self._written.append(job_num)
+
+    def close(self, jobset):
+        with get_timer().phase("save"):
+            if jobset.shard is not None:
+                # stale jobs are removed when the shards are merged
+                self.manifest.close(written=self._written)
+                return
+            if not self.incremental:
+                self.manifest.close()
+                return
+            removed = self._previous.remove_stale_jobs(self.manifest)
+            log.info(
+                f"{self.n_submit} of {len(self.manifest)} jobs changed, "
+                f"{len(removed)} stale jobs removed"
+            )
+            self.manifest.save(jobset.run_dir)
+
+
+class ArchiveSink(Sink):
+    """
+    Writes the scripts of every job into one archive with an offset index,
+    and a launcher that runs the script of one job as a SLURM array task.
+
+    The launcher takes the job index as its first argument or from
+    SLURM_ARRAY_TASK_ID, creates the job directory and runs the job's script
+    straight out of the archive. SLURM output files go to run_dir/logs.
+    """
+
+    def open(self, jobset):
+        if jobset.shard is not None:
+            raise ValueError("Cannot shard a job archive")
+        if jobset.cache is not None:
+            # archive indices are job numbers, fully cached jobs would leave gaps
+            raise ValueError("Cannot use a result cache with a job archive")
+        self._run_dir = os.path.abspath(jobset.run_dir)
+        os.makedirs(self._run_dir, exist_ok=True)
+        self._paths = get_archive_paths(self._run_dir, jobset.slurm_config.job_name)
+        self._archive = ArchiveWriter(*self._paths)
+
+    def process(self, jobset, job_num, tasks):
+        return jobset.render_job(job_num, tasks, header=False)
+
+    def add(self, jobset, job):
+        with get_timer().phase("write", 1):
+            self._archive.add(job.script)
+
+    def close(self, jobset):
+        self._archive.close()
+        if self.n_jobs == 0:
+            raise ValueError("cannot write a job archive without jobs")
+        archive_path, index_path = self._paths
+        log.info(f"Wrote {self.n_jobs} job scripts to {archive_path}")
+        run_dir = self._run_dir
+        log_dir = os.path.join(run_dir, LOG_DIR_NAME)
+        os.makedirs(log_dir, exist_ok=True)
+        slurm_config = replace(jobset.slurm_config, array=get_array_spec(self.n_jobs))
+        script_content = generate_slurm_header(
+            slurm_config, log_dir, header=jobset.header
+        )
+        script_content += "\n\n"
+        if jobset.header_cmds != "":
+            script_content += jobset.header_cmds + "\n\n"
+        script_content += generate_launcher_body(
+            archive_path,
+            index_path,
+            get_job_dir_shell(run_dir, "JS_JOB", jobset.layout),
+        )
+        path = f"{run_dir}/{slurm_config.job_name}.sh"
+        write_slurm_script(path, script_content)
+        self.add_submit_path(path)
+
+
+class ArraySink(Sink):
+    """
+    Writes a parameter table and a single SLURM array script that runs
+    tasks_per_job tasks per array index, see write_job_array.
+    """
+
+    def write(self, jobset, workers=1):
+        if jobset.shard is not None:
+            raise ValueError("Cannot shard a job array")
+        if jobset.track:
+            raise ValueError("Cannot use track or resume with a job array")
+        if jobset.cache is not None:
+            raise ValueError("Cannot use a result cache with a job array")
+        if jobset.stage is not None:
+            raise ValueError("Cannot stage inputs with a job array")
+        if jobset.parallel is not None:
+            raise ValueError("Cannot use parallel with a job array")
+        if jobset.packing.get("strategy", "count") != "count":
+            raise ValueError("Cannot use packing with a job array")
+        keys = jobset.template.placeholders
+        if jobset.keys is not None:
+            keys = [k for k in jobset.keys if k in keys]
+        os.makedirs(jobset.run_dir, exist_ok=True)
+        with get_timer().phase("write"):
+            path = write_job_array(
+                jobset.slurm_config,
+                jobset.run_dir,
+                jobset.template,
+                list(keys),
+                jobset.iter_tasks(),
+                jobset.config["tasks_per_job"],
+                jobset.header_cmds,
+                jobset.layout,
+                jobset.header,
+            )
+        self.add_submit_path(path)
+        self.n_jobs = 1
+
+
+def generate(
+    config: Dict,
+    template: Union[str, Template],
+    tasks: Union[Iterable[Dict], Callable[[], Iterable[Dict]]] = None,
+    sink: Sink = None,
+    workers: int = 1,
+    **kwargs,
+) -> Sink:
+    """
+    Generates the jobs of a sweep in-process, see JobSet for the arguments.
+
+    Example:
+    sink = generate({"custom_args": {"seed": "1-100"}}, "run.sh {seed}", sink=MemorySink())
+
+    Returns:
+    - Sink: The sink the jobs were written to, FileSystemSink by default.
+    """
+    return JobSet(config, template, tasks, **kwargs).generate(sink, workers)
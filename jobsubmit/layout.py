@@ -0,0 +1,70 @@
+import os
+
+LAYOUTS = ("nested", "sharded", "flat")
+# the one directory every job shares in the flat layout
+FLAT_DIR_NAME = "jobs"
+
+
+def check_layout(layout: str) -> None:
+    """
+    Raises a ValueError if layout is not one of LAYOUTS.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(
+            f"unknown layout: {layout}, expected one of {', '.join(LAYOUTS)}"
+        )
+
+
+def check_job_path(path: str, what: str = "output") -> str:
+    """
+    Checks that path names a file or directory inside a job directory.
+
+    Returns:
+    - str: The path.
+
+    Raises:
+    - ValueError: If path is empty, ".", absolute or leaves the job
+      directory.
+    """
+    norm = os.path.normpath(path) if path else "."
+    if os.path.isabs(path) or norm == "." or norm.split(os.sep)[0] == "..":
+        raise ValueError(f"{what} must be a path inside the job dir: {path!r}")
+    return path
+
+
+def get_job_dir(run_dir: str, job_num: int, layout: str = "nested") -> str:
+    """
+    Returns the absolute directory of a job inside the run directory.
+
+    Layouts:
+    - nested: run_dir/<job_num>, one directory per job.
+    - sharded: run_dir/<job_num / 10000>/<job_num / 100 % 100>/<job_num>, so
+      no directory holds more than 100 jobs, e.g. run_dir/00/12/1234.
+    - flat: run_dir/jobs, shared by every job.
+    """
+    run_dir = os.path.abspath(run_dir)
+    if layout == "nested":
+        return run_dir + "/" + str(job_num)
+    if layout == "sharded":
+        return f"{run_dir}/{job_num // 10000:02d}/{job_num // 100 % 100:02d}/{job_num}"
+    if layout == "flat":
+        return run_dir + "/" + FLAT_DIR_NAME
+    check_layout(layout)
+
+
+def get_job_dir_shell(run_dir: str, var: str, layout: str = "nested") -> str:
+    """
+    Returns a shell expression for the directory of the job whose number is
+    in the shell variable var, matching get_job_dir.
+    """
+    run_dir = os.path.abspath(run_dir)
+    if layout == "nested":
+        return f"{run_dir}/${var}"
+    if layout == "sharded":
+        return (
+            f'{run_dir}/$(printf "%02d/%02d" $(({var} / 10000)) '
+            f"$(({var} / 100 % 100)))/${var}"
+        )
+    if layout == "flat":
+        return f"{run_dir}/{FLAT_DIR_NAME}"
+    check_layout(layout)
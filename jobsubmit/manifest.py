@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+from typing import Dict, List
+
+from jobsubmit.logger import get_logger
+
+log = get_logger("manifest")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def hash_content(content: str) -> str:
+    """
+    Returns the sha256 hex digest of a rendered script.
+    """
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def write_json_atomic(path: str, data) -> None:
+    """
+    Writes data as json to path through a temporary file, so readers never
+    see a partial file.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class ManifestWriter:
+    """
+    Writes the jobs of a manifest to disk as they are added, in the format of
+    JobManifest.save, so a run does not hold every job in memory. Jobs must
+    be added in job order. The file is written under a temporary name and
+    renamed into place by close.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "w")
+        self._file.write('{"jobs": {')
+        self.n_jobs = 0
+
+    def __len__(self):
+        return self.n_jobs
+
+    def add(self, job_num: int, script: str, digest: str) -> None:
+        sep = ", " if self.n_jobs > 0 else ""
+        entry = json.dumps({"script": script, "hash": digest})
+        self._file.write(f"{sep}{json.dumps(str(job_num))}: {entry}")
+        self.n_jobs += 1
+
+    def close(self, **fields) -> None:
+        """
+        Finishes the file, fields are extra top-level values such as the
+        written jobs of a shard.
+        """
+        self._file.write("}")
+        for key, value in fields.items():
+            self._file.write(f", {json.dumps(key)}: {json.dumps(value)}")
+        self._file.write("}")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+
+class JobManifest:
+    """
+    Records the script path and content hash of every job written into a run
+    directory, so a later run can skip the jobs that did not change.
+
+    Attributes:
+        jobs (dict): Maps the job number to {"script": path, "hash": digest}.
+    """
+
+    def __init__(self, jobs: Dict[int, Dict[str, str]] = None):
+        self.jobs = {} if jobs is None else jobs
+
+    def __len__(self):
+        return len(self.jobs)
+
+    @classmethod
+    def load(cls, run_dir: str) -> "JobManifest":
+        """
+        Loads the manifest of run_dir, an empty manifest if there is none.
+        """
+        path = os.path.join(run_dir, MANIFEST_NAME)
+        if not os.path.isfile(path):
+            return cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            jobs = {int(k): v for k, v in data["jobs"].items()}
+        except (ValueError, KeyError, TypeError):
+            log.warning(f"ignoring unreadable manifest: {path}")
+            return cls()
+        return cls(jobs)
+
+    def save(self, run_dir: str) -> None:
+        path = os.path.join(run_dir, MANIFEST_NAME)
+        jobs = {str(k): self.jobs[k] for k in sorted(self.jobs)}
+        write_json_atomic(path, {"jobs": jobs})
+
+    def add(self, job_num: int, script: str, digest: str) -> None:
+        self.jobs[job_num] = {"script": script, "hash": digest}
+
+    def get_hash(self, job_num: int) -> str:
+        """
+        Returns the recorded hash of a job, None if it is not recorded.
+        """
+        job = self.jobs.get(job_num)
+        if job is None:
+            return None
+        return job["hash"]
+
+    def remove_stale_jobs(self, current: "JobManifest") -> List[str]:
+        """
+        Deletes the scripts of jobs in this manifest that are not in current.
+
+        The job directory is removed too when nothing else is left in it, so
+        job output is never deleted.
+
+        Returns:
+        - list: The paths of the removed scripts.
+        """
+        removed = []
+        for job_num, job in self.jobs.items():
+            if (
+                job_num in current.jobs
+                and current.jobs[job_num]["script"] == job["script"]
+            ):
+                continue
+            script = job["script"]
+            if os.path.isfile(script):
+                os.remove(script)
+                removed.append(script)
+            try:
+                os.rmdir(os.path.dirname(script))
+            except OSError:
+                pass
+        return removed
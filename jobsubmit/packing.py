@@ -0,0 +1,198 @@
+import ast
+import bisect
+import heapq
+import os
+from typing import Callable, Dict, List, Set
+
+from jobsubmit.logger import get_logger
+
+log = get_logger("packing")
+
+PACKING_STRATEGIES = ("count", "lpt", "binpack")
+
+# names available to packing.cost_expr besides the task's custom arguments
+EXPR_FUNCTIONS = {
+    "size": os.path.getsize,
+    "len": len,
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "int": int,
+    "float": float,
+}
+
+
+def parse_slurm_time(time_str: str) -> int:
+    """
+    Returns the number of seconds in a SLURM time limit, one of "MM",
+    "MM:SS", "HH:MM:SS", "D-HH", "D-HH:MM" or "D-HH:MM:SS".
+    """
+    time_str = str(time_str).strip()
+    days = 0
+    if "-" in time_str:
+        days, time_str = time_str.split("-")
+        days = int(days)
+        parts = [int(x) for x in time_str.split(":")]
+        parts += [0] * (3 - len(parts))
+        hours, minutes, seconds = parts
+    else:
+        parts = [int(x) for x in time_str.split(":")]
+        if len(parts) == 1:
+            hours, minutes, seconds = 0, parts[0], 0
+        elif len(parts) == 2:
+            hours, (minutes, seconds) = 0, parts
+        else:
+            hours, minutes, seconds = parts
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def get_cost_function(packing: Dict) -> Callable[[Dict], float]:
+    """
+    Returns the function estimating the cost of a task from the packing
+    section of the config.
+
+    Exactly one of these keys must be set:
+    - cost_column: the name of a custom argument or dataframe column holding
+      the cost.
+    - cost_file_size: the name of a custom argument holding a file path, the
+      cost is the file size.
+    - cost_expr: a python expression over the custom arguments, e.g.
+      "size(filename) * n_iter".
+
+    Raises:
+    - ValueError: If not exactly one cost key is set.
+    """
+    keys = [k for k in ("cost_column", "cost_file_size", "cost_expr") if k in packing]
+    if len(keys) != 1:
+        raise ValueError(
+            "packing needs exactly one of cost_column, cost_file_size or cost_expr"
+        )
+    value = packing[keys[0]]
+    if keys[0] == "cost_column":
+        return lambda args: float(args[value])
+    if keys[0] == "cost_file_size":
+        return lambda args: float(os.path.getsize(args[value]))
+    code = compile(value, "<cost_expr>", "eval")
+    namespace = {"__builtins__": {}, **EXPR_FUNCTIONS}
+    return lambda args: float(eval(code, namespace, dict(args)))
+
+
+def get_cost_names(packing: Dict) -> Set[str]:
+    """
+    Returns the custom arguments the cost function of the packing section
+    reads, so a dataframe reader can keep those columns.
+    """
+    if "cost_column" in packing:
+        return {packing["cost_column"]}
+    if "cost_file_size" in packing:
+        return {packing["cost_file_size"]}
+    if "cost_expr" in packing:
+        tree = ast.parse(str(packing["cost_expr"]), mode="eval")
+        names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        return names - set(EXPR_FUNCTIONS)
+    return set()
+
+
+def pack_lpt(costs: List[float], n_jobs: int) -> List[List[int]]:
+    """
+    Splits tasks into n_jobs jobs with the longest-processing-time rule: the
+    most expensive remaining task always goes to the least loaded job.
+
+    Returns:
+    - list: The task indices of each job, in task order.
+    """
+    n_jobs = max(1, min(n_jobs, len(costs)))
+    order = sorted(range(len(costs)), key=lambda i: -costs[i])
+    heap = [(0.0, j) for j in range(n_jobs)]
+    jobs = [[] for _ in range(n_jobs)]
+    for i in order:
+        load, j = heapq.heappop(heap)
+        jobs[j].append(i)
+        heapq.heappush(heap, (load + costs[i], j))
+    return _sort_jobs(jobs)
+
+
+def pack_bins(costs: List[float], capacity: float) -> List[List[int]]:
+    """
+    Packs tasks into as few jobs as possible with best-fit decreasing, no job
+    exceeding capacity. A task costing more than capacity gets its own job.
+
+    Returns:
+    - list: The task indices of each job, in task order.
+    """
+    order = sorted(range(len(costs)), key=lambda i: -costs[i])
+    jobs = []
+    # (remaining capacity, job index), kept sorted
+    remaining = []
+    for i in order:
+        cost = costs[i]
+        k = bisect.bisect_left(remaining, (cost, -1))
+        if k == len(remaining):
+            jobs.append([i])
+            bisect.insort(remaining, (capacity - cost, len(jobs) - 1))
+            continue
+        left, j = remaining.pop(k)
+        jobs[j].append(i)
+        bisect.insort(remaining, (left - cost, j))
+    return _sort_jobs(jobs)
+
+
+def _sort_jobs(jobs):
+    jobs = [sorted(job) for job in jobs if job]
+    jobs.sort(key=lambda job: job[0])
+    return jobs
+
+
+def pack_tasks(
+    tasks: List[Dict],
+    packing: Dict,
+    tasks_per_job: int,
+    time_limit: str,
+    slots: int = 1,
+) -> List[List[Dict]]:
+    """
+    Groups tasks into jobs using their estimated costs.
+
+    Parameters:
+    - tasks (list): The custom arguments of every task.
+    - packing (dict): The packing section of the config. Its strategy is
+      "count", which chunks tasks in order like chunk_list, "lpt", which
+      keeps the number of jobs of count-based chunking and balances their
+      total cost, or "binpack", which fills each job up to the time limit
+      with costs in seconds (multiplied by cost_scale).
+    - tasks_per_job (int): Used by "lpt" to pick the number of jobs.
+    - time_limit (str): The SLURM time limit of a job, used by "binpack".
+    - slots (int): The number of tasks a job runs at once, a "binpack" job
+      holds slots times the time limit.
+
+    Returns:
+    - list: The tasks of each job.
+    """
+    strategy = packing.get("strategy", "count")
+    if strategy not in PACKING_STRATEGIES:
+        raise ValueError(
+            f"unknown packing strategy: {strategy}, "
+            f"expected one of {', '.join(PACKING_STRATEGIES)}"
+        )
+    if strategy == "count":
+        return [
+            tasks[i : i + tasks_per_job] for i in range(0, len(tasks), tasks_per_job)
+        ]
+    cost_function = get_cost_function(packing)
+    scale = float(packing.get("cost_scale", 1.0))
+    costs = [cost_function(task) * scale for task in tasks]
+    if strategy == "binpack":
+        capacity = parse_slurm_time(time_limit) * slots
+        n_over = sum(1 for c in costs if c > capacity)
+        if n_over > 0:
+            log.warning(f"{n_over} tasks are estimated to exceed the time limit")
+        jobs = pack_bins(costs, capacity)
+    else:
+        jobs = pack_lpt(costs, -(-len(tasks) // tasks_per_job))
+    loads = [sum(costs[i] for i in job) for job in jobs]
+    if loads:
+        log.info(
+            f"Packed {len(tasks)} tasks into {len(jobs)} jobs, "
+            f"estimated cost per job min {min(loads):.1f} max {max(loads):.1f}"
+        )
+    return [[tasks[i] for i in job] for job in jobs]
@@ -0,0 +1,240 @@
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List
+
+from jobsubmit.archive import INDEX_ENTRY_SIZE
+from jobsubmit.job_array import PARAMS_SEP
+from jobsubmit.jobset import JobSet
+from jobsubmit.packing import parse_slurm_time
+
+# how the jobs are written: one script per job, a job array or an archive
+PLAN_MODES = ("files", "array", "archive")
+# the fields of the limits section of a config
+LIMIT_KEYS = ("max_array_size", "max_jobs", "max_inodes", "max_core_hours")
+# the SLURM settings read from `scontrol show config`
+SCONTROL_LIMITS = {"MaxArraySize": "max_array_size", "MaxJobCount": "max_jobs"}
+
+
+@dataclass
+class Plan:
+    """
+    What generating a sweep would produce.
+
+    Attributes:
+        name (str): The run directory of the sweep.
+        n_tasks (int): The number of tasks.
+        exact (bool): Whether the counts are exact, they are upper bounds
+            when include/exclude constraints or resume drop tasks and an
+            estimate with binpack packing.
+        n_jobs (int): The number of jobs, or array tasks.
+        n_dirs (int): The number of directories created.
+        n_files (int): The number of files written.
+        n_bytes (int): The estimated size of the files written.
+        core_hours (float): The core-hours requested by all jobs.
+        warnings (list): The site limits the sweep exceeds.
+    """
+
+    name: str
+    n_tasks: int
+    exact: bool
+    n_jobs: int
+    n_dirs: int
+    n_files: int
+    n_bytes: int
+    core_hours: float
+    warnings: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        bound = "" if self.exact else "at most "
+        return (
+            f"{self.name}: {bound}{self.n_tasks} tasks in {self.n_jobs} jobs, "
+            f"{self.n_dirs} directories, {self.n_files} files, "
+            f"~{format_bytes(self.n_bytes)}, {self.core_hours:.1f} core-hours"
+        )
+
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+
+@lru_cache(maxsize=None)
+def read_scontrol_limits(scontrol: str = "scontrol") -> Dict[str, int]:
+    """
+    Returns the limits in SCONTROL_LIMITS set by the SLURM controller, none
+    if scontrol is not installed or fails.
+    """
+    if shutil.which(scontrol) is None:
+        return {}
+    try:
+        proc = subprocess.run(
+            [scontrol, "show", "config"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    if proc.returncode != 0:
+        return {}
+    limits = {}
+    for line in proc.stdout.splitlines():
+        name, _, value = line.partition("=")
+        name = name.strip()
+        if name in SCONTROL_LIMITS and value.strip().isdigit():
+            limits[SCONTROL_LIMITS[name]] = int(value)
+    return limits
+
+
+def get_limits(config: Dict, scontrol: str = "scontrol") -> Dict[str, float]:
+    """
+    Returns the site limits a sweep is checked against: those of the SLURM
+    controller, overridden by the limits section of the config.
+
+    Raises:
+    - ValueError: If the limits section has an unknown field.
+    """
+    limits = dict(config.get("limits") or {})
+    unknown = set(limits) - set(LIMIT_KEYS)
+    if unknown:
+        raise ValueError(
+            f"unknown limits: {', '.join(sorted(unknown))}, "
+            f"expected some of {', '.join(LIMIT_KEYS)}"
+        )
+    return {**read_scontrol_limits(scontrol), **limits}
+
+
+def count_dirs(n_jobs: int, layout: str) -> int:
+    """
+    Returns the number of job directories of n_jobs jobs, see get_job_dir.
+    """
+    if n_jobs == 0:
+        return 0
+    if layout == "flat":
+        return 1
+    if layout == "sharded":
+        return n_jobs + -(-n_jobs // 100) + -(-n_jobs // 10000)
+    return n_jobs
+
+
+def check_limits(plan: Plan, limits: Dict, mode: str = None) -> List[str]:
+    """
+    Returns a warning for each limit the plan exceeds. The job and array
+    limits are only checked in the mode they apply to.
+    """
+    warnings = []
+    checks = [
+        ("max_jobs", plan.n_jobs, "jobs", mode == "files"),
+        ("max_array_size", plan.n_jobs, "array tasks", mode in ("array", "archive")),
+        ("max_inodes", plan.n_dirs + plan.n_files, "files and directories", True),
+        ("max_core_hours", plan.core_hours, "core-hours", True),
+    ]
+    for key, value, what, applies in checks:
+        if applies and limits.get(key) is not None and value > limits[key]:
+            warnings.append(
+                f"{plan.name}: {value:.0f} {what} exceed {key} {limits[key]}"
+            )
+    return warnings
+
+
+def plan_jobset(
+    jobset: JobSet, mode: str = "files", limits: Dict = None, n_rows: int = None
+) -> Plan:
+    """
+    Computes what generating a JobSet would produce without writing anything.
+
+    Tasks are counted from the lengths of the custom_args axes, or n_rows,
+    and only the first job is rendered to estimate the size of the scripts.
+
+    Parameters:
+    - jobset (JobSet): The sweep.
+    - mode (str): How the jobs are written, one of PLAN_MODES.
+    - limits (dict, optional): The site limits to check, see get_limits.
+    - n_rows (int, optional): The number of task rows, when they come from
+      a callable such as a dataframe reader.
+
+    Returns:
+    - Plan: The counts and the exceeded limits.
+
+    Raises:
+    - ValueError: If the mode is unknown or the number of tasks cannot be
+      known without generating them.
+    """
+    if mode not in PLAN_MODES:
+        raise ValueError(
+            f"unknown plan mode: {mode}, expected one of {', '.join(PLAN_MODES)}"
+        )
+    n_tasks, exact = jobset.count_tasks(n_rows)
+    if n_tasks is None:
+        raise ValueError("cannot plan a sweep whose number of tasks is unknown")
+    tasks_per_job = jobset.config["tasks_per_job"]
+    if jobset.packing.get("strategy", "count") == "binpack":
+        exact = False
+    n_jobs = -(-n_tasks // tasks_per_job)
+    if jobset.shard is not None:
+        k, n = jobset.shard
+        n_jobs = max(0, -(-(n_jobs - k) // n))
+    sample = list(islice(jobset.iter_tasks(), tasks_per_job))
+    if mode == "array":
+        # the run directory holds the parameter table and the array script
+        keys = list(jobset.template.placeholders)
+        if jobset.keys is not None:
+            keys = [k for k in jobset.keys if k in keys]
+        row_bytes = sum(
+            len(PARAMS_SEP.join(str(row.get(k, "")) for k in keys).encode()) + 1
+            for row in sample
+        )
+        # the array script is about the size of a job with one task
+        script = jobset.render_job(0, sample[:1]).script if sample else ""
+        n_bytes = len(script.encode()) + row_bytes * n_tasks // max(len(sample), 1)
+        n_dirs, n_files = 1, 2
+    elif mode == "archive":
+        # the archive, its index and the launcher, job directories are
+        # created when the jobs run
+        script = jobset.render_job(0, sample, header=False).script if sample else ""
+        n_bytes = (len(script.encode()) + INDEX_ENTRY_SIZE) * n_jobs
+        n_dirs, n_files = 2, 3
+    else:
+        # the scripts and the manifest
+        script = jobset.render_job(0, sample).script if sample else ""
+        n_bytes = len(script.encode()) * n_jobs
+        n_dirs = 1 + count_dirs(n_jobs, jobset.layout)
+        n_files = n_jobs + 1
+    slurm_config = jobset.slurm_config
+    cores = int(slurm_config.nodes) * int(slurm_config.ntasks_per_node)
+    hours = parse_slurm_time(slurm_config.time) / 3600
+    plan = Plan(
+        jobset.run_dir,
+        n_tasks,
+        exact,
+        n_jobs,
+        n_dirs,
+        n_files,
+        n_bytes,
+        hours * cores * n_jobs,
+    )
+    plan.warnings = check_limits(plan, limits or {}, mode)
+    return plan
+
+
+def total_plan(plans: List[Plan], limits: Dict = None, mode: str = "files") -> Plan:
+    """
+    Adds up the plans of several sweeps and checks the total against the
+    site limits.
+    """
+    plan = Plan(
+        "total",
+        sum(p.n_tasks for p in plans),
+        all(p.exact for p in plans),
+        sum(p.n_jobs for p in plans),
+        sum(p.n_dirs for p in plans),
+        sum(p.n_files for p in plans),
+        sum(p.n_bytes for p in plans),
+        sum(p.core_hours for p in plans),
+    )
+    # an array or archive per sweep, only the job and inode totals add up
+    plan.warnings = check_limits(plan, limits or {}, mode if mode == "files" else None)
+    return plan
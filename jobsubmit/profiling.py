@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator
+
+METRICS_NAME = "generation_metrics.json"
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall time and the number of items of each phase of a run.
+
+    Phases can be entered many times, e.g. once per job, and from several
+    threads; their times add up.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add(self, name: str, seconds: float, count: int = 0) -> None:
+        with self._lock:
+            phase = self.phases.setdefault(name, {"seconds": 0.0, "count": 0})
+            phase["seconds"] += seconds
+            phase["count"] += count
+
+    @contextmanager
+    def phase(self, name: str, count: int = 0):
+        """
+        Times the body of the with statement as part of phase name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, count)
+
+    def wrap_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """
+        Yields the items of iterable, timing how long each one takes to
+        produce as part of phase name and counting them.
+        """
+        it = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start, 1)
+            yield item
+
+    def to_dict(self) -> Dict:
+        total = time.perf_counter() - self._start
+        phases = {}
+        for name, phase in self.phases.items():
+            seconds = phase["seconds"]
+            phases[name] = {
+                "seconds": seconds,
+                "count": phase["count"],
+                "rate": phase["count"] / seconds if seconds > 0 else 0.0,
+            }
+        return {"total_seconds": total, "phases": phases}
+
+    def log_summary(self, log) -> None:
+        """
+        Logs one line per phase with its time, share of the total, count and
+        rate.
+        """
+        data = self.to_dict()
+        total = data["total_seconds"]
+        log.info(f"Generation took {total:.3f}s")
+        for name, phase in data["phases"].items():
+            line = (
+                f"  {name:<16s} {phase['seconds']:9.3f}s "
+                f"{100 * phase['seconds'] / total if total > 0 else 0:5.1f}%"
+            )
+            if phase["count"] > 0:
+                line += f" {phase['count']:>10d} items {phase['rate']:12.1f}/s"
+            log.info(line)
+
+    def write_json(self, path: str, **extra) -> None:
+        """
+        Writes the phase breakdown and any extra fields to a json file.
+        """
+        data = self.to_dict()
+        data.update(extra)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+class NullTimer(PhaseTimer):
+    """
+    A PhaseTimer that records nothing, used when profiling is off.
+    """
+
+    def add(self, name, seconds, count=0):
+        pass
+
+    @contextmanager
+    def phase(self, name, count=0):
+        yield
+
+    def wrap_iter(self, name, iterable):
+        return iter(iterable)
+
+
+_timer = NullTimer()
+
+
+def get_timer() -> PhaseTimer:
+    """
+    Returns the PhaseTimer of the current run.
+    """
+    return _timer
+
+
+def set_timer(timer: PhaseTimer) -> None:
+    """
+    Sets the PhaseTimer of the current run, None turns timing off.
+    """
+    global _timer
+    _timer = NullTimer() if timer is None else timer
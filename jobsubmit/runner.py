@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import List, Union
+
+TASK_STATUS_NAME = "task_status.tsv"
+LAUNCHERS = ("local", "srun")
+
+
+@dataclass
+class ParallelConfig:
+    """
+    How the tasks of a job run concurrently.
+
+    Attributes:
+        max_procs (int): The maximum number of tasks running at once.
+        launcher (str): "local" runs each task as a background process on the
+            batch node, "srun" runs each task as an exclusive job step.
+    """
+
+    max_procs: int = 1
+    launcher: str = "local"
+
+
+def get_parallel_config(value: Union[bool, int, dict], slurm_config) -> ParallelConfig:
+    """
+    Builds the ParallelConfig from the parallel field of the config.
+
+    The field is false (run tasks one after another), true, the maximum
+    number of concurrent tasks, or a dict with max_procs and launcher. By
+    default max_procs is the number of cores allocated to the job: the tasks
+    per node for the local launcher and nodes * tasks per node for srun.
+
+    Returns:
+    - ParallelConfig, or None if tasks run one after another.
+    """
+    if value is False or value is None:
+        return None
+    if value is True:
+        value = {}
+    elif isinstance(value, int):
+        value = {"max_procs": value}
+    launcher = value.get("launcher", "local")
+    if launcher not in LAUNCHERS:
+        raise ValueError(
+            f"unknown parallel launcher: {launcher}, "
+            f"expected one of {', '.join(LAUNCHERS)}"
+        )
+    max_procs = slurm_config.ntasks_per_node
+    if launcher == "srun":
+        max_procs *= slurm_config.nodes
+    max_procs = int(value.get("max_procs", max_procs))
+    if max_procs < 1:
+        raise ValueError("parallel max_procs must be at least 1")
+    return ParallelConfig(max_procs, launcher)
+
+
+def generate_parallel_tasks(
+    task_strs: List[str],
+    job_dir: str,
+    parallel: ParallelConfig,
+    task_ids: List[str] = None,
+) -> str:
+    """
+    Generates the part of a job script that runs its tasks concurrently.
+
+    Each task becomes a shell function. A bounded loop starts at most
+    max_procs of them at once (wait -n), each in its own subshell so a cd or
+    exit in one task does not affect the others. The index, exit code, start
+    and end time of every task are appended to job_dir/task_status.tsv and
+    the script exits non-zero if any task failed.
+
+    With the srun launcher each task runs in a new bash on its job step, which
+    only sees exported variables and functions. generate_job_body exports the
+    variables set by the header commands but not their functions.
+
+    Parameters:
+    - task_strs (list): The rendered tasks.
+    - job_dir (str): The job directory.
+    - parallel (ParallelConfig): How to run the tasks.
+    - task_ids (list, optional): The id of each task, passed to the _js_mark
+      function of the task log when given.
+
+    Returns:
+    - str: The script body.
+    """
+    if parallel.launcher == "srun":
+        run_cmd = 'srun --exclusive -N1 -n1 bash -c "_js_task_$1"'
+    else:
+        run_cmd = '( "_js_task_$1" )'
+    lines = [
+        f"JS_MAX_PROCS={parallel.max_procs}",
+        f"JS_STATUS={job_dir}/{TASK_STATUS_NAME}",
+        ': > "$JS_STATUS"',
+        "_js_run() {",
+        "    local start rc",
+        "    start=$(date +%s.%N)",
+        f"    {run_cmd}",
+        "    rc=$?",
+        '    printf "%s\\t%s\\t%s\\t%s\\n" "$1" "$rc" "$start" "$(date +%s.%N)" '
+        '>> "$JS_STATUS"',
+    ]
+    if task_ids is not None:
+        lines.append('    _js_mark "${JS_IDS[$1]}" "$rc"')
+        lines.append(f"}}\nJS_IDS=({' '.join(task_ids)})")
+    else:
+        lines.append("}")
+    lines.append("")
+    for i, task_str in enumerate(task_strs):
+        lines += [f"_js_task_{i}() {{", ":", task_str, "}"]
+        if parallel.launcher == "srun":
+            lines.append(f"export -f _js_task_{i}")
+        lines.append("")
+    lines += [
+        f"for JS_TASK in $(seq 0 {len(task_strs) - 1}); do",
+        '    while [ "$(jobs -rp | wc -l)" -ge "$JS_MAX_PROCS" ]; do wait -n; done',
+        '    _js_run "$JS_TASK" &',
+        "done",
+        "wait",
+        "",
+        '[ "$(cut -f2 "$JS_STATUS" | grep -cv "^0$")" -eq 0 ]',
+        "",
+    ]
+    return "\n".join(lines)
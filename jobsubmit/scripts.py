@@ -0,0 +1,380 @@
+import os
+import shlex
+from dataclasses import dataclass, asdict, fields, replace
+
+from jobsubmit.logger import get_logger
+from jobsubmit.defaults import get_header_template
+from jobsubmit.template import Template, compile_template
+from jobsubmit.profiling import get_timer
+from jobsubmit.runner import generate_parallel_tasks
+from jobsubmit.tracking import (
+    TASK_ID_KEY,
+    generate_mark_function,
+    generate_tracked_task,
+)
+from jobsubmit.cache import (
+    CACHE_KEY_KEY,
+    generate_cached_task,
+    generate_store_function,
+    get_task_outputs,
+)
+from jobsubmit.layout import get_job_dir, get_job_dir_shell
+from jobsubmit.staging import (
+    STAGE_VAR,
+    generate_stage_in,
+    get_stage_outputs,
+    get_staged_args,
+)
+from jobsubmit.manifest import hash_content
+from jobsubmit.job_array import (
+    generate_array_body,
+    get_array_spec,
+    write_params_table,
+)
+
+log = get_logger("scripts")
+
+
+@dataclass
+class SlurmJobConfig:
+    """
+    Represents the configuration for a Slurm job.
+
+    Attributes:
+        job_name (str): The name of the job.
+        time (str): The maximum time for the job to run.
+        nodes (int): The number of nodes to allocate for the job.
+        ntasks_per_node (int): The number of tasks to run per node.
+        mem (str): The amount of memory to allocate for the job.
+        array (str): The job array index spec, e.g. "0-99". Empty for a
+            regular job.
+        throttle (int): The maximum number of array tasks running at once,
+            0 for no limit.
+    """
+
+    job_name: str = "test"
+    time: str = "01:00:00"
+    nodes: int = 1
+    ntasks_per_node: int = 1
+    mem: str = "2GB"
+    array: str = ""
+    throttle: int = 0
+
+
+# the names a header template can use
+HEADER_KEYS = [f.name for f in fields(SlurmJobConfig)] + ["output", "error"]
+
+
+def generate_slurm_header(
+    config: SlurmJobConfig, job_dir="", job_num=-1, header: Template = None
+):
+    """
+    Generate the SLURM header for a job submission.
+
+    Args:
+        config (SlurmJobConfig): The configuration object for the SLURM job.
+        job_dir (str, optional): The directory where the job output files will be stored. Defaults to "".
+        job_num (int, optional): The job number. Defaults to -1.
+        header (Template, optional): The header template. Defaults to the one shipped with the package.
+
+    Returns:
+        str: The generated SLURM header as a string.
+    """
+    if header is None:
+        header = get_header_template()
+    args = asdict(config)
+    if job_num == -1:
+        name = args["job_name"]
+    else:
+        name = args["job_name"] + "-" + str(job_num)
+    if not job_dir == "" and not job_dir.endswith("/"):
+        job_dir = job_dir + "/"
+    if config.array:
+        # one output file per array task: <job id>_<array index>
+        args["output"] = job_dir + f"{name}_%A_%a.out"
+        args["error"] = job_dir + f"{name}_%A_%a.err"
+    else:
+        args["output"] = job_dir + f"{name}.out"
+        args["error"] = job_dir + f"{name}.err"
+    args["job_name"] = f"{name}"
+
+    header = header.render(args)
+    if config.array:
+        array = config.array
+        if config.throttle > 0 and "%" not in array:
+            array += f"%{config.throttle}"
+        header += f"#SBATCH --array={array}\n"
+    header += "\n\n"
+    return header
+
+
+def generate_task_str(template_str, custom_args):
+    """
+    Generate a customized SLURM script by substituting placeholders in the template string
+    with corresponding values from the custom_args dictionary.
+
+    The function searches for placeholders in the format {VAR} within the template string
+    and replaces them with the values provided in the custom_args dictionary. If a placeholder
+    does not have a corresponding value in custom_args, it is replaced with an empty string.
+
+    Parameters:
+    template_str (str): The SLURM script template containing placeholders in the format {VAR}.
+    custom_args (dict): A dictionary where keys are placeholder names (without curly braces)
+                        and values are the values to substitute in the template.
+
+    Returns:
+    str: The customized SLURM script with placeholders replaced by their corresponding values.
+
+    Example:
+    template = "sbatch --job-name={JOB_NAME} --output={OUTPUT_FILE} script.sh"
+    args = {"JOB_NAME": "my_job", "OUTPUT_FILE": "output.txt"}
+    result = generate_task_str(template, args)
+    # result will be: "sbatch --job-name=my_job --output=output.txt script.sh"
+    """
+    return compile_template(template_str).render(custom_args)
+
+
+def write_slurm_script(filename, script_content):
+    """
+    Write the SLURM script content to a file.
+    """
+    with open(filename, "w") as f:
+        f.write(script_content)
+
+
+def generate_job_script(
+    slurm_config,
+    job_dir,
+    job_num,
+    template,
+    custom_args_chunk,
+    header_cmds="",
+    parallel=None,
+    task_log=None,
+    header=None,
+    cache=None,
+    stage=None,
+):
+    """
+    Generate the full SLURM script for one job.
+
+    Parameters:
+    - slurm_config (SlurmJobConfig): The configuration for the SLURM job.
+    - job_dir (str): The directory the job runs in.
+    - job_num (int): The job number.
+    - template (str or Template): The task template.
+    - custom_args_chunk (list): The custom arguments of each task in the job.
+    - header_cmds (str): Extra commands placed after the SLURM header.
+    - parallel (ParallelConfig, optional): Run the tasks concurrently instead
+      of one after another.
+    - task_log (str, optional): Record the exit code of each task in this
+      consolidated log, the tasks must carry their TASK_ID_KEY.
+    - header (Template, optional): The SLURM header template.
+    - cache (CacheConfig, optional): Store the outputs of each task in this
+      result cache, the tasks must carry their CACHE_KEY_KEY.
+    - stage (StageConfig, optional): Copy the input files of the job to
+      node-local storage first.
+
+    Returns:
+    - str: The script content.
+    """
+    return (
+        generate_slurm_header(slurm_config, job_dir, job_num, header)
+        + "\n\n"
+        + generate_job_body(
+            job_dir,
+            template,
+            custom_args_chunk,
+            header_cmds,
+            parallel,
+            task_log,
+            cache,
+            stage,
+        )
+    )
+
+
+def generate_job_body(
+    job_dir,
+    template,
+    custom_args_chunk,
+    header_cmds="",
+    parallel=None,
+    task_log=None,
+    cache=None,
+    stage=None,
+):
+    """
+    Generate the part of a job script after the SLURM header, see
+    generate_job_script for the parameters.
+
+    Returns:
+    - str: The script body.
+    """
+    parts = []
+    if header_cmds != "":
+        if parallel is not None and parallel.launcher == "srun":
+            # srun tasks run in a new bash that only inherits the environment
+            header_cmds = f"set -a\n{header_cmds.rstrip()}\nset +a"
+        parts.append(header_cmds + "\n\n")
+    parts.append(f"cd {job_dir}\n\n")
+    if isinstance(template, str):
+        template = compile_template(template)
+    task_ids = None
+    if task_log is not None:
+        parts.append(generate_mark_function(task_log) + "\n")
+        task_ids = [args[TASK_ID_KEY] for args in custom_args_chunk]
+    rows = custom_args_chunk
+    output_dir = shlex.quote(job_dir)
+    if stage is not None:
+        staged = [get_staged_args(stage, args) for args in custom_args_chunk]
+        rows = [args for args, _ in staged]
+        outputs = [
+            output
+            for args in custom_args_chunk
+            for output in get_stage_outputs(stage, args)
+        ]
+        paths = [path for _, task_paths in staged for path in task_paths]
+        parts.append(generate_stage_in(stage, paths, job_dir, outputs) + "\n")
+        if outputs:
+            output_dir = f'"${STAGE_VAR}/work"'
+    task_strs = template.render_many(rows)
+    if cache is not None:
+        parts.append(generate_store_function(cache.dir) + "\n")
+        task_strs = (
+            generate_cached_task(
+                task_str,
+                args[CACHE_KEY_KEY],
+                output_dir,
+                get_task_outputs(cache, args),
+            )
+            for task_str, args in zip(task_strs, custom_args_chunk)
+        )
+    if parallel is not None:
+        task_strs = list(task_strs)
+        parts.append(generate_parallel_tasks(task_strs, job_dir, parallel, task_ids))
+        return "".join(parts)
+    for i, task_str in enumerate(task_strs):
+        if task_ids is not None:
+            task_str = generate_tracked_task(task_str, task_ids[i])
+        parts.append(task_str + "\n\n")
+    return "".join(parts)
+
+
+def write_job(
+    slurm_config,
+    run_dir,
+    job_num,
+    template,
+    custom_args_chunk,
+    header_cmds="",
+    previous_hash=None,
+    parallel=None,
+    task_log=None,
+    layout="nested",
+    header=None,
+    cache=None,
+    stage=None,
+):
+    """
+    Creates the job directory and writes the SLURM script for one job.
+
+    Parameters:
+    - previous_hash (str, optional): The content hash recorded for this job
+      by an earlier run. If the rendered script has the same hash and still
+      exists it is not rewritten.
+    - parallel (ParallelConfig, optional): Run the tasks concurrently.
+    - task_log (str, optional): Record each task's exit code in this log.
+    - layout (str): How job directories are arranged in run_dir, see
+      get_job_dir.
+    - header (Template, optional): The SLURM header template.
+    - cache (CacheConfig, optional): The result cache the tasks store their
+      outputs in.
+    - stage (StageConfig, optional): Stage the input files of the job.
+
+    Returns:
+    - tuple: The path of the script, its content hash and whether it was
+      written.
+    """
+    timer = get_timer()
+    job_dir = get_job_dir(run_dir, job_num, layout)
+    with timer.phase("render", 1):
+        script_content = generate_job_script(
+            slurm_config,
+            job_dir,
+            job_num,
+            template,
+            custom_args_chunk,
+            header_cmds,
+            parallel,
+            task_log,
+            header,
+            cache,
+            stage,
+        )
+        digest = hash_content(script_content)
+    job_file = slurm_config.job_name + "-" + str(job_num) + ".sh"
+    path = job_dir + "/" + job_file
+    if digest == previous_hash and os.path.isfile(path):
+        return path, digest, False
+    with timer.phase("write", 1):
+        os.makedirs(job_dir, exist_ok=True)
+        write_slurm_script(path, script_content)
+    return path, digest, True
+
+
+def write_job_array(
+    slurm_config,
+    run_dir,
+    template,
+    keys,
+    all_custom_args,
+    tasks_per_job,
+    header_cmds="",
+    layout="nested",
+    header=None,
+):
+    """
+    Writes a parameter table and a single SLURM array script that runs
+    tasks_per_job tasks per array index.
+
+    Parameters:
+    - slurm_config (SlurmJobConfig): The configuration for the SLURM job, its
+      throttle field limits the running array tasks.
+    - run_dir (str): The run directory.
+    - template (Template): The task template.
+    - keys (list): The custom argument names.
+    - all_custom_args (iterable): The custom arguments of every task.
+    - tasks_per_job (int): The number of tasks per array index.
+    - header_cmds (str): Extra commands placed after the SLURM header.
+    - layout (str): How the job directories of the array tasks are arranged
+      in run_dir, see get_job_dir.
+    - header (Template, optional): The SLURM header template.
+
+    Returns:
+    - str: The path of the written script.
+    """
+    run_dir = os.path.abspath(run_dir)
+    name = slurm_config.job_name
+    params_path = f"{run_dir}/{name}-params.txt"
+    n_tasks = write_params_table(params_path, keys, all_custom_args)
+    if n_tasks == 0:
+        raise ValueError("cannot write a job array without tasks")
+    n_jobs = -(-n_tasks // tasks_per_job)
+    log.info(f"Writing job array with {n_jobs} array tasks for {n_tasks} tasks")
+    array_config = replace(slurm_config, array=get_array_spec(n_jobs))
+    script_content = (
+        generate_slurm_header(array_config, run_dir, header=header) + "\n\n"
+    )
+    if header_cmds != "":
+        script_content += header_cmds + "\n\n"
+    script_content += generate_array_body(
+        template,
+        keys,
+        params_path,
+        get_job_dir_shell(run_dir, "SLURM_ARRAY_TASK_ID", layout),
+        tasks_per_job,
+    )
+    path = f"{run_dir}/{name}.sh"
+    write_slurm_script(path, script_content)
+    return path
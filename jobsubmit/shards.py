@@ -0,0 +1,109 @@
+import json
+import os
+import re
+from typing import List, Tuple
+
+from jobsubmit.logger import get_logger
+from jobsubmit.manifest import JobManifest, ManifestWriter
+
+log = get_logger("shards")
+
+SHARD_DIR_NAME = "shards"
+SHARD_FILE_RE = re.compile(r"^(\d+)-of-(\d+)\.json$")
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parses a shard spec "K/N", shard K of N counting from 0.
+
+    Raises:
+    - ValueError: If the spec is malformed or K is not in [0, N).
+    """
+    try:
+        k, n = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise ValueError(f"shard must look like K/N, got {value}") from None
+    if n < 1 or not 0 <= k < n:
+        raise ValueError(f"shard K/N needs 0 <= K < N, got {value}")
+    return k, n
+
+
+def is_shard_job(job_num: int, shard: Tuple[int, int]) -> bool:
+    """
+    Returns whether a job belongs to a shard, jobs are dealt round-robin so
+    every shard gets the same number of jobs give or take one.
+    """
+    return shard is None or job_num % shard[1] == shard[0]
+
+
+def get_shard_path(run_dir: str, shard: Tuple[int, int]) -> str:
+    k, n = shard
+    return os.path.join(run_dir, SHARD_DIR_NAME, f"{k}-of-{n}.json")
+
+
+def open_shard(run_dir: str, shard: Tuple[int, int]) -> ManifestWriter:
+    """
+    Opens the record of one shard for merge_shards: the scripts and hashes
+    of its jobs, and which of them were written and need submitting, passed
+    as written= when the record is closed.
+    """
+    path = get_shard_path(run_dir, shard)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return ManifestWriter(path)
+
+
+def merge_shards(run_dir: str, incremental: bool = False) -> List[str]:
+    """
+    Merges the shard records of a run directory into its manifest and
+    removes them.
+
+    Parameters:
+    - run_dir (str): The run directory the shards wrote to.
+    - incremental (bool): Also remove the scripts of jobs in the previous
+      manifest that no longer exist, as generate --incremental does.
+
+    Returns:
+    - list: The scripts to submit, in job order.
+
+    Raises:
+    - ValueError: If there are no shard records, they come from runs with
+      different shard counts, or a shard is missing.
+    """
+    shard_dir = os.path.join(run_dir, SHARD_DIR_NAME)
+    shards = []
+    if os.path.isdir(shard_dir):
+        for name in os.listdir(shard_dir):
+            m = SHARD_FILE_RE.match(name)
+            if m:
+                shards.append((int(m.group(1)), int(m.group(2))))
+    if not shards:
+        raise ValueError(f"no shards to merge in {run_dir}")
+    counts = sorted({n for _, n in shards})
+    if len(counts) > 1:
+        raise ValueError(
+            f"{shard_dir} holds shards of runs with different shard counts: "
+            f"{', '.join(map(str, counts))}"
+        )
+    n = counts[0]
+    missing = sorted(set(range(n)) - {k for k, _ in shards})
+    if missing:
+        raise ValueError(
+            f"missing shards {', '.join(f'{k}/{n}' for k in missing)} in {run_dir}"
+        )
+    merged = JobManifest()
+    written = []
+    for k in range(n):
+        with open(get_shard_path(run_dir, (k, n))) as f:
+            data = json.load(f)
+        merged.jobs.update({int(i): job for i, job in data["jobs"].items()})
+        written += data["written"]
+    if incremental:
+        removed = JobManifest.load(run_dir).remove_stale_jobs(merged)
+        log.info(f"{len(removed)} stale jobs removed")
+    merged.save(run_dir)
+    for k in range(n):
+        os.remove(get_shard_path(run_dir, (k, n)))
+    if not os.listdir(shard_dir):
+        os.rmdir(shard_dir)
+    log.info(f"merged {n} shards of {run_dir}: {len(merged)} jobs")
+    return [merged.jobs[i]["script"] for i in sorted(written)]
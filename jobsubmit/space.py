@@ -0,0 +1,228 @@
+import bisect
+import itertools
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+
+class IntRanges(Sequence):
+    """
+    A sorted union of non-overlapping ranges that is indexed without being
+    expanded, so "1-1000000" takes the same memory as "1-10".
+    """
+
+    def __init__(self, ranges: List[range]):
+        self.ranges = [r for r in ranges if len(r) > 0]
+        self._offsets = list(itertools.accumulate(len(r) for r in self.ranges))
+
+    def __len__(self):
+        return self._offsets[-1] if self._offsets else 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("IntRanges index out of range")
+        k = bisect.bisect_right(self._offsets, i)
+        start = self._offsets[k - 1] if k > 0 else 0
+        return self.ranges[k][i - start]
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.ranges)
+
+    def __contains__(self, value):
+        return any(value in r for r in self.ranges)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"IntRanges({self.ranges})"
+
+
+def parse_int_ranges(arg: str) -> Sequence:
+    """
+    Parses a comma-separated list of numbers and ranges such as
+    "1-3,5,10-100:10", where ":" gives the step of a range.
+
+    Returns:
+    - IntRanges, or a sorted list if the ranges overlap.
+
+    Raises:
+    - ValueError: If an item is not a number or range, or a step is not
+      positive.
+    """
+    ranges = []
+    for item in arg.split(","):
+        item = item.strip()
+        step = 1
+        if ":" in item:
+            item, step = item.split(":")
+            step = int(step)
+            if step <= 0:
+                raise ValueError(f"range step must be positive: {arg}")
+        if "-" in item:
+            start, end = map(int, item.split("-"))
+            ranges.append(range(start, end + 1, step))
+        else:
+            ranges.append(range(int(item), int(item) + 1))
+    ranges = sorted((r for r in ranges if len(r) > 0), key=lambda r: r[0])
+    for prev, r in zip(ranges, ranges[1:]):
+        if r[0] <= prev[-1]:
+            # overlapping ranges, expand them to drop duplicates
+            return sorted(set(itertools.chain.from_iterable(ranges)))
+    return IntRanges(ranges)
+
+
+class ZippedAxis(Sequence):
+    """
+    Several axes of the same length that advance together, item i is the
+    tuple of the i-th value of each axis.
+    """
+
+    def __init__(self, axes: List[Sequence]):
+        self.axes = list(axes)
+        lens = {len(a) for a in self.axes}
+        if len(lens) > 1:
+            raise ValueError(
+                f"zipped axes must have the same length, got {sorted(lens)}"
+            )
+        self._len = lens.pop() if lens else 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(self._len)[i]]
+        return tuple(a[i] for a in self.axes)
+
+    def __iter__(self):
+        return zip(*self.axes)
+
+    def __repr__(self):
+        return f"ZippedAxis(len={self._len})"
+
+
+def _bind(args: Dict, key: Union[str, Tuple[str, ...]], value) -> None:
+    if isinstance(key, tuple):
+        args.update(zip(key, value))
+    else:
+        args[key] = value
+
+
+class ParamSpace(Sequence):
+    """
+    The cartesian product of several axes of values.
+
+    Supports len(), indexing and slicing without enumerating the product.
+    Tasks are ordered like itertools.product, the last axis changing
+    fastest.
+
+    Attributes:
+        keys (list): The argument name of each axis, or a tuple of names for
+            a ZippedAxis.
+        axes (list): The values of each axis, any Sequence.
+        names (list): Every argument name, in order.
+    """
+
+    def __init__(self, keys: List[Union[str, Tuple[str, ...]]], axes: List[Sequence]):
+        if len(keys) != len(axes):
+            raise ValueError("ParamSpace needs one axis per key")
+        self.keys = list(keys)
+        self.axes = list(axes)
+        self.names = []
+        for key in self.keys:
+            self.names.extend(key if isinstance(key, tuple) else [key])
+        self._zipped = any(isinstance(key, tuple) for key in self.keys)
+        self._lens = [len(a) for a in self.axes]
+        self._len = 1
+        for n in self._lens:
+            self._len *= n
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(self._len)[i]]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("ParamSpace index out of range")
+        values = {}
+        for key, axis, n in zip(
+            reversed(self.keys), reversed(self.axes), reversed(self._lens)
+        ):
+            i, j = divmod(i, n)
+            _bind(values, key, axis[j])
+        return {name: values[name] for name in self.names}
+
+    def iter_pruned(self, checks: List[List[Callable[[Dict], bool]]]) -> Iterator[Dict]:
+        """
+        Iterates the product depth first, running the checks of axis d as
+        soon as its value is set and skipping every combination below a
+        value that fails one of them.
+
+        Parameters:
+        - checks (list): One list of predicates per axis, each takes the
+          arguments set so far and returns whether to keep them.
+        """
+        if self._len == 0:
+            return
+        if not self.axes:
+            if all(check({}) for depth in checks for check in depth):
+                yield {}
+            return
+        keys, axes = self.keys, self.axes
+        last = len(axes) - 1
+
+        def walk(depth, args):
+            key, depth_checks = keys[depth], checks[depth]
+            for value in axes[depth]:
+                current = args.copy()
+                _bind(current, key, value)
+                if depth_checks and not all(c(current) for c in depth_checks):
+                    continue
+                if depth == last:
+                    yield current
+                else:
+                    yield from walk(depth + 1, current)
+
+        yield from walk(0, {})
+
+    def __iter__(self):
+        if self._zipped:
+            yield from self.iter_pruned([[] for _ in self.axes])
+            return
+        if self._len == 0:
+            return
+        if not self.axes:
+            yield {}
+            return
+        keys, axes, lens = self.keys, self.axes, self._lens
+        last_key, last_axis = keys[-1], axes[-1]
+        n = len(axes) - 1
+        idx = [0] * n
+        while True:
+            prefix = {keys[j]: axes[j][idx[j]] for j in range(n)}
+            for value in last_axis:
+                args = prefix.copy()
+                args[last_key] = value
+                yield args
+            j = n - 1
+            while j >= 0:
+                idx[j] += 1
+                if idx[j] < lens[j]:
+                    break
+                idx[j] = 0
+                j -= 1
+            if j < 0:
+                return
+
+    def __repr__(self):
+        return f"ParamSpace(keys={self.keys}, lens={self._lens})"
@@ -0,0 +1,175 @@
+import os
+import shlex
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from jobsubmit.fileindex import has_magic
+from jobsubmit.layout import check_job_path
+from jobsubmit.template import Template
+
+# node-local directory of a job's staged inputs and, with outputs, its work
+# directory. Staged values become "$JS_STAGE/in/<absolute path>"
+STAGE_VAR = "JS_STAGE"
+STAGE_FILES_EOF = "JS_STAGE_FILES"
+
+
+@dataclass
+class StageConfig:
+    """
+    How a job copies its input files to node-local storage.
+
+    Attributes:
+        inputs (list): The custom arguments naming input files.
+        outputs (list): The output file templates of a task. When given the
+            tasks run in a node-local work directory and these are copied
+            back to the job directory when the job exits.
+        tmpdir (str): A shell expression for the node-local directory.
+    """
+
+    inputs: List[str]
+    outputs: List[Template] = field(default_factory=list)
+    tmpdir: str = "${TMPDIR:-/tmp}"
+
+
+def get_stage_config(value: Union[bool, Dict], custom_args: Dict = None) -> StageConfig:
+    """
+    Builds the StageConfig from the stage field of the config: true, or a
+    dict with inputs, outputs and tmpdir. The inputs default to the custom
+    arguments that are glob patterns.
+
+    Returns:
+    - StageConfig, or None if the field is not set.
+
+    Raises:
+    - ValueError: If there are no inputs to stage or an output is not a
+      relative path inside the job directory.
+    """
+    if not value:
+        return None
+    if value is True:
+        value = {}
+    inputs = value.get("inputs")
+    if inputs is None:
+        inputs = [k for k, v in (custom_args or {}).items() if has_magic(str(v))]
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    if len(inputs) == 0:
+        raise ValueError(
+            "stage needs inputs, the custom arguments naming the files to stage"
+        )
+    outputs = value.get("outputs") or []
+    if isinstance(outputs, str):
+        outputs = [outputs]
+    for output in outputs:
+        check_job_path(output, "stage output")
+    return StageConfig(
+        list(inputs),
+        [Template(output) for output in outputs],
+        value.get("tmpdir", StageConfig.tmpdir),
+    )
+
+
+def get_stage_names(stage: StageConfig) -> Set[str]:
+    """
+    Returns the custom arguments staging uses: its inputs and the
+    placeholders of its outputs.
+    """
+    names = set(stage.inputs)
+    for output in stage.outputs:
+        names.update(output.placeholders)
+    return names
+
+
+def get_stage_outputs(stage: StageConfig, custom_args: Dict) -> List[str]:
+    """
+    Returns the rendered stage outputs of a task.
+
+    Raises:
+    - ValueError: If an output does not render to a path inside the job
+      directory, e.g. an empty value.
+    """
+    return [
+        check_job_path(output.render(custom_args), "stage output")
+        for output in stage.outputs
+    ]
+
+
+def get_staged_args(stage: StageConfig, custom_args: Dict) -> Tuple[Dict, List[str]]:
+    """
+    Points the input arguments of a task at their staged copies.
+
+    Returns:
+    - tuple: The custom arguments with every absolute input path replaced by
+      its node-local copy, and the paths that are staged.
+    """
+    staged = dict(custom_args)
+    paths = []
+    for key in stage.inputs:
+        value = custom_args.get(key)
+        if not isinstance(value, str) or not os.path.isabs(value):
+            continue
+        if "\n" in value:
+            raise ValueError(f"cannot stage a path with a newline: {value!r}")
+        staged[key] = f"${STAGE_VAR}/in{value}"
+        paths.append(value)
+    return staged, paths
+
+
+def generate_stage_in(
+    stage: StageConfig, paths: Iterable[str], job_dir: str, outputs: List[str]
+) -> str:
+    """
+    Generates the part of a job script that copies the distinct input files
+    of the job to a node-local directory with a single tar pipe, and removes
+    it when the job exits.
+
+    With outputs the script then moves to a node-local work directory, and
+    the outputs that exist are copied back to job_dir on exit.
+
+    Parameters:
+    - stage (StageConfig): The staging config.
+    - paths (iterable): The absolute paths to stage, duplicates are copied
+      once.
+    - job_dir (str): The job directory.
+    - outputs (list): The outputs of every task, relative to job_dir.
+
+    Returns:
+    - str: The script lines.
+    """
+    job_dir = shlex.quote(job_dir)
+    lines = [
+        f'export {STAGE_VAR}=$(mktemp -d "{stage.tmpdir}/jobsubmit.XXXXXX")',
+        "_js_unstage() {",
+        "    local rc=$?",
+    ]
+    if outputs:
+        lines += [
+            f"    cd {job_dir}",
+            f"    for out in {' '.join(shlex.quote(o) for o in dict.fromkeys(outputs))}; do",
+            f'        if [ -e "${STAGE_VAR}/work/$out" ]; then',
+            f'            mkdir -p "$(dirname "$out")" && cp -pR "${STAGE_VAR}/work/$out" "$out"',
+            "        fi",
+            "    done",
+        ]
+    lines += [
+        f'    rm -rf "${STAGE_VAR}"',
+        '    return "$rc"',
+        "}",
+        "trap _js_unstage EXIT",
+        f'mkdir -p "${STAGE_VAR}/in"',
+    ]
+    paths = [path.lstrip("/") for path in dict.fromkeys(paths)]
+    if paths:
+        lines += [
+            f"if ! (set -o pipefail; tar -C / -cf - -T - <<'{STAGE_FILES_EOF}' | "
+            f'tar -C "${STAGE_VAR}/in" -xf -',
+            *paths,
+            STAGE_FILES_EOF,
+            "); then",
+            f'    echo "staging inputs to ${STAGE_VAR} failed" >&2',
+            "    exit 1",
+            "fi",
+        ]
+    if outputs:
+        lines.append(f'mkdir -p "${STAGE_VAR}/work" && cd "${STAGE_VAR}/work"')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,268 @@
+import getpass
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from jobsubmit.logger import get_logger
+from jobsubmit.manifest import write_json_atomic
+
+log = get_logger("submit")
+
+SUBMITTED_NAME = "submitted.json"
+
+# sbatch errors that mean the controller is busy or a queue limit was hit,
+# these are retried with backoff, anything else fails the job right away
+TRANSIENT_ERRORS = (
+    "socket timed out",
+    "unable to contact slurm controller",
+    "resource temporarily unavailable",
+    "try again",
+    "maxsubmit",
+    "slurm_receive_msg",
+)
+
+
+class SubmitError(Exception):
+    """
+    Raised when sbatch fails for a job.
+    """
+
+
+@dataclass
+class SubmitConfig:
+    """
+    Configuration for bulk job submission.
+
+    Attributes:
+        sbatch (str): The sbatch executable.
+        squeue (str): The squeue executable.
+        concurrency (int): The number of sbatch calls running at once.
+        retries (int): How many times a transient sbatch failure is retried.
+        backoff (float): Seconds before the first retry, doubled each time.
+        max_backoff (float): The longest wait between retries.
+        max_queued (int): The maximum number of the user's jobs in the queue,
+            0 for no limit. Submission pauses while the queue is full.
+        poll_interval (float): Seconds between squeue polls while the queue
+            is full.
+    """
+
+    sbatch: str = "sbatch"
+    squeue: str = "squeue"
+    concurrency: int = 4
+    retries: int = 5
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    max_queued: int = 0
+    poll_interval: float = 30.0
+
+
+def read_job_list(path: str) -> List[str]:
+    """
+    Returns the sbatch lines of a job list such as README_SUBMIT, skipping
+    blank lines and comments.
+    """
+    lines = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            if not line.startswith("sbatch "):
+                raise ValueError(f"not an sbatch line in {path}: {line}")
+            lines.append(line)
+    return lines
+
+
+def hash_job_files(line: str) -> str:
+    """
+    Returns a hash of the content of the files an sbatch line refers to, so
+    a job whose script was regenerated is submitted again.
+    """
+    digest = hashlib.sha256()
+    for arg in shlex.split(line)[1:]:
+        if os.path.isfile(arg):
+            with open(arg, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_submitted(run_dir: str) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the submissions recorded in run_dir, keyed by sbatch line, each
+    with its job_id and the hash of the submitted files.
+    """
+    path = os.path.join(run_dir, SUBMITTED_NAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["jobs"]
+
+
+def save_submitted(run_dir: str, jobs: Dict[str, Dict[str, str]]) -> None:
+    write_json_atomic(os.path.join(run_dir, SUBMITTED_NAME), {"jobs": jobs})
+
+
+def is_transient_error(message: str) -> bool:
+    message = message.lower()
+    return any(e in message for e in TRANSIENT_ERRORS)
+
+
+class Submitter:
+    """
+    Submits sbatch lines with bounded concurrency, retries with exponential
+    backoff when the controller is busy, and a cap on queued jobs.
+    """
+
+    def __init__(self, config: SubmitConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._queued = None
+        # set on interrupt so waiting submissions give up
+        self._stop = threading.Event()
+
+    def count_queued(self) -> int:
+        """
+        Returns the number of the user's jobs in the queue, counting every
+        array task.
+        """
+        cmd = [self.config.squeue, "-h", "-r", "-u", getpass.getuser(), "-o", "%i"]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise SubmitError(f"squeue failed: {proc.stderr.strip()}")
+        return len(proc.stdout.split())
+
+    def _acquire_queue_slot(self):
+        if self.config.max_queued <= 0:
+            return
+        with self._lock:
+            while True:
+                if self._queued is None or self._queued >= self.config.max_queued:
+                    self._queued = self.count_queued()
+                if self._queued < self.config.max_queued:
+                    self._queued += 1
+                    return
+                log.info(
+                    f"{self._queued} jobs queued, waiting for the queue to drain "
+                    f"below {self.config.max_queued}"
+                )
+                if self._stop.wait(self.config.poll_interval):
+                    raise SubmitError("submission interrupted")
+
+    def submit_one(self, line: str) -> str:
+        """
+        Submits one sbatch line.
+
+        Returns:
+        - str: The job id.
+
+        Raises:
+        - SubmitError: If sbatch fails, or keeps failing with transient
+          errors after all retries.
+        """
+        if self._stop.is_set():
+            raise SubmitError(f"{line}: submission interrupted")
+        self._acquire_queue_slot()
+        args = shlex.split(line)[1:]
+        cmd = [self.config.sbatch, "--parsable"] + args
+        delay = self.config.backoff
+        for attempt in range(self.config.retries + 1):
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode == 0:
+                # --parsable prints "<job id>[;<cluster>]"
+                return proc.stdout.strip().split(";")[0]
+            error = proc.stderr.strip()
+            if not is_transient_error(error) or attempt == self.config.retries:
+                break
+            log.debug(f"sbatch busy, retrying in {delay:.1f}s: {error}")
+            time.sleep(delay)
+            delay = min(delay * 2, self.config.max_backoff)
+        raise SubmitError(f"{line}: {error}")
+
+    def submit_all(
+        self,
+        lines: List[str],
+        submitted: Dict[str, Dict[str, str]],
+        on_submitted: Callable[[], None] = None,
+    ) -> List[str]:
+        """
+        Submits every line that is not in submitted with the same file hash,
+        recording the job ids in submitted as they come back.
+
+        On an interrupt such as Ctrl-C the queued lines are dropped, the
+        sbatch calls already running finish and are recorded in submitted,
+        without on_submitted, and the exception is raised again.
+
+        Parameters:
+        - lines (list): The sbatch lines.
+        - submitted (dict): The recorded submissions, updated in place.
+        - on_submitted (callable, optional): Called after each job id is
+          recorded, e.g. to save submitted.
+
+        Returns:
+        - list: The errors of the lines that could not be submitted.
+        """
+        hashes = {line: hash_job_files(line) for line in lines}
+        todo = [
+            line
+            for line in lines
+            if submitted.get(line, {}).get("hash") != hashes[line]
+        ]
+        if len(todo) < len(lines):
+            log.info(f"skipping {len(lines) - len(todo)} already submitted jobs")
+        errors = []
+
+        def record(future, notify=True):
+            line = futures.pop(future)
+            try:
+                job_id = future.result()
+            except SubmitError as e:
+                log.error(str(e))
+                errors.append(str(e))
+                return
+            submitted[line] = {"job_id": job_id, "hash": hashes[line]}
+            if notify and on_submitted is not None:
+                on_submitted()
+
+        pool = ThreadPoolExecutor(max_workers=self.config.concurrency)
+        futures = {pool.submit(self.submit_one, line): line for line in todo}
+        try:
+            for future in as_completed(list(futures)):
+                record(future)
+        except BaseException:
+            self._stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            for future in list(futures):
+                if not future.cancelled() and future.exception() is None:
+                    record(future, notify=False)
+            raise
+        pool.shutdown()
+        return errors
+
+
+def submit_jobs(job_list: str, run_dir: str, config: SubmitConfig, force=False):
+    """
+    Submits the jobs of a job list and records their ids in
+    run_dir/submitted.json. Jobs already recorded there, with unchanged
+    scripts, are skipped unless force is set.
+
+    Returns:
+    - tuple: The recorded submissions keyed by sbatch line, and the errors.
+    """
+    lines = read_job_list(job_list)
+    submitted = {} if force else load_submitted(run_dir)
+    os.makedirs(run_dir, exist_ok=True)
+    # saved after every job, so a run that is killed never submits a job twice
+    try:
+        errors = Submitter(config).submit_all(
+            lines, submitted, lambda: save_submitted(run_dir, submitted)
+        )
+    finally:
+        save_submitted(run_dir, submitted)
+    return submitted, errors
@@ -0,0 +1,92 @@
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Union
+
+from jobsubmit.defaults import fill_in_missing_default_dict_values
+from jobsubmit.jobset import JobSet, Sink
+
+SWEEPS_KEY = "sweeps"
+
+
+def is_multi_sweep(config: Union[Dict, List]) -> bool:
+    """
+    Returns whether a config describes several sweeps.
+    """
+    return isinstance(config, list) or (
+        isinstance(config, dict) and SWEEPS_KEY in config
+    )
+
+
+def expand_sweeps(config: Union[Dict, List]) -> List[Dict]:
+    """
+    Returns the configs of the sweeps of a multi-sweep config.
+
+    The config is either a list of sweep configs, or a config with a sweeps
+    list whose other fields are a base every sweep inherits: a sweep keeps
+    its own values and takes the rest from the base, nested fields such as
+    slurm_args and custom_args are merged key by key.
+
+    Every sweep gets a name, sweep-<n> unless it sets one, and a run_dir,
+    <base run_dir>/<name> unless it sets one.
+
+    Raises:
+    - ValueError: If two sweeps share a name or a run directory.
+    """
+    if isinstance(config, list):
+        base, sweeps = {}, config
+    else:
+        base = {k: v for k, v in config.items() if k != SWEEPS_KEY}
+        sweeps = config[SWEEPS_KEY] or []
+    if len(sweeps) == 0:
+        raise ValueError("a multi-sweep config needs at least one sweep")
+    base_run_dir = base.get("run_dir", "runs")
+    configs = []
+    for i, sweep in enumerate(sweeps):
+        sweep = copy.deepcopy(sweep)
+        sweep.setdefault("name", f"sweep-{i}")
+        sweep.setdefault("run_dir", os.path.join(base_run_dir, str(sweep["name"])))
+        configs.append(fill_in_missing_default_dict_values(base, sweep))
+    for field in ("name", "run_dir"):
+        values = [os.path.normpath(str(c[field])) for c in configs]
+        duplicates = sorted({v for v in values if values.count(v) > 1})
+        if duplicates:
+            raise ValueError(f"sweeps share a {field}: {', '.join(duplicates)}")
+    return copy.deepcopy(configs)
+
+
+def generate_sweeps(
+    jobsets: List[JobSet],
+    make_sink: Callable[[], Sink],
+    workers: int = 1,
+    sweep_workers: int = 1,
+) -> List[Sink]:
+    """
+    Generates several sweeps, sweep_workers of them at a time.
+
+    The JobSets should be built beforehand, sharing an axis cache, so globs
+    and ranges are parsed once for all sweeps and only the rendering and
+    writing of the jobs runs concurrently.
+
+    Parameters:
+    - jobsets (list): The sweeps.
+    - make_sink (callable): Returns a new Sink for each sweep.
+    - workers (int): The number of threads of each sweep.
+    - sweep_workers (int): The number of sweeps generated at once.
+
+    Returns:
+    - list: The sink of each sweep, in order.
+    """
+    sinks = [make_sink() for _ in jobsets]
+    if sweep_workers <= 1 or len(jobsets) == 1:
+        for jobset, sink in zip(jobsets, sinks):
+            jobset.generate(sink, workers)
+        return sinks
+    with ThreadPoolExecutor(max_workers=sweep_workers) as pool:
+        futures = [
+            pool.submit(jobset.generate, sink, workers)
+            for jobset, sink in zip(jobsets, sinks)
+        ]
+        for future in futures:
+            future.result()
+    return sinks
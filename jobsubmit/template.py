@@ -0,0 +1,98 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator
+
+PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+class Template:
+    """
+    A template with {VAR} placeholders that is parsed once and rendered many
+    times.
+
+    The text is split into literal pieces and placeholder slots, so rendering
+    a task is a single join instead of a regex scan of the whole template.
+
+    Attributes:
+        text (str): The original template text.
+        placeholders (tuple): The distinct placeholder names, in order of first
+            appearance.
+    """
+
+    def __init__(self, text: str, keys: Iterable[str] = None):
+        """
+        Parameters:
+        - text (str): The template text.
+        - keys (iterable, optional): The names that will be available when
+          rendering. If given, every placeholder must be one of them.
+
+        Raises:
+        - ValueError: If keys is given and a placeholder is not in it.
+        """
+        self.text = text
+        self._pieces = []
+        self._slots = []
+        pos = 0
+        for m in PLACEHOLDER_RE.finditer(text):
+            self._pieces.append(text[pos : m.start()])
+            self._slots.append((len(self._pieces), m.group(1)))
+            self._pieces.append("")
+            pos = m.end()
+        self._pieces.append(text[pos:])
+        self.placeholders = tuple(dict.fromkeys(name for _, name in self._slots))
+        if keys is not None:
+            self.check(keys)
+
+    def __repr__(self):
+        return f"Template(placeholders={self.placeholders})"
+
+    def missing(self, keys: Iterable[str]) -> list:
+        """
+        Returns the placeholders that have no value in keys.
+        """
+        keys = set(keys)
+        return [name for name in self.placeholders if name not in keys]
+
+    def check(self, keys: Iterable[str]) -> None:
+        """
+        Checks that every placeholder will have a value when rendering.
+
+        Raises:
+        - ValueError: If a placeholder is not in keys.
+        """
+        missing = self.missing(keys)
+        if missing:
+            raise ValueError(
+                f"template placeholders have no value: {', '.join(missing)}; "
+                f"available: {', '.join(sorted(set(keys)))}"
+            )
+
+    def render(self, args: Dict) -> str:
+        """
+        Renders the template, placeholders without a value in args become "".
+        """
+        pieces = self._pieces[:]
+        for i, name in self._slots:
+            pieces[i] = str(args.get(name, ""))
+        return "".join(pieces)
+
+    def render_many(self, rows: Iterable[Dict]) -> Iterator[str]:
+        """
+        Lazily renders the template once for each row.
+        """
+        pieces = self._pieces
+        slots = self._slots
+        join = "".join
+        for args in rows:
+            out = pieces[:]
+            for i, name in slots:
+                out[i] = str(args.get(name, ""))
+            yield join(out)
+
+
+@lru_cache(maxsize=128)
+def compile_template(text: str) -> Template:
+    """
+    Returns the compiled Template for text, compiling each text only once.
+    """
+    return Template(text)
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, Set
+
+from jobsubmit.logger import get_logger
+
+log = get_logger("tracking")
+
+# custom argument holding the task id, also usable as {JOBSUBMIT_TASK_ID}
+TASK_ID_KEY = "JOBSUBMIT_TASK_ID"
+TASK_LOG_NAME = "task_status.log"
+RESUME_DIR_PREFIX = "resume-"
+
+
+def get_task_id(custom_args: Dict, rep: int = 0) -> str:
+    """
+    Returns a stable id for a task derived from its custom arguments, the
+    same arguments always give the same id. Repeats after the first get a
+    ".<rep>" suffix.
+    """
+    args = {k: v for k, v in custom_args.items() if k != TASK_ID_KEY}
+    text = json.dumps(args, sort_keys=True, default=str)
+    task_id = hashlib.sha1(text.encode()).hexdigest()[:16]
+    if rep > 0:
+        task_id += f".{rep}"
+    return task_id
+
+
+def iter_tracked_tasks(
+    factory: Callable[[], Iterable[Dict]], repeat: int, completed: Set[str] = None
+) -> Iterator[Dict]:
+    """
+    Repeats a stream of tasks like repeat_iter and adds the task id of each
+    task under TASK_ID_KEY.
+
+    Parameters:
+    - factory (callable): Returns a fresh iterable of tasks each time.
+    - repeat (int): The number of passes over the tasks.
+    - completed (set, optional): Task ids to leave out.
+
+    Yields:
+    - dict: The custom arguments of each task, with its id.
+    """
+    n_skipped = 0
+    for rep in range(repeat):
+        for custom_args in factory():
+            task_id = get_task_id(custom_args, rep)
+            if completed is not None and task_id in completed:
+                n_skipped += 1
+                continue
+            custom_args = dict(custom_args)
+            custom_args[TASK_ID_KEY] = task_id
+            yield custom_args
+    if completed is not None:
+        log.info(f"skipped {n_skipped} completed tasks")
+
+
+def read_completed(run_dir: str) -> Set[str]:
+    """
+    Returns the ids of the tasks that finished with exit code 0, from the
+    consolidated task log of run_dir.
+
+    The log is a single file all jobs append to, so this is one sequential
+    read no matter how many tasks or jobs there are.
+    """
+    path = os.path.join(run_dir, TASK_LOG_NAME)
+    completed = set()
+    if not os.path.isfile(path):
+        return completed
+    with open(path) as f:
+        for line in f:
+            fields = line.split("\t")
+            if len(fields) >= 2 and fields[1].strip() == "0":
+                completed.add(fields[0])
+    return completed
+
+
+def get_resume_dir(run_dir: str) -> str:
+    """
+    Returns the next unused run_dir/resume-<n> directory.
+    """
+    n = 1
+    while os.path.exists(os.path.join(run_dir, f"{RESUME_DIR_PREFIX}{n}")):
+        n += 1
+    return os.path.join(run_dir, f"{RESUME_DIR_PREFIX}{n}")
+
+
+def generate_mark_function(task_log: str) -> str:
+    """
+    Generates the _js_mark shell function that appends "<task id> <exit code>
+    <slurm job id> <time>" to the consolidated task log. Appends are
+    serialized with flock where it is available, since not every shared
+    filesystem makes concurrent appends atomic.
+    """
+    line = 'printf "%s\\t%s\\t%s\\t%s\\n" "$1" "$2" "${SLURM_JOB_ID:-}" "$(date +%s)"'
+    return "\n".join(
+        [
+            f"JS_TASK_LOG={task_log}",
+            "_js_mark() {",
+            "    if command -v flock > /dev/null; then",
+            f'        ( flock 9; {line} >&9 ) 9>> "$JS_TASK_LOG"',
+            "    else",
+            f'        {line} >> "$JS_TASK_LOG"',
+            "    fi",
+            "}",
+            "",
+        ]
+    )
+
+
+def generate_tracked_task(task_str: str, task_id: str) -> str:
+    """
+    Wraps a rendered task so its exit code is recorded in the task log.
+    """
+    return f"{{\n{task_str}\n}}\n_js_mark {task_id} $?"
@@ -46,7 +46,7 @@ setup(
     ],
     entry_points={
         "console_scripts": [
-            "jobsubmit = jobsubmit.cli:main",
+            "jobsubmit = jobsubmit.cli:cli",
         ]
     },
 )
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.archive import (
+    INDEX_ENTRY_SIZE,
+    ArchiveWriter,
+    get_archive_paths,
+    read_archive_script,
+)
+from jobsubmit.cli import main
+from test.test_cli import write_example
+
+
+def test_archive_writer(tmp_path):
+    archive_path, index_path = get_archive_paths(str(tmp_path), "test")
+    scripts = ["echo 0\n", "", "echo ünïcode\n"]
+    with ArchiveWriter(archive_path, index_path) as archive:
+        for i, script in enumerate(scripts):
+            assert archive.add(script) == i
+    assert os.path.getsize(index_path) == len(scripts) * INDEX_ENTRY_SIZE
+    for i, script in enumerate(scripts):
+        assert read_archive_script(archive_path, index_path, i) == script
+    with pytest.raises(IndexError):
+        read_archive_script(archive_path, index_path, 3)
+
+
+def test_main_archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path, template="echo {range_arg} $(pwd)")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml", "--archive"])
+    assert result.exit_code == 0, result.output
+    launcher = str(tmp_path / "runs" / "test.sh")
+    with open("README_SUBMIT") as f:
+        assert f.read() == f"sbatch {launcher}\n"
+    with open(launcher) as f:
+        assert "#SBATCH --array=0-2\n" in f.read()
+    assert sorted(os.listdir("runs")) == [
+        "logs",
+        "test-jobs.bin",
+        "test-jobs.idx",
+        "test.sh",
+    ]
+    proc = subprocess.run(
+        ["bash", launcher, "1"], capture_output=True, text=True, check=True
+    )
+    assert proc.stdout == f"3 {tmp_path}/runs/1\n1 {tmp_path}/runs/1\n"
+    proc = subprocess.run(
+        ["bash", launcher],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "SLURM_ARRAY_TASK_ID": "2"},
+    )
+    assert proc.stdout == f"2 {tmp_path}/runs/2\n3 {tmp_path}/runs/2\n"
+    proc = subprocess.run(["bash", launcher, "3"], capture_output=True, text=True)
+    assert proc.returncode != 0
+
+
+def test_main_archive_header_cmds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path, template="echo threads=$NT; js_fn")
+    (tmp_path / "header.txt").write_text("NT=8\njs_fn() { echo fn; }\n")
+    args = ["template.txt", "config.yml", "--extra-header-cmds", "header.txt"]
+    result = CliRunner().invoke(main, args + ["--archive"])
+    assert result.exit_code == 0, result.output
+    proc = subprocess.run(
+        ["bash", "runs/test.sh", "0"], capture_output=True, text=True, check=True
+    )
+    assert proc.stdout.splitlines()[:2] == ["threads=8", "fn"]
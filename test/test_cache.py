@@ -0,0 +1,159 @@
+import os
+import subprocess
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cache import (
+    evict_cache,
+    get_cache_config,
+    get_task_key,
+    get_task_outputs,
+    link_cached_outputs,
+    parse_size,
+)
+from jobsubmit.cli import main
+from jobsubmit.jobset import ArraySink, FileSystemSink, JobSet
+from test.test_cli import write_example
+
+
+def test_parse_size():
+    assert parse_size(500) == 500
+    assert parse_size("2KB") == 2048
+    assert parse_size("1.5G") == int(1.5 * 1024**3)
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_get_cache_config():
+    assert get_cache_config(None) is None
+    cache = get_cache_config({"dir": "c", "outputs": "{x}.out", "max_size": "1MB"})
+    assert [t.text for t in cache.outputs] == ["{x}.out"]
+    assert cache.max_size == 1024**2
+    for value in (
+        {"dir": "c"},
+        {"dir": "c", "outputs": ["../x"]},
+        {"dir": "c", "outputs": ["/abs"]},
+        {"dir": "c", "outputs": ["x"], "link": "copy"},
+    ):
+        with pytest.raises(ValueError):
+            get_cache_config(value)
+
+
+def test_task_key_input_fingerprint(tmp_path):
+    path = tmp_path / "in.txt"
+    path.write_text("a")
+    args = {"f": str(path)}
+    key = get_task_key("run", args)
+    assert get_task_key("run", args) == key
+    assert get_task_key("run2", args) != key
+    path.write_text("ab")
+    assert get_task_key("run", args) != key
+    assert get_task_key("run", args, inputs=[]) == get_task_key("run", {})
+
+
+def make_jobset(tmp_path, run_dir, n):
+    config = {
+        "run_dir": str(tmp_path / run_dir),
+        "tasks_per_job": 2,
+        "custom_args": {"x": f"1-{n}"},
+        "cache": {"dir": str(tmp_path / "cache"), "outputs": ["out/{x}.txt"]},
+    }
+    return JobSet(config, "mkdir -p out; echo {x} > out/{x}.txt")
+
+
+def test_cache_across_sweeps(tmp_path):
+    sink = make_jobset(tmp_path, "runs1", 3).generate(FileSystemSink())
+    assert sink.n_jobs == 2
+    for path in sink.submit_paths:
+        subprocess.run(["bash", path], check=True, cwd=tmp_path)
+
+    jobset = make_jobset(tmp_path, "runs2", 5)
+    sink = jobset.generate(FileSystemSink())
+    assert jobset.n_cached == 3
+    # job 0 is fully cached, job 1 only runs task 4
+    assert sink.submit_paths == [
+        str(tmp_path / f"runs2/{i}/test-{i}.sh") for i in (1, 2)
+    ]
+    with open(sink.submit_paths[0]) as f:
+        script = f.read()
+    assert "echo 4" in script and "echo 3" not in script
+    for x, job in ((1, 0), (2, 0), (3, 1)):
+        path = tmp_path / f"runs2/{job}/out/{x}.txt"
+        assert path.read_text() == f"{x}\n"
+        assert os.stat(path).st_nlink == 2
+
+    with pytest.raises(ValueError):
+        jobset.generate(ArraySink())
+
+
+def test_evict_cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+    for i, key in enumerate(["aa1", "bb2", "cc3"]):
+        entry = cache_dir / key[:2] / key
+        entry.mkdir(parents=True)
+        (entry / "out").write_text("x" * 100)
+        os.utime(entry, (1000 + i, 1000 + i))
+    (cache_dir / "dd" / "dd4.tmp.1").mkdir(parents=True)
+    assert evict_cache(str(cache_dir), 250) == (1, 100)
+    assert not (cache_dir / "aa" / "aa1").exists()
+    assert (cache_dir / "bb" / "bb2").exists()
+    assert (cache_dir / "dd" / "dd4.tmp.1").exists()
+    assert evict_cache(str(cache_dir), 0) == (2, 200)
+
+
+def test_iter_jobs_with_cache(tmp_path):
+    jobs = list(make_jobset(tmp_path, "runs", 3).iter_jobs())
+    assert len(jobs) == 2
+    assert "_js_cache_store" in jobs[0].script
+
+
+def test_link_cached_outputs_checks_entry(tmp_path):
+    cache = get_cache_config({"dir": str(tmp_path / "cache"), "outputs": ["x"]})
+    assert get_task_key("run", {}, outputs=["a"]) != get_task_key("run", {})
+    entry = tmp_path / "cache" / "ab" / "abc"
+    (entry / "out").mkdir(parents=True)
+    (entry / "out" / "f").write_text("1")
+    job_dir = tmp_path / "job"
+    # an output missing from the entry is not a hit and links nothing
+    assert not link_cached_outputs(cache, "abc", ["out", "log"], str(job_dir))
+    assert not job_dir.exists()
+    # a directory output replaces the one already in the job dir
+    (job_dir / "out").mkdir(parents=True)
+    (job_dir / "out" / "old").write_text("0")
+    assert link_cached_outputs(cache, "abc", ["out"], str(job_dir))
+    assert os.listdir(job_dir / "out") == ["f"]
+
+
+def test_task_outputs_inside_job_dir(tmp_path):
+    cache = get_cache_config({"dir": str(tmp_path / "cache"), "outputs": ["{o}"]})
+    assert get_task_outputs(cache, {"o": "a/b.txt"}) == ["a/b.txt"]
+    for value in ("", ".", "a/..", "../x", "/abs"):
+        with pytest.raises(ValueError):
+            get_task_outputs(cache, {"o": value})
+    job_dir = tmp_path / "job"
+    job_dir.mkdir()
+    (job_dir / "keep").write_text("")
+    with pytest.raises(ValueError):
+        link_cached_outputs(cache, "abc", ["."], str(job_dir))
+    assert (job_dir / "keep").exists()
+    with pytest.raises(ValueError):
+        get_task_key("run", {}, inputs=["f"])
+
+
+def test_dataframe_cache_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "in.txt").write_text("x")
+    (tmp_path / "df.csv").write_text(f"a,out,f\n1,one.txt,{tmp_path}/in.txt\n")
+    cache = {"dir": "cache", "outputs": ["{out}"], "inputs": ["f"]}
+    write_example(tmp_path, {"run_dir": "runs", "cache": cache}, "echo {a}")
+    args = ["template.txt", "config.yml", "--dataframe", "df.csv"]
+    for engine in ("python", "pandas"):
+        result = CliRunner().invoke(main, args + ["--csv-engine", engine])
+        assert result.exit_code == 0, result.output
+        script = (tmp_path / "runs" / "0" / "test-0.sh").read_text()
+        assert f" {tmp_path}/runs/0 one.txt\n" in script
+
+    cache["inputs"] = ["g"]
+    write_example(tmp_path, {"run_dir": "runs", "cache": cache}, "echo {a}")
+    result = CliRunner().invoke(main, args)
+    assert isinstance(result.exception, ValueError)
@@ -1,10 +1,32 @@
+import os
 import yaml
+from click.testing import CliRunner
 from jobsubmit.cli import (
     fill_in_missing_default_dict_values,
     fill_in_missing_default_params,
+    chunk_iter,
+    repeat_iter,
+    ordered_pool_map,
+    main,
 )
 
 
+def write_example(path, config=None, template=None):
+    if config is None:
+        config = {
+            "run_dir": "runs",
+            "tasks_per_job": 2,
+            "repeat": 2,
+            "custom_args": {"range_arg": "1-3"},
+        }
+    if template is None:
+        template = "echo {range_arg}"
+    with open(path / "config.yml", "w") as f:
+        yaml.safe_dump(config, f)
+    with open(path / "template.txt", "w") as f:
+        f.write(template)
+
+
 def test_fill_in_missing_default_dict_values():
     # Test case 1: Default dictionary is empty
     default = {}
@@ -155,3 +177,62 @@ def test_fill_in_missing_default_params():
         current["slurm_args"]["ntasks_per_node"]
         == default_params["slurm_args"]["ntasks_per_node"]
     )
+
+
+def test_chunk_iter():
+    assert list(chunk_iter(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunk_iter(iter([]), 2)) == []
+
+
+def test_repeat_iter():
+    assert list(repeat_iter(lambda: iter([1, 2]), 3)) == [1, 2, 1, 2, 1, 2]
+
+
+def test_main(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path)
+    result = CliRunner().invoke(main, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    lines = open("README_SUBMIT").read().splitlines()
+    assert len(lines) == 3
+    job_dir = os.path.abspath("runs/0")
+    assert lines[0] == f"sbatch {job_dir}/test-0.sh"
+    script = open(f"{job_dir}/test-0.sh").read()
+    assert script.endswith(f"cd {job_dir}\n\necho 1\n\necho 2\n\n")
+    script = open("runs/2/test-2.sh").read()
+    assert script.endswith("echo 2\n\necho 3\n\n")
+
+
+def test_ordered_pool_map():
+    items = range(50)
+    expected = [x * x for x in items]
+    assert list(ordered_pool_map(lambda x: x * x, items)) == expected
+    assert list(ordered_pool_map(lambda x: x * x, iter(items), 4, 2)) == expected
+
+
+def test_main_workers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path)
+    runner = CliRunner()
+    result = runner.invoke(main, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    serial = open("README_SUBMIT").read()
+    result = runner.invoke(main, ["template.txt", "config.yml", "--workers", "4"])
+    assert result.exit_code == 0, result.output
+    assert open("README_SUBMIT").read() == serial
+
+
+def test_main_failure_keeps_submit_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "custom_args": {"range_arg": "1-2"},
+        "cache": {"dir": "cache", "outputs": ["out.txt"]},
+    }
+    write_example(tmp_path, config, "echo {range_arg} > out.txt")
+    (tmp_path / "README_SUBMIT").write_text("sbatch old.sh\n")
+    # the archive sink refuses a result cache once generation has started
+    result = CliRunner().invoke(main, ["template.txt", "config.yml", "--archive"])
+    assert isinstance(result.exception, ValueError)
+    assert (tmp_path / "README_SUBMIT").read_text() == "sbatch old.sh\n"
+    assert not (tmp_path / "README_SUBMIT.tmp").exists()
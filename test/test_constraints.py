@@ -0,0 +1,83 @@
+import pytest
+
+from jobsubmit.constraints import Predicate, PrunedSpace, get_predicates
+from jobsubmit.jobset import JobSet, build_param_space
+from jobsubmit.space import ParamSpace
+
+
+def test_predicate():
+    p = Predicate("stem(a) == stem(b)", ["a", "b", "c"])
+    assert p.names == {"a", "b"}
+    assert p({"a": "/x/s1.fastq", "b": "/y/s1.fa"})
+    assert not p({"a": "/x/s1.fastq", "b": "/y/s2.fa"})
+    assert not Predicate("c > 2", ["c"], exclude=True)({"c": 3})
+    with pytest.raises(ValueError):
+        Predicate("d > 2", ["c"])
+    with pytest.raises(ValueError):
+        Predicate("c >", ["c"])
+    predicates = get_predicates({"include": "c > 1", "exclude": ["c == 3"]}, ["c"])
+    assert [p.exclude for p in predicates] == [False, True]
+
+
+def test_pruned_space_prunes_early():
+    calls = []
+
+    class Counting(Predicate):
+        def __call__(self, args):
+            calls.append(dict(args))
+            return super().__call__(args)
+
+    space = ParamSpace(["a", "b"], [range(10), range(1000)])
+    pruned = PrunedSpace(space, [Counting("a == 3", ["a", "b"])])
+    tasks = list(pruned)
+    assert len(tasks) == 1000
+    assert all(t["a"] == 3 for t in tasks)
+    # checked once per value of a, not once per combination
+    assert len(calls) == 10
+    assert pruned.n_total == 10000
+    assert pruned.n_kept == 1000
+
+
+def test_jobset_zip_and_constraints(tmp_path):
+    for name in ("s1", "s2", "s3"):
+        (tmp_path / f"{name}.fastq").write_text("")
+        (tmp_path / f"{name}.fa").write_text("")
+    config = {
+        "custom_args": {
+            "sample": str(tmp_path / "*.fastq"),
+            "ref": str(tmp_path / "*.fa"),
+            "seed": "1-4",
+        },
+        "include": "stem(sample) == stem(ref)",
+        "exclude": "seed > 2 and stem(sample) == 's2'",
+    }
+    tasks = list(JobSet(config, "run {sample} {ref} {seed}").iter_tasks())
+    assert len(tasks) == 4 + 2 + 4
+    assert all(t["sample"][:-6] == t["ref"][:-3] for t in tasks)
+
+    config["zip"] = [["sample", "ref"]]
+    del config["include"]
+    tasks = list(JobSet(config, "run {sample} {ref} {seed}").iter_tasks())
+    assert len(tasks) == 10
+    assert tasks[0] == {
+        "sample": str(tmp_path / "s1.fastq"),
+        "ref": str(tmp_path / "s1.fa"),
+        "seed": 1,
+    }
+
+
+def test_build_param_space_zip_errors():
+    with pytest.raises(ValueError):
+        build_param_space({"a": "1-3", "b": "1-2"}, zip_groups=[["a", "b"]])
+    with pytest.raises(ValueError):
+        build_param_space({"a": "1-3"}, zip_groups=[["a", "c"]])
+    with pytest.raises(ValueError):
+        build_param_space({"a": "1-3", "b": "1-3"}, zip_groups=[["a"], ["a", "b"]])
+
+
+def test_jobset_row_constraints():
+    rows = [{"x": i} for i in range(5)]
+    jobset = JobSet({"include": "x % 2 == 0"}, "run {x}", rows, keys=["x"])
+    assert [t["x"] for t in jobset.iter_tasks()] == [0, 2, 4]
+    with pytest.raises(ValueError):
+        JobSet({"include": "x % 2 == 0"}, "run {x}", rows)
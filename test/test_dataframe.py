@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from jobsubmit.dataframe import get_table_format, iter_table_rows, read_table_columns
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"], "c": [0.5, 1.5, 2.5]})
+
+
+def test_get_table_format():
+    assert get_table_format("x.csv") == "csv"
+    assert get_table_format("x.tsv") == "csv"
+    assert get_table_format("x.parquet") == "parquet"
+    assert get_table_format("x.feather") == "feather"
+
+
+def test_iter_table_rows_csv(tmp_path, df):
+    path = str(tmp_path / "df.csv")
+    df.to_csv(path, index=False)
+    assert read_table_columns(path) == ["a", "b", "c"]
+    rows = list(iter_table_rows(path, chunksize=2))
+    assert rows == df.to_dict(orient="records")
+    rows = list(iter_table_rows(path, ["c", "a"], chunksize=2))
+    assert rows == df[["a", "c"]].to_dict(orient="records")
+    assert list(iter_table_rows(path, [])) == [{}, {}, {}]
+
+
+@pytest.mark.parametrize("ext", ["parquet", "feather"])
+def test_iter_table_rows_arrow(tmp_path, df, ext):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"df.{ext}")
+    getattr(df, f"to_{ext}")(path)
+    assert read_table_columns(path) == ["a", "b", "c"]
+    rows = list(iter_table_rows(path, ["a", "b"], chunksize=2))
+    assert rows == df[["a", "b"]].to_dict(orient="records")
+
+
+def test_iter_table_rows_python_engine(tmp_path):
+    path = str(tmp_path / "df.tsv")
+    with open(path, "w") as f:
+        f.write("a\tb\tc\n1\tx\t1.50\n\n2\t\t2.5\n")
+    assert read_table_columns(path, "python") == ["a", "b", "c"]
+    rows = list(iter_table_rows(path, ["c", "a"], engine="python"))
+    assert rows == [{"a": "1", "c": "1.50"}, {"a": "2", "c": "2.5"}]
+    rows = list(iter_table_rows(path, chunksize=1, engine="python"))
+    assert rows[1] == {"a": "2", "b": "", "c": "2.5"}
+    assert list(iter_table_rows(path, [], engine="python")) == [{}, {}]
+    with pytest.raises(ValueError):
+        list(iter_table_rows(path, engine="fast"))
+
+
+def test_iter_table_rows_csv_types_across_chunks(tmp_path):
+    path = tmp_path / "df.csv"
+    # each column gets a missing or odd value only after the first chunk
+    lines = ["n,flag,word"]
+    lines += [f"{i},True,{i}" for i in range(5)]
+    lines += [",,x"]
+    path.write_text("\n".join(lines) + "\n")
+    expected = pd.read_csv(path).to_dict(orient="records")
+    rows = list(iter_table_rows(str(path), chunksize=2, engine="pandas"))
+    assert [repr(row) for row in rows] == [repr(row) for row in expected]
+    assert rows[0] == {"n": 0.0, "flag": True, "word": "0"}
@@ -0,0 +1,105 @@
+import os
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from jobsubmit.cli import main
+from jobsubmit.defaults import (
+    DEFAULTS_ENV,
+    get_header_template,
+    load_defaults,
+    read_resource,
+)
+from test.test_cli import write_example
+
+
+def write_site_defaults(path):
+    site = {
+        "tasks_per_job": 4,
+        "slurm_args": {"mem": "8GB"},
+        "profiles": {"long": {"slurm_args": {"time": "48:00:00"}}},
+    }
+    with open(path, "w") as f:
+        yaml.safe_dump(site, f)
+
+
+def test_read_resource():
+    assert read_resource("job_header.txt").startswith("#!/bin/bash")
+    assert read_resource("job_header.txt") is read_resource("job_header.txt")
+
+
+def test_get_header_template():
+    header = get_header_template()
+    assert header is get_header_template()
+    assert "job_name" in header.placeholders
+
+
+def test_load_defaults(tmp_path, monkeypatch):
+    monkeypatch.delenv(DEFAULTS_ENV, raising=False)
+    defaults = load_defaults()
+    assert defaults["tasks_per_job"] == 1
+    defaults["tasks_per_job"] = 10
+    assert load_defaults()["tasks_per_job"] == 1
+
+    path = str(tmp_path / "site.yml")
+    write_site_defaults(path)
+    defaults = load_defaults(path)
+    assert defaults["tasks_per_job"] == 4
+    assert defaults["slurm_args"]["mem"] == "8GB"
+    assert defaults["slurm_args"]["time"] == "01:00:00"
+    assert "profiles" not in defaults
+    defaults = load_defaults(path, "long")
+    assert defaults["slurm_args"]["time"] == "48:00:00"
+    assert defaults["slurm_args"]["mem"] == "8GB"
+    with pytest.raises(ValueError):
+        load_defaults(path, "short")
+    with pytest.raises(ValueError):
+        load_defaults(None, "long")
+
+    monkeypatch.setenv(DEFAULTS_ENV, path)
+    assert load_defaults()["tasks_per_job"] == 4
+
+
+def test_main_header_and_profile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(DEFAULTS_ENV, raising=False)
+    write_example(
+        tmp_path,
+        {"run_dir": "runs", "profile": "long", "custom_args": {"range_arg": "1-2"}},
+    )
+    write_site_defaults(tmp_path / "site.yml")
+    with open("header.txt", "w") as f:
+        f.write("#!/bin/bash\n#SBATCH --job-name={job_name}\n#SBATCH --time={time}\n")
+    result = CliRunner().invoke(
+        main,
+        [
+            "template.txt",
+            "config.yml",
+            "--defaults",
+            "site.yml",
+            "--header-template",
+            "header.txt",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    with open(os.path.join("runs", "0", "test-0.sh")) as f:
+        script = f.read()
+    assert "#SBATCH --time=48:00:00\n" in script
+    assert "--mem" not in script
+    assert script.count("echo ") == 2
+
+    with open("header.txt", "w") as f:
+        f.write("#SBATCH --partition={partition}\n")
+    get_header_template.cache_clear()
+    result = CliRunner().invoke(
+        main,
+        [
+            "template.txt",
+            "config.yml",
+            "--defaults",
+            "site.yml",
+            "--header-template",
+            "header.txt",
+        ],
+    )
+    assert isinstance(result.exception, ValueError)
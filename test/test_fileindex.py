@@ -0,0 +1,85 @@
+import glob
+import os
+
+from jobsubmit.fileindex import FileIndex, has_magic
+
+
+def make_tree(base):
+    for path in [
+        "a/x1.txt",
+        "a/x2.txt",
+        "a/y.csv",
+        "a/.hidden.txt",
+        "a/sub/x3.txt",
+        "a/sub/deep/x4.txt",
+        "b/x5.txt",
+    ]:
+        path = os.path.join(base, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+
+
+def reference_glob(pattern):
+    return sorted(os.path.abspath(p) for p in glob.glob(pattern, recursive=True))
+
+
+def test_has_magic():
+    assert has_magic("*.txt")
+    assert has_magic("x?.txt")
+    assert has_magic("x[12].txt")
+    assert not has_magic("x.txt")
+
+
+def test_glob_matches_reference(tmp_path):
+    make_tree(tmp_path)
+    index = FileIndex()
+    for pattern in [
+        "a/*.txt",
+        "a/.*",
+        "*/x?.txt",
+        "a/x[2].txt",
+        "a/**/*.txt",
+        "**/x*.txt",
+        "a/sub/*",
+        "c/*.txt",
+    ]:
+        pattern = str(tmp_path / pattern)
+        assert index.glob(pattern) == reference_glob(pattern), pattern
+
+
+def test_glob_relative(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    assert FileIndex().glob("a/*.csv") == [str(tmp_path / "a/y.csv")]
+
+
+def test_listings_shared_and_cached(tmp_path):
+    make_tree(tmp_path)
+    cache_path = str(tmp_path / "cache" / "index.json")
+    index = FileIndex(cache_path)
+    index.glob(str(tmp_path / "a/*.txt"))
+    index.glob(str(tmp_path / "a/*.csv"))
+    assert index.n_scans == 1
+    index.save()
+
+    index = FileIndex(cache_path)
+    assert index.glob(str(tmp_path / "a/*.csv")) == [str(tmp_path / "a/y.csv")]
+    assert index.n_scans == 0
+
+    # a new file changes the directory mtime and invalidates its listing
+    open(tmp_path / "a/z.csv", "w").close()
+    os.utime(tmp_path / "a", ns=(0, os.stat(tmp_path / "a").st_mtime_ns + 10**9))
+    index = FileIndex(cache_path)
+    assert len(index.glob(str(tmp_path / "a/*.csv"))) == 2
+    assert index.n_scans == 1
+
+
+def test_listing_sees_new_files(tmp_path):
+    make_tree(tmp_path)
+    index = FileIndex()
+    pattern = str(tmp_path / "a/*.csv")
+    assert len(index.glob(pattern)) == 1
+    open(tmp_path / "a/z.csv", "w").close()
+    os.utime(tmp_path / "a", ns=(0, os.stat(tmp_path / "a").st_mtime_ns + 10**9))
+    assert len(index.glob(pattern)) == 2
+    assert index.n_scans == 2
@@ -0,0 +1,78 @@
+import os
+import subprocess
+from click.testing import CliRunner
+
+from jobsubmit.cli import SlurmJobConfig, generate_slurm_header, main
+from jobsubmit.job_array import (
+    PARAMS_SEP,
+    find_unexpanded_placeholders,
+    get_array_spec,
+    write_params_table,
+)
+from test.test_cli import write_example
+
+
+def test_get_array_spec():
+    assert get_array_spec(10) == "0-9"
+
+
+def test_generate_slurm_header_array():
+    config = SlurmJobConfig(array="0-9", throttle=3)
+    header = generate_slurm_header(config, "/runs")
+    assert "#SBATCH --output=/runs/test_%A_%a.out\n" in header
+    assert "#SBATCH --error=/runs/test_%A_%a.err\n" in header
+    assert header.endswith("#SBATCH --array=0-9%3\n\n\n")
+    assert "--array" not in generate_slurm_header(SlurmJobConfig(), "/runs")
+
+
+def test_write_params_table(tmp_path):
+    path = tmp_path / "params.txt"
+    rows = [{"a": 1, "b": ""}, {"a": 2, "b": "x y"}]
+    assert write_params_table(path, ["a", "b"], rows) == 2
+    lines = open(path).read().splitlines()
+    assert lines == ["a" + PARAMS_SEP + "b", "1" + PARAMS_SEP, "2" + PARAMS_SEP + "x y"]
+
+
+def test_main_array(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "tasks_per_job": 2,
+        "custom_args": {"a": "1-3", "b": "x"},
+    }
+    write_example(tmp_path, config, "echo {a}-{b} >> out.txt")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml", "--array"])
+    assert result.exit_code == 0, result.output
+    script = os.path.abspath("runs/test.sh")
+    assert open("README_SUBMIT").read() == f"sbatch {script}\n"
+    assert "#SBATCH --array=0-1\n" in open(script).read()
+    for i in range(2):
+        env = dict(os.environ, SLURM_ARRAY_TASK_ID=str(i))
+        subprocess.run(["bash", script], env=env, check=True)
+    assert open("runs/0/out.txt").read() == "1-x\n2-x\n"
+    assert open("runs/1/out.txt").read() == "3-x\n"
+
+
+def test_find_unexpanded_placeholders():
+    assert find_unexpanded_placeholders("echo 'val={a}' \"{b}\" # '{c}'") == ["a"]
+    assert find_unexpanded_placeholders("echo \"$(echo '{a}')\" $'{b}'") == ["a", "b"]
+    text = "cat <<'EOF'\n{a}\nEOF\ncat <<EOF\n{b}\nEOF\necho {c}"
+    assert find_unexpanded_placeholders(text) == ["a"]
+
+
+def test_main_array_single_quotes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"run_dir": "runs", "custom_args": {"a": "1-3"}}
+    write_example(tmp_path, config, "echo 'val={a}' >> out.txt")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml", "--array"])
+    assert result.exit_code != 0
+    assert "single quotes" in str(result.exception)
+
+
+def test_main_array_incremental(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path, template="echo {range_arg}")
+    args = ["template.txt", "config.yml", "--array", "--incremental"]
+    result = CliRunner().invoke(main, args)
+    assert isinstance(result.exception, ValueError)
+    assert not os.path.exists("runs")
@@ -0,0 +1,70 @@
+import io
+import os
+import pytest
+
+import jobsubmit
+from jobsubmit.jobset import FileSystemSink, JobSet, MemorySink, generate
+
+
+def test_generate_memory(tmp_path):
+    config = {"run_dir": str(tmp_path / "runs"), "tasks_per_job": 2}
+    rows = [{"seed": i} for i in range(5)]
+    sink = generate(config, "run {seed}", rows, sink=MemorySink(), keys=["seed"])
+    assert [job.num for job in sink.jobs] == [0, 1, 2]
+    assert sink.jobs[2].tasks == [{"seed": 4}]
+    assert sink.jobs[0].job_dir == str(tmp_path / "runs" / "0")
+    assert "#SBATCH --job-name=test-0\n" in sink.jobs[0].script
+    assert "run 0\n\nrun 1\n\n" in sink.jobs[0].script
+    # nothing is written by a memory sink
+    assert not os.path.exists(tmp_path / "runs")
+
+
+def test_jobset_repeat_and_custom_args(tmp_path):
+    config = {"run_dir": "runs", "repeat": 2, "custom_args": {"x": "1-2"}}
+    jobset = JobSet(config, "echo {x}")
+    assert list(jobset.iter_tasks()) == [{"x": 1}, {"x": 2}, {"x": 1}, {"x": 2}]
+    # a one-shot iterable is kept so it can be repeated
+    jobset = JobSet({"repeat": 2}, "echo {x}", iter([{"x": "a"}]))
+    assert list(jobset.iter_tasks()) == [{"x": "a"}, {"x": "a"}]
+    with pytest.raises(ValueError):
+        JobSet(config, "echo {y}")
+    with pytest.raises(ValueError):
+        JobSet(config, "echo {x}", [{"x": 1}])
+
+
+def test_jobset_filesystem(tmp_path):
+    config = {"run_dir": str(tmp_path / "runs"), "custom_args": {"x": "1-3"}}
+    sink = JobSet(config, "echo {x}").generate(workers=2)
+    assert isinstance(sink, FileSystemSink)
+    assert sink.n_jobs == 3
+    assert sink.submit_paths == [
+        str(tmp_path / "runs" / str(i) / f"test-{i}.sh") for i in range(3)
+    ]
+    assert all(os.path.isfile(path) for path in sink.submit_paths)
+
+
+def test_sink_submit_file(tmp_path):
+    config = {"run_dir": str(tmp_path / "runs"), "custom_args": {"x": "1-2"}}
+    submit_file = io.StringIO()
+    sink = JobSet(config, "echo {x}").generate(FileSystemSink(submit_file=submit_file))
+    assert sink.submit_paths == []
+    assert sink.n_submit == 2
+    assert submit_file.getvalue() == "".join(
+        f"sbatch {tmp_path}/runs/{i}/test-{i}.sh\n" for i in range(2)
+    )
+
+
+def test_jobset_glob_sees_new_files(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("")
+    config = {"run_dir": "runs", "custom_args": {"f": str(data / "*.txt")}}
+    assert len(list(JobSet(config, "cat {f}").iter_tasks())) == 1
+    (data / "b.txt").write_text("")
+    os.utime(data, ns=(0, os.stat(data).st_mtime_ns + 10**9))
+    assert len(list(JobSet(config, "cat {f}").iter_tasks())) == 2
+
+
+def test_package_exports():
+    assert jobsubmit.JobSet is JobSet
+    assert jobsubmit.generate is generate
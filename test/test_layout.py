@@ -0,0 +1,53 @@
+import os
+import subprocess
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import main
+from jobsubmit.layout import LAYOUTS, get_job_dir, get_job_dir_shell
+from test.test_cli import write_example
+
+
+def test_get_job_dir():
+    assert get_job_dir("/runs", 7) == "/runs/7"
+    assert get_job_dir("/runs", 1234, "sharded") == "/runs/00/12/1234"
+    assert get_job_dir("/runs", 1234567, "sharded") == "/runs/123/45/1234567"
+    assert get_job_dir("/runs", 7, "flat") == "/runs/jobs"
+    with pytest.raises(ValueError):
+        get_job_dir("/runs", 7, "deep")
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_get_job_dir_shell(layout):
+    for job_num in [0, 7, 1234, 98765]:
+        expr = get_job_dir_shell("/runs", "N", layout)
+        proc = subprocess.run(
+            ["bash", "-c", f"N={job_num}; echo {expr}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert proc.stdout.strip() == get_job_dir("/runs", job_num, layout)
+
+
+def test_main_layout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"run_dir": "runs", "layout": "sharded", "custom_args": {"a": "1-3"}}
+    write_example(tmp_path, config, "echo {a}")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    job_dir = os.path.abspath("runs/00/00/2")
+    script = open(f"{job_dir}/test-2.sh").read()
+    assert f"#SBATCH --output={job_dir}/test-2.out\n" in script
+    assert f"cd {job_dir}\n" in script
+
+    config["layout"] = "flat"
+    write_example(tmp_path, config, "echo {a}")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir("runs/jobs")) == ["test-0.sh", "test-1.sh", "test-2.sh"]
+
+    config["parallel"] = True
+    write_example(tmp_path, config, "echo {a}")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml"])
+    assert isinstance(result.exception, ValueError)
@@ -0,0 +1,58 @@
+import os
+from click.testing import CliRunner
+
+from jobsubmit.cli import main
+from jobsubmit.manifest import MANIFEST_NAME, JobManifest, ManifestWriter, hash_content
+from test.test_cli import write_example
+
+
+def test_manifest_save_load(tmp_path):
+    manifest = JobManifest()
+    manifest.add(0, "/runs/0/test-0.sh", hash_content("a"))
+    manifest.save(tmp_path)
+    loaded = JobManifest.load(tmp_path)
+    assert loaded.jobs == manifest.jobs
+    assert loaded.get_hash(0) == hash_content("a")
+    assert loaded.get_hash(1) is None
+    assert len(JobManifest.load(tmp_path / "missing")) == 0
+
+
+def test_manifest_writer(tmp_path):
+    manifest = JobManifest()
+    writer = ManifestWriter(str(tmp_path / "streamed.json"))
+    for i in range(3):
+        manifest.add(i, f"/runs/{i}/test-{i}.sh", hash_content(str(i)))
+        writer.add(i, f"/runs/{i}/test-{i}.sh", hash_content(str(i)))
+    assert not (tmp_path / "streamed.json").exists()
+    writer.close()
+    manifest.save(tmp_path)
+    saved = (tmp_path / MANIFEST_NAME).read_text()
+    assert (tmp_path / "streamed.json").read_text() == saved
+
+
+def test_main_incremental(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"run_dir": "runs", "custom_args": {"a": "1-3"}}
+    write_example(tmp_path, config, "echo {a}")
+    runner = CliRunner()
+    args = ["template.txt", "config.yml", "--incremental"]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert len(open("README_SUBMIT").readlines()) == 3
+    mtime = os.path.getmtime("runs/0/test-0.sh")
+
+    # nothing changed, nothing to resubmit
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert open("README_SUBMIT").read() == ""
+    assert os.path.getmtime("runs/0/test-0.sh") == mtime
+
+    # job 1 changes and job 2 no longer exists
+    config["custom_args"]["a"] = "1,4"
+    write_example(tmp_path, config, "echo {a}")
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    job_dir = os.path.abspath("runs/1")
+    assert open("README_SUBMIT").read() == f"sbatch {job_dir}/test-1.sh\n"
+    assert not os.path.exists("runs/2")
+    assert sorted(JobManifest.load("runs").jobs) == [0, 1]
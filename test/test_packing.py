@@ -0,0 +1,79 @@
+import os
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import cli
+from jobsubmit.packing import (
+    get_cost_function,
+    get_cost_names,
+    pack_bins,
+    pack_lpt,
+    pack_tasks,
+    parse_slurm_time,
+)
+
+
+def test_parse_slurm_time():
+    assert parse_slurm_time("30") == 30 * 60
+    assert parse_slurm_time("30:15") == 30 * 60 + 15
+    assert parse_slurm_time("01:00:00") == 3600
+    assert parse_slurm_time("2-00") == 2 * 86400
+    assert parse_slurm_time("1-02:03:04") == 86400 + 2 * 3600 + 3 * 60 + 4
+
+
+def test_get_cost_function(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("x" * 10)
+    args = {"t": "2.5", "f": str(path), "n": 3}
+    assert get_cost_function({"cost_column": "t"})(args) == 2.5
+    assert get_cost_function({"cost_file_size": "f"})(args) == 10
+    assert get_cost_function({"cost_expr": "size(f) * n"})(args) == 30
+    with pytest.raises(ValueError):
+        get_cost_function({})
+    assert get_cost_names({"cost_column": "t"}) == {"t"}
+    assert get_cost_names({"cost_expr": "size(f) * n"}) == {"f", "n"}
+    assert get_cost_names({}) == set()
+
+
+def test_pack_lpt():
+    costs = [10, 1, 1, 1, 9, 2]
+    jobs = pack_lpt(costs, 2)
+    loads = sorted(sum(costs[i] for i in job) for job in jobs)
+    assert loads == [12, 12]
+    assert sorted(i for job in jobs for i in job) == list(range(6))
+
+
+def test_pack_bins():
+    costs = [6, 5, 4, 3, 2, 12]
+    jobs = pack_bins(costs, 10)
+    assert all(sum(costs[i] for i in job) <= 10 for job in jobs if len(job) > 1)
+    assert len(jobs) == 3
+    assert [5] in jobs
+
+
+def test_pack_tasks():
+    tasks = [{"t": t} for t in [8, 1, 1, 1, 1, 4]]
+    assert pack_tasks(tasks, {}, 4, "01:00") == [tasks[:4], tasks[4:]]
+    jobs = pack_tasks(tasks, {"strategy": "lpt", "cost_column": "t"}, 3, "01:00")
+    assert [sum(t["t"] for t in job) for job in jobs] == [8, 8]
+    packing = {"strategy": "binpack", "cost_column": "t", "cost_scale": 60}
+    jobs = pack_tasks(tasks, packing, 1, "00:08:00")
+    assert [sum(t["t"] for t in job) for job in jobs] == [8, 8]
+
+
+def test_pack_dataframe_cost_column(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "df.csv").write_text("name,cost\na,8\nb,1\nc,1\nd,6\n")
+    (tmp_path / "template.txt").write_text("run {name}")
+    (tmp_path / "config.yml").write_text(
+        "run_dir: runs\ntasks_per_job: 2\n"
+        "packing:\n  strategy: lpt\n  cost_column: cost\n"
+    )
+    args = ["template.txt", "config.yml", "--dataframe", "df.csv"]
+    for engine in ("python", "pandas"):
+        result = CliRunner().invoke(cli, args + ["--csv-engine", engine])
+        assert result.exit_code == 0, result.output
+        jobs = [open(f"runs/{i}/test-{i}.sh").read() for i in range(2)]
+        # the cost column is not in the template but still balances the jobs
+        assert ["run a" in job and "run d" in job for job in jobs] == [False] * 2
+        assert not os.path.exists("runs/2")
@@ -0,0 +1,107 @@
+import os
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import cli
+from jobsubmit.dataframe import count_table_rows
+from jobsubmit.jobset import FileSystemSink, JobSet
+from jobsubmit.plan import count_dirs, get_limits, plan_jobset, total_plan
+from test.test_cli import write_example
+
+
+def test_plan_matches_generate(tmp_path):
+    config = {
+        "run_dir": str(tmp_path / "runs"),
+        "tasks_per_job": 3,
+        "repeat": 2,
+        "layout": "sharded",
+        "custom_args": {"a": "1-10", "b": "7,9"},
+        "slurm_args": {"time": "02:30:00", "nodes": 2, "ntasks_per_node": 4},
+    }
+    jobset = JobSet(config, "run {a} {b}")
+    plan = plan_jobset(jobset)
+    assert not os.path.exists(config["run_dir"])
+    assert (plan.n_tasks, plan.exact, plan.n_jobs) == (40, True, 14)
+    assert plan.core_hours == pytest.approx(2.5 * 8 * 14)
+
+    sink = jobset.generate(FileSystemSink())
+    paths = []
+    for root, dirs, files in os.walk(config["run_dir"]):
+        paths += [os.path.join(root, d) for d in dirs] + files
+    assert sink.n_jobs == plan.n_jobs
+    # the run directory and its contents
+    assert plan.n_dirs + plan.n_files == len(paths) + 1
+    script = os.path.join(config["run_dir"], "00", "00", "0", "test-0.sh")
+    assert plan.n_bytes == os.path.getsize(script) * plan.n_jobs
+
+
+def test_plan_bounds_and_shards():
+    config = {"tasks_per_job": 2, "custom_args": {"a": "1-10"}, "include": "a > 5"}
+    plan = plan_jobset(JobSet(config, "run {a}"))
+    assert (plan.n_tasks, plan.exact) == (10, False)
+
+    with pytest.raises(ValueError):
+        plan_jobset(JobSet({}, "run {a}", lambda: [], ["a"]))
+    plan = plan_jobset(JobSet({}, "run {a}", lambda: [], ["a"]), n_rows=7)
+    assert plan.n_jobs == 7
+
+    config = {"custom_args": {"a": "1-10"}}
+    n_jobs = [
+        plan_jobset(JobSet(config, "run {a}", shard=(k, 3))).n_jobs for k in range(3)
+    ]
+    assert n_jobs == [4, 3, 3]
+
+
+def test_plan_limits():
+    config = {
+        "custom_args": {"a": "1-10"},
+        "limits": {"max_array_size": 5, "max_jobs": 8, "max_inodes": 100},
+    }
+    limits = get_limits(config, scontrol="no-such-scontrol")
+    assert limits == config["limits"]
+    jobset = JobSet(config, "run {a}")
+    assert len(plan_jobset(jobset, "files", limits).warnings) == 1
+    assert len(plan_jobset(jobset, "archive", limits).warnings) == 1
+    plans = [plan_jobset(jobset, "files", limits) for _ in range(5)]
+    total = total_plan(plans, limits)
+    assert total.n_jobs == 50
+    assert len(total.warnings) == 2
+    with pytest.raises(ValueError):
+        get_limits({"limits": {"max_nodes": 1}})
+
+
+def test_count_dirs():
+    assert count_dirs(0, "nested") == 0
+    assert count_dirs(5, "flat") == 1
+    assert count_dirs(250, "sharded") == 250 + 3 + 1
+
+
+def test_count_table_rows(tmp_path):
+    path = tmp_path / "df.csv"
+    path.write_text('a,b\n1,"x\ny"\n\n2,z\n')
+    assert count_table_rows(str(path)) == 2
+
+
+def test_plan_cli_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path, {"run_dir": "runs", "custom_args": {"range_arg": "1-9"}})
+    before = sorted(os.listdir(tmp_path))
+    result = CliRunner().invoke(
+        cli, ["template.txt", "config.yml", "--plan", "--profile"]
+    )
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(tmp_path)) == before
+
+
+def test_plan_with_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "custom_args": {"range_arg": "1-9"},
+        "cache": {"dir": "cache", "outputs": ["{range_arg}.out"]},
+    }
+    write_example(tmp_path, config)
+    before = sorted(os.listdir(tmp_path))
+    result = CliRunner().invoke(cli, ["template.txt", "config.yml", "--plan"])
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(tmp_path)) == before
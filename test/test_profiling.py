@@ -0,0 +1,44 @@
+import json
+import os
+from click.testing import CliRunner
+
+from jobsubmit.cli import main
+from jobsubmit.profiling import METRICS_NAME, NullTimer, PhaseTimer
+from test.test_cli import write_example
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    with timer.phase("render", 1):
+        pass
+    with timer.phase("render", 1):
+        pass
+    assert list(timer.wrap_iter("tasks", range(5))) == [0, 1, 2, 3, 4]
+    data = timer.to_dict()
+    assert data["phases"]["render"]["count"] == 2
+    assert data["phases"]["tasks"]["count"] == 5
+    assert data["total_seconds"] >= data["phases"]["render"]["seconds"]
+
+
+def test_null_timer():
+    timer = NullTimer()
+    with timer.phase("render", 1):
+        pass
+    assert list(timer.wrap_iter("tasks", range(3))) == [0, 1, 2]
+    assert timer.to_dict()["phases"] == {}
+
+
+def test_main_profile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path)
+    result = CliRunner().invoke(
+        main, ["template.txt", "config.yml", "--profile-out", "gen.prof"]
+    )
+    assert result.exit_code == 0, result.output
+    with open(os.path.join("runs", METRICS_NAME)) as f:
+        metrics = json.load(f)
+    assert metrics["jobs"] == 3
+    assert metrics["phases"]["tasks"]["count"] == 6
+    assert metrics["phases"]["render"]["count"] == 3
+    assert metrics["phases"]["write"]["count"] == 3
+    assert os.path.isfile("gen.prof")
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import SlurmJobConfig, main
+from jobsubmit.runner import TASK_STATUS_NAME, ParallelConfig, get_parallel_config
+from test.test_cli import write_example
+
+
+def test_get_parallel_config():
+    config = SlurmJobConfig(nodes=2, ntasks_per_node=8)
+    assert get_parallel_config(False, config) is None
+    assert get_parallel_config(True, config) == ParallelConfig(8, "local")
+    assert get_parallel_config(3, config) == ParallelConfig(3, "local")
+    assert get_parallel_config({"launcher": "srun"}, config) == ParallelConfig(
+        16, "srun"
+    )
+    with pytest.raises(ValueError):
+        get_parallel_config({"launcher": "mpirun"}, config)
+
+
+def test_main_parallel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "tasks_per_job": 4,
+        "parallel": 2,
+        "custom_args": {"a": "1-4"},
+    }
+    write_example(
+        tmp_path,
+        config,
+        "cd sub_{a} 2>/dev/null\necho {a} > out_{a}\nexit $(( {a} == 3 ))",
+    )
+    result = CliRunner().invoke(main, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    job_dir = os.path.abspath("runs/0")
+    proc = subprocess.run(["bash", f"{job_dir}/test-0.sh"], cwd=tmp_path)
+    assert proc.returncode != 0
+    for a in range(1, 5):
+        assert open(f"{job_dir}/out_{a}").read() == f"{a}\n"
+    status = [line.split("\t") for line in open(f"{job_dir}/{TASK_STATUS_NAME}")]
+    assert sorted((s[0], s[1]) for s in status) == [
+        ("0", "0"),
+        ("1", "0"),
+        ("2", "1"),
+        ("3", "0"),
+    ]
+    assert all(float(s[3]) >= float(s[2]) for s in status)
+
+
+def test_main_parallel_srun_header(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # a stand-in srun that runs the job step command on this machine
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "bin" / "srun").write_text('#!/bin/bash\nshift 3\nexec "$@"\n')
+    os.chmod(tmp_path / "bin" / "srun", 0o755)
+    config = {
+        "run_dir": "runs",
+        "tasks_per_job": 2,
+        "parallel": {"launcher": "srun"},
+        "custom_args": {"a": "1-2"},
+    }
+    write_example(tmp_path, config, "echo {a} threads=$NT > out_{a}")
+    (tmp_path / "header.txt").write_text("NT=8\n")
+    args = ["template.txt", "config.yml", "--extra-header-cmds", "header.txt"]
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 0, result.output
+    job_dir = os.path.abspath("runs/0")
+    env = dict(os.environ, PATH=f"{tmp_path}/bin:{os.environ['PATH']}")
+    subprocess.run(["bash", f"{job_dir}/test-0.sh"], env=env, check=True)
+    for a in (1, 2):
+        assert open(f"{job_dir}/out_{a}").read() == f"{a} threads=8\n"
@@ -0,0 +1,64 @@
+import json
+import os
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import cli
+from jobsubmit.shards import SHARD_DIR_NAME, is_shard_job, parse_shard
+from test.test_cli import write_example
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    assert parse_shard("3/4") == (3, 4)
+    for value in ("4/4", "1", "a/b", "-1/4", "0/0"):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+    assert [i for i in range(10) if is_shard_job(i, (1, 4))] == [1, 5, 9]
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_shard_and_merge(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(
+        tmp_path,
+        {"run_dir": "runs", "tasks_per_job": 2, "custom_args": {"range_arg": "1-9"}},
+    )
+    runner = CliRunner()
+    result = runner.invoke(cli, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    expected_list = read("README_SUBMIT")
+    expected_manifest = read("runs/manifest.json")
+    expected_script = read("runs/3/test-3.sh")
+    os.remove("README_SUBMIT")
+    os.rename("runs", "runs-full")
+
+    for k in range(3):
+        args = ["template.txt", "config.yml", "--shard", f"{k}/3"]
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+    assert not os.path.exists("README_SUBMIT")
+    assert sorted(os.listdir("runs")) == ["0", "1", "2", "3", "4", SHARD_DIR_NAME]
+    with open(f"runs/{SHARD_DIR_NAME}/1-of-3.json") as f:
+        assert sorted(json.load(f)["jobs"]) == ["1", "4"]
+
+    result = runner.invoke(cli, ["merge", "runs"])
+    assert result.exit_code == 0, result.output
+    assert read("README_SUBMIT") == expected_list
+    assert read("runs/manifest.json") == expected_manifest
+    assert read("runs/3/test-3.sh") == expected_script
+    assert not os.path.exists(f"runs/{SHARD_DIR_NAME}")
+
+
+def test_merge_missing_shard(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_example(tmp_path)
+    runner = CliRunner()
+    runner.invoke(cli, ["template.txt", "config.yml", "--shard", "0/2"])
+    result = runner.invoke(cli, ["merge", "runs"])
+    assert result.exit_code != 0
+    assert "missing shards 1/2" in result.output
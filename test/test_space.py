@@ -0,0 +1,77 @@
+import itertools
+import pytest
+
+from jobsubmit.space import IntRanges, ParamSpace, ZippedAxis, parse_int_ranges
+
+
+def reference_parse(arg):
+    numbers = set()
+    for r in arg.split(","):
+        if "-" in r:
+            start, end = map(int, r.split("-"))
+            numbers.update(range(start, end + 1))
+        else:
+            numbers.add(int(r))
+    return sorted(numbers)
+
+
+def test_parse_int_ranges():
+    for arg in ["1-3", "1-3,5,7-10", "7-10,1-3", "1-5,3-8", "5,5,1", "3-1,2"]:
+        assert list(parse_int_ranges(arg)) == reference_parse(arg), arg
+    assert isinstance(parse_int_ranges("1-1000000"), IntRanges)
+    assert list(parse_int_ranges("1-10:3")) == [1, 4, 7, 10]
+    assert list(parse_int_ranges("0-20:10,5")) == [0, 5, 10, 20]
+    with pytest.raises(ValueError):
+        parse_int_ranges("1-10:0")
+
+
+def test_int_ranges():
+    r = parse_int_ranges("1-1000000:10,2000000-2000002")
+    assert len(r) == 100003
+    assert r[0] == 1
+    assert r[99999] == 999991
+    assert r[100000] == 2000000
+    assert r[-1] == 2000002
+    assert r[1:3] == [11, 21]
+    assert 2000001 in r
+    assert 12 not in r
+    with pytest.raises(IndexError):
+        r[100003]
+
+
+def test_param_space():
+    keys = ["a", "b", "c"]
+    axes = [parse_int_ranges("1-3"), ["x", "y"], parse_int_ranges("10-13")]
+    space = ParamSpace(keys, axes)
+    expected = [dict(zip(keys, item)) for item in itertools.product(*axes)]
+    assert len(space) == len(expected)
+    assert list(space) == expected
+    assert [space[i] for i in range(len(space))] == expected
+    assert space[-1] == expected[-1]
+    assert space[5:12:3] == expected[5:12:3]
+    assert list(ParamSpace([], [])) == [{}]
+    assert list(ParamSpace(["a", "b"], [[1], []])) == []
+
+
+def test_param_space_large():
+    space = ParamSpace(["a", "b"], [parse_int_ranges("1-1000000"), ["x", "y"]])
+    assert len(space) == 2000000
+    assert space[1999999] == {"a": 1000000, "b": "y"}
+
+
+def test_zipped_param_space():
+    axis = ZippedAxis([["a", "b", "c"], parse_int_ranges("1-3")])
+    assert len(axis) == 3
+    assert axis[1] == ("b", 2)
+    space = ParamSpace([("f", "n"), "seed"], [axis, [0, 1]])
+    assert space.names == ["f", "n", "seed"]
+    assert len(space) == 6
+    tasks = list(space)
+    assert tasks[:3] == [
+        {"f": "a", "n": 1, "seed": 0},
+        {"f": "a", "n": 1, "seed": 1},
+        {"f": "b", "n": 2, "seed": 0},
+    ]
+    assert [space[i] for i in range(len(space))] == tasks
+    with pytest.raises(ValueError):
+        ZippedAxis([[1, 2], [1]])
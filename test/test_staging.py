@@ -0,0 +1,94 @@
+import os
+import subprocess
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import main
+from jobsubmit.jobset import ArraySink, FileSystemSink, JobSet
+from jobsubmit.staging import get_stage_config, get_stage_outputs, get_staged_args
+from test.test_cli import write_example
+
+
+def test_get_stage_config():
+    assert get_stage_config(None) is None
+    custom_args = {"sample": "data/*.txt", "seed": "1-3"}
+    stage = get_stage_config(True, custom_args)
+    assert stage.inputs == ["sample"]
+    assert stage.outputs == []
+    stage = get_stage_config({"inputs": "ref", "outputs": "{seed}.out"})
+    assert stage.inputs == ["ref"]
+    with pytest.raises(ValueError):
+        get_stage_config(True, {"seed": "1-3"})
+    for output in ("../x", "", "."):
+        with pytest.raises(ValueError):
+            get_stage_config({"inputs": ["ref"], "outputs": [output]})
+
+
+def test_get_staged_args():
+    stage = get_stage_config({"inputs": ["a", "b", "c"]})
+    args, paths = get_staged_args(stage, {"a": "/data/x.txt", "b": "rel", "d": 1})
+    assert args == {"a": "$JS_STAGE/in/data/x.txt", "b": "rel", "d": 1}
+    assert paths == ["/data/x.txt"]
+
+
+def make_jobset(tmp_path, stage):
+    config = {
+        "run_dir": str(tmp_path / "runs"),
+        "tasks_per_job": 4,
+        "custom_args": {
+            "sample": str(tmp_path / "data" / "s*.txt"),
+            "ref": str(tmp_path / "data" / "*.fa"),
+        },
+        "stage": stage,
+    }
+    return JobSet(config, "cat {sample} {ref} >> all.out; echo $PWD > pwd.txt")
+
+
+def test_stage_job(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "tmp").mkdir()
+    for i in range(3):
+        (tmp_path / "data" / f"s{i}.txt").write_text(f"{i}\n")
+    (tmp_path / "data" / "ref.fa").write_text("ref\n")
+    stage = {"outputs": ["all.out"], "tmpdir": str(tmp_path / "tmp")}
+    jobset = make_jobset(tmp_path, stage)
+    sink = jobset.generate(FileSystemSink())
+    with open(sink.submit_paths[0]) as f:
+        script = f.read()
+    # the shared reference is staged once
+    assert script.count("data/ref.fa\n") == 1
+    subprocess.run(["bash", sink.submit_paths[0]], check=True)
+    job_dir = tmp_path / "runs" / "0"
+    assert (job_dir / "all.out").read_text() == "0\nref\n1\nref\n2\nref\n"
+    # pwd.txt is not a declared output and stays in the removed work dir
+    assert not (job_dir / "pwd.txt").exists()
+    assert os.listdir(tmp_path / "tmp") == []
+
+    with pytest.raises(ValueError):
+        jobset.generate(ArraySink())
+
+
+def test_stage_outputs_inside_job_dir():
+    stage = get_stage_config({"inputs": ["f"], "outputs": ["{o}"]})
+    assert get_stage_outputs(stage, {"o": "a.txt"}) == ["a.txt"]
+    for value in ("", ".", "../x"):
+        with pytest.raises(ValueError):
+            get_stage_outputs(stage, {"o": value})
+
+
+def test_dataframe_stage_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "df.csv").write_text(f"a,out,f\n1,one.txt,{tmp_path}/in.txt\n")
+    stage = {"inputs": ["f"], "outputs": ["{out}"]}
+    write_example(tmp_path, {"run_dir": "runs", "stage": stage}, "echo {a}")
+    args = ["template.txt", "config.yml", "--dataframe", "df.csv"]
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 0, result.output
+    script = (tmp_path / "runs" / "0" / "test-0.sh").read_text()
+    assert "    for out in one.txt; do\n" in script
+    assert f"{tmp_path}/in.txt\n".lstrip("/") in script
+
+    stage["inputs"] = ["g"]
+    write_example(tmp_path, {"run_dir": "runs", "stage": stage}, "echo {a}")
+    result = CliRunner().invoke(main, args)
+    assert isinstance(result.exception, ValueError)
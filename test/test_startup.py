@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+# import time budget of jobsubmit.cli, generous so slow CI machines pass
+IMPORT_BUDGET_US = int(os.environ.get("JOBSUBMIT_IMPORT_BUDGET_MS", 500)) * 1000
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "yaml")
+
+
+def get_import_times(module):
+    """
+    Returns the cumulative import time in microseconds of every module
+    imported by `import module`, from python -X importtime.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_is_light():
+    times = get_import_times("jobsubmit.cli")
+    heavy = [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+    assert heavy == []
+    assert times["jobsubmit.cli"] < IMPORT_BUDGET_US
@@ -0,0 +1,137 @@
+import os
+import stat
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import cli
+from jobsubmit.submit import (
+    SubmitConfig,
+    Submitter,
+    load_submitted,
+    read_job_list,
+    save_submitted,
+    submit_jobs,
+)
+
+# fails once with a busy controller for scripts whose name contains "busy",
+# rejects scripts whose name contains "bad", otherwise prints the next job id
+FAKE_SBATCH = """#!/bin/bash
+state={state}
+script="${{@: -1}}"
+echo "$@" >> $state/calls
+if [[ "$script" == *bad* ]]; then
+    echo "sbatch: error: Batch job submission failed: Invalid partition" >&2
+    exit 1
+fi
+if [[ "$script" == *busy* && ! -e $state/busy_seen ]]; then
+    touch $state/busy_seen
+    echo "sbatch: error: Socket timed out on send/recv operation" >&2
+    exit 1
+fi
+exec 9> $state/lock
+flock 9
+n=$(( $(cat $state/next 2>/dev/null || echo 100) + 1 ))
+echo $n > $state/next
+echo "$n;cluster"
+"""
+
+FAKE_SQUEUE = """#!/bin/bash
+seq {n_queued}
+"""
+
+
+def write_executable(path, content):
+    path.write_text(content)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def make_jobs(tmp_path, names):
+    lines = []
+    for name in names:
+        script = tmp_path / f"{name}.sh"
+        script.write_text(f"echo {name}\n")
+        lines.append(f"sbatch {script}\n")
+    (tmp_path / "README_SUBMIT").write_text("".join(lines))
+    return str(tmp_path / "README_SUBMIT")
+
+
+def make_config(tmp_path, **kwargs):
+    sbatch = write_executable(
+        tmp_path / "sbatch", FAKE_SBATCH.format(state=str(tmp_path))
+    )
+    return SubmitConfig(sbatch=sbatch, backoff=0, **kwargs)
+
+
+def test_read_job_list(tmp_path):
+    job_list = make_jobs(tmp_path, ["a", "b"])
+    with open(job_list, "a") as f:
+        f.write("\n# comment\n")
+    assert read_job_list(job_list) == [
+        f"sbatch {tmp_path}/a.sh",
+        f"sbatch {tmp_path}/b.sh",
+    ]
+
+
+def test_submit_jobs(tmp_path):
+    job_list = make_jobs(tmp_path, ["a", "busy", "bad", "c"])
+    run_dir = str(tmp_path / "runs")
+    config = make_config(tmp_path, concurrency=2, retries=2)
+    submitted, errors = submit_jobs(job_list, run_dir, config)
+    assert len(errors) == 1 and "Invalid partition" in errors[0]
+    assert sorted(v["job_id"] for v in submitted.values()) == ["101", "102", "103"]
+    assert f"sbatch {tmp_path}/bad.sh" not in submitted
+    assert load_submitted(run_dir) == submitted
+
+    # only the failed job and the regenerated job are submitted again
+    (tmp_path / "c.sh").write_text("echo changed\n")
+    os.remove(tmp_path / "calls")
+    submit_jobs(job_list, run_dir, config)
+    calls = sorted(open(tmp_path / "calls").read().split("\n")[:-1])
+    assert calls == [f"--parsable {tmp_path}/bad.sh", f"--parsable {tmp_path}/c.sh"]
+
+
+def test_max_queued(tmp_path):
+    squeue = write_executable(tmp_path / "squeue", FAKE_SQUEUE.format(n_queued=3))
+    config = make_config(tmp_path, squeue=squeue, max_queued=5)
+    submitter = Submitter(config)
+    assert submitter.count_queued() == 3
+    submitter._acquire_queue_slot()
+    submitter._acquire_queue_slot()
+    assert submitter._queued == 5
+
+
+def test_cli_submit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    make_jobs(tmp_path, ["a", "b"])
+    sbatch = make_config(tmp_path).sbatch
+    result = CliRunner().invoke(cli, ["submit", "--sbatch", sbatch])
+    assert result.exit_code == 0, result.output
+    assert len(load_submitted("runs")) == 2
+
+
+def test_submit_interrupted(tmp_path):
+    job_list = make_jobs(tmp_path, ["a", "b", "c", "d", "e", "f"])
+    run_dir = str(tmp_path / "runs")
+    submitter = Submitter(make_config(tmp_path, concurrency=1))
+    submitted = {}
+    saved = []
+
+    def interrupt():
+        saved.append(dict(submitted))
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        submitter.submit_all(read_job_list(job_list), submitted, interrupt)
+    # the first job was saved, the one running at the interrupt is recorded
+    # and the queued ones were never submitted
+    assert len(saved) == 1 and len(saved[0]) == 1
+    calls = open(tmp_path / "calls").read().splitlines()
+    assert len(submitted) == len(calls) < 6
+
+    os.remove(tmp_path / "calls")
+    os.makedirs(run_dir)
+    save_submitted(run_dir, submitted)
+    submit_jobs(job_list, run_dir, make_config(tmp_path))
+    calls += open(tmp_path / "calls").read().splitlines()
+    assert sorted(calls) == sorted(set(calls)) and len(calls) == 6
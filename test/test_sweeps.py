@@ -0,0 +1,91 @@
+import os
+import pytest
+from click.testing import CliRunner
+
+from jobsubmit.cli import main
+from jobsubmit.sweeps import expand_sweeps, is_multi_sweep
+from test.test_cli import write_example
+
+
+def test_expand_sweeps():
+    assert not is_multi_sweep({"run_dir": "runs"})
+    config = {
+        "run_dir": "out",
+        "slurm_args": {"time": "02:00:00"},
+        "custom_args": {"seed": "1-3"},
+        "sweeps": [
+            {"name": "a", "custom_args": {"x": "1,2"}},
+            {"slurm_args": {"mem": "8GB"}, "run_dir": "other"},
+        ],
+    }
+    assert is_multi_sweep(config)
+    a, b = expand_sweeps(config)
+    assert a["run_dir"] == os.path.join("out", "a")
+    assert a["custom_args"] == {"x": "1,2", "seed": "1-3"}
+    assert a["slurm_args"] == {"time": "02:00:00"}
+    assert b["name"] == "sweep-1"
+    assert b["run_dir"] == "other"
+    assert b["slurm_args"] == {"time": "02:00:00", "mem": "8GB"}
+    # the base is not modified
+    assert config["custom_args"] == {"seed": "1-3"}
+
+    assert [c["name"] for c in expand_sweeps([{}, {}])] == ["sweep-0", "sweep-1"]
+    with pytest.raises(ValueError):
+        expand_sweeps([{"name": "a"}, {"name": "a"}])
+    with pytest.raises(ValueError):
+        expand_sweeps({"sweeps": [{"run_dir": "x"}, {"run_dir": "x/"}]})
+    with pytest.raises(ValueError):
+        expand_sweeps({"sweeps": []})
+
+
+@pytest.mark.parametrize("sweep_workers", ["1", "4"])
+def test_main_sweeps(tmp_path, monkeypatch, sweep_workers):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "custom_args": {"range_arg": "1-2"},
+        "sweeps": [
+            {"name": "short"},
+            {
+                "name": "long",
+                "template": "long.txt",
+                "slurm_args": {"time": "10:00:00"},
+            },
+        ],
+    }
+    write_example(tmp_path, config)
+    with open("long.txt", "w") as f:
+        f.write("long {range_arg}")
+    result = CliRunner().invoke(
+        main, ["template.txt", "config.yml", "--sweep-workers", sweep_workers]
+    )
+    assert result.exit_code == 0, result.output
+    with open("README_SUBMIT") as f:
+        lines = f.read().splitlines()
+    assert lines == [
+        f"sbatch {tmp_path}/runs/{name}/{i}/test-{i}.sh"
+        for name in ("short", "long")
+        for i in range(2)
+    ]
+    with open("runs/long/1/test-1.sh") as f:
+        script = f.read()
+    assert "#SBATCH --time=10:00:00\n" in script
+    assert "long 2\n" in script
+    with open("runs/short/1/test-1.sh") as f:
+        assert "echo 2\n" in f.read()
+
+
+def test_main_one_sweep_template(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "custom_args": {"range_arg": "1"},
+        "sweeps": [{"name": "only", "template": "other.txt"}],
+    }
+    write_example(tmp_path, config)
+    with open("other.txt", "w") as f:
+        f.write("other {range_arg}")
+    result = CliRunner().invoke(main, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    with open("runs/only/0/test-0.sh") as f:
+        assert "other 1\n" in f.read()
@@ -0,0 +1,42 @@
+import re
+import pytest
+from jobsubmit.template import Template, compile_template
+
+
+def regex_render(template_str, custom_args):
+    return re.sub(
+        r"\{(\w+)\}", lambda m: str(custom_args.get(m.group(1), "")), template_str
+    )
+
+
+def test_render_matches_regex():
+    templates = [
+        "",
+        "no placeholders",
+        "{a}",
+        "{a}{b}{a}",
+        "echo {a} > {b}.out\n{{a}} {not valid} {a-b} ${HOME}",
+    ]
+    args = {"a": 1, "b": "x y", "HOME": 2.5}
+    for text in templates:
+        assert Template(text).render(args) == regex_render(text, args)
+        assert Template(text).render({}) == regex_render(text, {})
+
+
+def test_render_many():
+    template = Template("run {a} {b}")
+    rows = [{"a": 1, "b": 2}, {"a": 3, "b": 4}]
+    assert list(template.render_many(rows)) == ["run 1 2", "run 3 4"]
+
+
+def test_placeholders_and_check():
+    template = Template("{a} {b} {a}")
+    assert template.placeholders == ("a", "b")
+    assert template.missing(["a"]) == ["b"]
+    Template("{a} {b}", keys=["a", "b", "c"])
+    with pytest.raises(ValueError):
+        Template("{a} {b}", keys=["a"])
+
+
+def test_compile_template_cached():
+    assert compile_template("{a}") is compile_template("{a}")
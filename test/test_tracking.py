@@ -0,0 +1,106 @@
+import os
+import subprocess
+from click.testing import CliRunner
+
+from jobsubmit.cli import cli
+from jobsubmit.tracking import (
+    TASK_ID_KEY,
+    get_resume_dir,
+    get_task_id,
+    iter_tracked_tasks,
+    read_completed,
+)
+from test.test_cli import write_example
+
+
+def test_get_task_id():
+    assert get_task_id({"a": 1, "b": "x"}) == get_task_id({"b": "x", "a": 1})
+    assert get_task_id({"a": 1}) != get_task_id({"a": 2})
+    assert get_task_id({"a": 1}, 2) == get_task_id({"a": 1}) + ".2"
+
+
+def test_iter_tracked_tasks():
+    tasks = list(iter_tracked_tasks(lambda: iter([{"a": 1}, {"a": 2}]), 2))
+    assert [t["a"] for t in tasks] == [1, 2, 1, 2]
+    assert len(set(t[TASK_ID_KEY] for t in tasks)) == 4
+    completed = {tasks[0][TASK_ID_KEY], tasks[3][TASK_ID_KEY]}
+    left = list(iter_tracked_tasks(lambda: iter([{"a": 1}, {"a": 2}]), 2, completed))
+    assert left == tasks[1:3]
+
+
+def test_get_resume_dir(tmp_path):
+    assert get_resume_dir(str(tmp_path)) == str(tmp_path / "resume-1")
+    os.mkdir(tmp_path / "resume-1")
+    assert get_resume_dir(str(tmp_path)) == str(tmp_path / "resume-2")
+
+
+def run_jobs(readme="README_SUBMIT"):
+    for line in open(readme).read().splitlines():
+        subprocess.run(["bash", line.split()[1]])
+
+
+def test_resume(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "tasks_per_job": 2,
+        "track": True,
+        "custom_args": {"a": "1-5"},
+    }
+    # tasks 2 and 4 fail until the file "fixed" exists
+    template = "echo {a} >> {JOBSUBMIT_TASK_ID}\n[ {a} -ne 2 -a {a} -ne 4 ] || [ -e ../../fixed ]"
+    write_example(tmp_path, config, template)
+    runner = CliRunner()
+    result = runner.invoke(cli, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    run_jobs()
+    assert len(read_completed("runs")) == 3
+
+    result = runner.invoke(cli, ["resume", "template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    lines = open("README_SUBMIT").read().splitlines()
+    assert len(lines) == 1
+    assert "/runs/resume-1/0/" in lines[0]
+    # resumed jobs run two levels deeper, in runs/resume-1/<i>
+    open("runs/fixed", "w").close()
+    run_jobs()
+    assert len(read_completed("runs")) == 5
+
+    result = runner.invoke(cli, ["resume", "template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    assert open("README_SUBMIT").read() == ""
+
+
+def test_track_parallel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "run_dir": "runs",
+        "tasks_per_job": 3,
+        "track": True,
+        "parallel": 2,
+        "custom_args": {"a": "1-3"},
+    }
+    write_example(tmp_path, config, "exit $(( {a} == 2 ))")
+    result = CliRunner().invoke(cli, ["template.txt", "config.yml"])
+    assert result.exit_code == 0, result.output
+    run_jobs()
+    assert len(read_completed("runs")) == 2
+
+
+def test_resume_dataframe(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"run_dir": "runs", "tasks_per_job": 2, "track": True}
+    write_example(tmp_path, config, "echo {a} >> out.txt")
+    (tmp_path / "df.csv").write_text("a,b\n1,x\n2,y\n3,z\n")
+    runner = CliRunner()
+    args = ["template.txt", "config.yml", "--dataframe", "df.csv"]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    run_jobs()
+    assert len(read_completed("runs")) == 3
+
+    # a template using other columns keeps the task ids
+    write_example(tmp_path, config, "echo {a} {b} >> out.txt")
+    result = runner.invoke(cli, ["resume"] + args)
+    assert result.exit_code == 0, result.output
+    assert open("README_SUBMIT").read() == ""